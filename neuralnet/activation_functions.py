@@ -4,54 +4,104 @@ import numpy as np
 
 ##############################################################################
 
-def sigmoid(x):
+def _exp_limit(x):
+    """Return the lowest value v such that np.exp(-v) does not overflow for the floating point type of x"""
+    dtype = np.asarray(x).dtype
+    if np.issubdtype(dtype, np.floating) and np.finfo(dtype).bits < 64:
+        return - int(np.log(np.finfo(dtype).max))
+    return -709
+
+
+def sigmoid(x, out=None):
     """Definition of the sigmoid function
     
     Parameters
     ----------
-    x : float
-        Input of the sigmoid function.
+    x : float or array-like
+        Input of the sigmoid function. The function is applied elementwise, so any shape (also a batch) is allowed.
+    out : numpy array, optional
+        Array, with the same shape of x, where the result is stored (it can be x itself). The default is None.
 
     Returns
     -------
-    TYPE : float
+    TYPE : float or numpy array
         Output of the sigmoid function.
 
     """
-    x = np.where(x > -709, x, -709)    # Avoid problem of inf value in np.exp(x)
-    return 1 / (1 + np.exp(-x))
+    z = np.maximum(x, _exp_limit(x), out=out)    # Avoid problem of inf value in np.exp(x)
+    z = np.exp(np.negative(z, out=out), out=out)
+    z = np.add(z, 1, out=out)
+    return np.reciprocal(z, out=out)
 
 
-def deriv_sigmoid(x):
+def deriv_sigmoid(x, out=None):
     """Definition of the jacobian (trivial) of the sigmoid function
     
     Parameters
     ----------
     x : array-like
         Input of the derivative/jacobian of the sigmoid function. If the input is an integer or a float, convert it to a list.
+        If the input is bi-dimensional (batch, n), each row is treated as a separate input.
+    out : numpy array, optional
+        Array with shape (..., n, n) where the jacobian is stored. The default is None.
 
     Returns
     -------
     jacobian : numpy array
         Jacobian matrix of the sigmoid function, evaluated for the input x; it is trivial because all the elements outside the principal diagonal are equal to zero.
-        In the particular case of a float as input, the ouput will be a numpy mono-dimensional array with one element (the simple derivative).
+        In the particular case of a float as input, the ouput will be a numpy bi-dimensional array with one element (the simple derivative).
+        For a bi-dimensional input the output is a stack of jacobians with shape (batch, n, n).
 
     """
-    lenght = np.size(x)
-    x = np.array(x)
-    i, j = np.indices((lenght, lenght))
-    jacobian = np.where(i==j, sigmoid(x[i]) * (1 - sigmoid(x[i])), 0)
+    x = np.atleast_1d(x)
+    derivative = deriv_sigmoid_elementwise(x)
+    lenght = x.shape[-1]
+    if out is None:
+        jacobian = np.zeros(x.shape + (lenght,), dtype=derivative.dtype)
+    else:
+        jacobian = out
+        jacobian[...] = 0
+    diagonal = np.arange(lenght)
+    jacobian[..., diagonal, diagonal] = derivative
     return jacobian
 
+def deriv_sigmoid_elementwise(x, out=None):
+    """Definition of the elementwise derivative of the sigmoid function, i.e. the principal diagonal of its jacobian
+    
+    Parameters
+    ----------
+    x : array-like
+        Input of the derivative of the sigmoid function.
+    out : numpy array, optional
+        Array, with the same shape of x, where the result is stored (it can be x itself). The default is None.
+
+    Returns
+    -------
+    TYPE : numpy array
+        Derivative of the sigmoid function evaluated for each element of x, same dimension of the input.
+
+    """
+    # sigmoid(x) * (1 - sigmoid(x)) = 1 / (4 * cosh(x / 2)**2), computed in out without temporary arrays
+    z = np.multiply(x, 0.5, out=out)
+    z = np.abs(z, out=out)
+    z = np.minimum(z, - _exp_limit(x) / 2, out=out)    # Avoid problem of inf value in np.cosh(z)**2
+    z = np.cosh(z, out=out)
+    z = np.square(z, out=out)
+    return np.divide(0.25, z, out=out)
+
 ##############################################################################
 
-def softmax(x):
+def softmax(x, axis=-1, out=None):
     """Definition of the softmax activation function
     
     Parameters
     ----------
     x : array-like
-        Input of the softmax function.
+        Input of the softmax function. If the input is bi-dimensional (batch, n), the softmax is applied to each row.
+    axis : int, optional
+        Axis along which the softmax is normalized. The default is -1 (each row of a batch is a separate input).
+    out : numpy array, optional
+        Array, with the same shape of x, where the result is stored (it can be x itself). The default is None.
 
     Returns
     -------
@@ -59,30 +109,266 @@ def softmax(x):
         Output of the softmax function, same dimension of the input.
 
     """
-    num = np.exp(x - np.max(x))
-    den = np.sum(num)
-    return num / den
+    num = np.subtract(x, np.max(x, axis=axis, keepdims=True), out=out)
+    num = np.exp(num, out=out)
+    num /= np.sum(num, axis=axis, keepdims=True)
+    return num
 
 
-def deriv_softmax(x):
+def deriv_softmax(x, out=None):
     """Definition of the softmax function jacobian
 
     Parameters
     ----------
     x : array-like
-        Input of the softmax function jacobian.
+        Input of the softmax function jacobian. If the input is bi-dimensional (batch, n), each row is treated as a separate input.
+    out : numpy array, optional
+        Array with shape (..., n, n) where the jacobian is stored. The default is None.
 
     Returns
     -------
     jacobian : numpy array
         Jacobian matrix of the softmax function, evaluated for the input x.
+        For a bi-dimensional input the output is a stack of jacobians with shape (batch, n, n).
 
     """
-    lenght = np.size(x)
     a = softmax(x)
-    i, j = np.indices((lenght, lenght))
-    jacobian = np.where(i==j, a[i] * (1 - a[i]), - a[i] * a[j])
+    lenght = a.shape[-1]
+    # Off-diagonal elements are -a_i * a_j, the diagonal ones a_i * (1 - a_i)
+    jacobian = np.multiply(a[..., :, np.newaxis], a[..., np.newaxis, :], out=out)
+    jacobian = np.negative(jacobian, out=jacobian)
+    diagonal = np.arange(lenght)
+    jacobian[..., diagonal, diagonal] += a
     
     return jacobian
 
+##############################################################################
+
+def relu(x, out=None):
+    """Definition of the rectified linear unit: max(x, 0)
+    
+    Parameters
+    ----------
+    x : float or array-like
+        Input of the function. The function is applied elementwise, so any shape (also a batch) is allowed.
+    out : numpy array, optional
+        Array, with the same shape of x, where the result is stored (it can be x itself). The default is None.
+
+    Returns
+    -------
+    TYPE : float or numpy array
+        Output of the rectified linear unit.
+
+    """
+    return np.maximum(x, 0, out=out)
+
+
+def deriv_relu_elementwise(x, out=None):
+    """Definition of the elementwise derivative of the rectified linear unit: 1 for positive values, 0 otherwise
+    
+    Parameters
+    ----------
+    x : array-like
+        Input of the derivative.
+    out : numpy array, optional
+        Array, with the same shape of x, where the result is stored (it can be x itself). The default is None.
+
+    Returns
+    -------
+    TYPE : numpy array
+        Derivative evaluated for each element of x, same dimension of the input.
+
+    """
+    x = np.asarray(x)
+    if out is None:
+        out = np.empty(x.shape, dtype=x.dtype)
+    return np.greater(x, 0, out=out)
+
+##############################################################################
+
+# Slope of the leaky rectified linear unit for negative values
+leaky_relu_slope = 0.01
+
+
+def leaky_relu(x, out=None):
+    """Definition of the leaky rectified linear unit: x for positive values, leaky_relu_slope * x otherwise
+    
+    Parameters
+    ----------
+    x : float or array-like
+        Input of the function. The function is applied elementwise, so any shape (also a batch) is allowed.
+    out : numpy array, optional
+        Array, with the same shape of x, where the result is stored (it can be x itself). The default is None.
+
+    Returns
+    -------
+    TYPE : float or numpy array
+        Output of the leaky rectified linear unit.
+
+    """
+    # max(x, slope * x) is the leaky relu for 0 < slope < 1
+    return np.maximum(x, np.multiply(x, leaky_relu_slope), out=out)
+
+
+def deriv_leaky_relu_elementwise(x, out=None):
+    """Definition of the elementwise derivative of the leaky rectified linear unit: 1 for positive values, leaky_relu_slope otherwise
+    
+    Parameters
+    ----------
+    x : array-like
+        Input of the derivative.
+    out : numpy array, optional
+        Array, with the same shape of x, where the result is stored (it can be x itself). The default is None.
+
+    Returns
+    -------
+    TYPE : numpy array
+        Derivative evaluated for each element of x, same dimension of the input.
+
+    """
+    x = np.asarray(x)
+    positive = x > 0
+    if out is None:
+        out = np.empty(x.shape, dtype=x.dtype)
+    out[...] = leaky_relu_slope
+    out[positive] = 1
+    return out
+
+##############################################################################
+
+def tanh(x, out=None):
+    """Definition of the hyperbolic tangent
+    
+    Parameters
+    ----------
+    x : float or array-like
+        Input of the function. The function is applied elementwise, so any shape (also a batch) is allowed.
+    out : numpy array, optional
+        Array, with the same shape of x, where the result is stored (it can be x itself). The default is None.
+
+    Returns
+    -------
+    TYPE : float or numpy array
+        Output of the hyperbolic tangent, in the range [-1, 1].
+
+    """
+    return np.tanh(x, out=out)
+
+
+def deriv_tanh_elementwise(x, out=None):
+    """Definition of the elementwise derivative of the hyperbolic tangent: 1 - tanh(x)^2
+    
+    Parameters
+    ----------
+    x : array-like
+        Input of the derivative.
+    out : numpy array, optional
+        Array, with the same shape of x, where the result is stored (it can be x itself). The default is None.
+
+    Returns
+    -------
+    TYPE : numpy array
+        Derivative evaluated for each element of x, same dimension of the input.
+
+    """
+    t = np.tanh(x, out=out)
+    t = np.square(t, out=out)
+    return np.subtract(1, t, out=out)
+
+##############################################################################
+
+def identity(x, out=None):
+    """Definition of the identity (linear) activation function
+    
+    Parameters
+    ----------
+    x : float or array-like
+        Input of the function.
+    out : numpy array, optional
+        Array, with the same shape of x, where the result is stored (it can be x itself). The default is None.
+
+    Returns
+    -------
+    TYPE : float or numpy array
+        Copy of x (or x itself, if out is x).
+
+    """
+    if out is None:
+        return np.array(x, copy=True)
+    if out is not x:
+        np.copyto(out, x)
+    return out
+
+
+def deriv_identity_elementwise(x, out=None):
+    """Definition of the elementwise derivative of the identity: 1 for each element
+    
+    Parameters
+    ----------
+    x : array-like
+        Input of the derivative.
+    out : numpy array, optional
+        Array, with the same shape of x, where the result is stored (it can be x itself). The default is None.
+
+    Returns
+    -------
+    TYPE : numpy array
+        Array of ones, same dimension of the input.
+
+    """
+    x = np.asarray(x)
+    if out is None:
+        return np.ones(x.shape, dtype=x.dtype)
+    out[...] = 1
+    return out
+
+###############################################################################
+
+# Registry of the activation functions, by name: the network can use (and save and load) the registered ones
+registry = {}
+
+# Jacobians of the registered activation functions that have one (needed only if there is no elementwise derivative)
+jacobians = {}
+
+# Activation functions whose jacobian is diagonal, with their elementwise derivative:
+# the backpropagation can use a simple product instead of building the jacobian
+elementwise_derivatives = {}
+
+
+def register(function, jacobian=None, elementwise_derivative=None):
+    """Register an activation function, so that it can be used by the network, saved and loaded by its name
+    
+    Parameters
+    ----------
+    function : function
+        Activation function, with signature function(x, out=None) (x can be a batch with shape (batch, n)).
+    jacobian : function, optional
+        Jacobian of the function, with signature jacobian(x, out=None) returning an array (..., n, n). The default is None.
+    elementwise_derivative : function, optional
+        Elementwise derivative, for functions with a diagonal jacobian, with signature elementwise_derivative(x, out=None).
+        The default is None.
+
+    Returns
+    -------
+    function
+        The registered function.
+
+    """
+    if jacobian is None and elementwise_derivative is None:
+        raise ValueError("The activation function {} needs a jacobian or an elementwise derivative".format(function.__name__))
+    registry[function.__name__] = function
+    if jacobian is not None:
+        jacobians[function.__name__] = jacobian
+    if elementwise_derivative is not None:
+        elementwise_derivatives[function.__name__] = elementwise_derivative
+    return function
+
+
+register(sigmoid, jacobian=deriv_sigmoid, elementwise_derivative=deriv_sigmoid_elementwise)
+register(softmax, jacobian=deriv_softmax)
+register(relu, elementwise_derivative=deriv_relu_elementwise)
+register(leaky_relu, elementwise_derivative=deriv_leaky_relu_elementwise)
+register(tanh, elementwise_derivative=deriv_tanh_elementwise)
+register(identity, elementwise_derivative=deriv_identity_elementwise)
+
 ###############################################################################
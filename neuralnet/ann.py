@@ -1,20 +1,40 @@
 import numpy as np
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
 from neuralnet import activation_functions as act
 from neuralnet import loss_functions as lf
+from neuralnet import initializers as init
+from neuralnet import optimizers as opt
+from neuralnet import schedules as sch
+from neuralnet import checkpoint as ckpt
+from neuralnet import parallel
+from neuralnet import data
+from neuralnet import metrics
+from neuralnet import inference
 
 class Ann:
     
-    activation_list = {act.sigmoid.__name__ : act.sigmoid,
-                           act.softmax.__name__ : act.softmax}
+    # Registry of the activation functions by name (see activation_functions.register)
+    activation_list = act.registry
     
     loss_list = {lf.binary_cross_entropy.__name__ : lf.binary_cross_entropy,
                      lf.cross_entropy.__name__ : lf.cross_entropy}
     
+    # Derivatives of the loss with respect to the output linear combination, for the (activation, loss) pairs that have a closed form
+    fused_deriv_list = {(act.sigmoid.__name__, lf.binary_cross_entropy.__name__) : lf.binary_cross_entropy_sigmoid_deriv,
+                            (act.softmax.__name__, lf.cross_entropy.__name__) : lf.cross_entropy_softmax_deriv}
     
+    optimizer_list = {opt.SGD.name : opt.SGD,
+                          opt.Momentum.name : opt.Momentum,
+                          opt.Nesterov.name : opt.Nesterov,
+                          opt.RMSProp.name : opt.RMSProp,
+                          opt.Adam.name : opt.Adam}
     
-    def __init__(self, num_inputs, num_hidden, num_outputs, activation_function, loss_function, seed=None):
+    
+    
+    def __init__(self, num_inputs, num_hidden, num_outputs, activation_function, loss_function, seed=None, dtype=np.float64, optimizer=None,
+                 weights_initializer=None, biases_initializer=init.zeros):
         
         """Initialize the Artificial Neural Network
         
@@ -27,13 +47,29 @@ class Ann:
             by the dimension of the array
         num_output : int
             The number of outputs of the Neural Network
-        activation_function : function
-            Activation function used by each neuron to produce its output.
+        activation_function : function or list
+            Activation function used by each neuron to produce its output (see activation_functions.registry), or a list
+            with the activation function of each layer (hidden layers first, then the output layer), e.g.
+            [act.relu, act.relu, act.softmax]: elementwise functions (relu, leaky_relu, tanh, sigmoid, identity) in the hidden
+            layers have a cheap derivative, while the output layer keeps softmax or sigmoid.
         loss_function : function
             Function used to evaluete the difference between the output produced by the network and the target one.
             The goal is to minimize this function with respect the weights and the biases.
         seed : int
-            Default value = None. Value used to set the seed for the initial random generation of biases and weights
+            Default value = None. Seed of the random generator of the network (a local np.random.Generator: the global
+            random state of NumPy is not modified), used for the initial values of weights and biases and to shuffle the training data.
+        dtype : data-type
+            Default value = np.float64. Floating point type of weights, biases and of all the values computed by the network
+            (np.float32 halves the memory and speeds up the matrix products).
+        optimizer : optimizers.Optimizer
+            Default value = None. Rule used to update weights and biases in the training (e.g. optimizers.Adam()); its state
+            is kept between calls of train and saved with the network. If it is None, the stochastic gradient descendent is used.
+        weights_initializer : function or list
+            Default value = None. Initializer of the weights (see initializers.registry, e.g. initializers.xavier_uniform), or a list
+            with the initializer of each layer. If it is None, each layer uses He initialization if its activation function is
+            relu or leaky relu, Xavier/Glorot initialization otherwise. It is saved with the network.
+        biases_initializer : function or list
+            Default value = initializers.zeros. Initializer of the biases, or a list with the initializer of each layer.
         
         Returns
         -------
@@ -46,56 +82,152 @@ class Ann:
         
         """
         
+        self._setup(num_inputs, num_hidden, num_outputs, activation_function, loss_function, seed, dtype, optimizer,
+                    weights_initializer, biases_initializer)
         
-        self.num_inputs = num_inputs
-        self.num_hidden = np.array(num_hidden)
-        self.num_outputs = num_outputs
-        self.layers = np.concatenate(([self.num_inputs], self.num_hidden, [self.num_outputs]))
-        self._set_activation_function(activation_function)
-        self._set_loss_function(loss_function)
-        
-        
-        # Set the seed for the random generation
-        np.random.seed(seed)
-        
-        # Create weights and initialize them with random values
+        # Create weights and initialize them with the initializer of each layer
         self.weights = []       
         for i in range (len(self.layers) - 1):
-            w = np.random.rand(int(self.layers[i]) , int(self.layers[i+1]))
+            w = self.weights_initializers[i]((int(self.layers[i]) , int(self.layers[i+1])), self._rng, self.dtype)
             self.weights.append(w)      
         # Attention: here weights is a list of bi-dimensional numpy arrays
         
-        # Create biases and initialize them with random values
+        # Create biases and initialize them with the initializer of each layer
         self.biases = []
         for i in range (len(self.layers) - 1):
-            b = np.random.rand(int(self.layers[i+1]))
+            b = self.biases_initializers[i]((int(self.layers[i+1]),), self._rng, self.dtype)
             self.biases.append(b)
+    
+    
+    @classmethod
+    def _from_parameters(cls, weights, biases, **kwargs):
+        """Return a network (with the keyword arguments of Ann) that uses the given lists of weights and biases as they are
+        (e.g. memory-mapped by load_neural_network), without drawing their initial values"""
+        neural_network = cls.__new__(cls)
+        neural_network._setup(**kwargs)
+        neural_network._set_parameters(weights, biases)
+        return neural_network
+    
+    
+    def _setup(self, num_inputs, num_hidden, num_outputs, activation_function, loss_function, seed=None, dtype=np.float64,
+               optimizer=None, weights_initializer=None, biases_initializer=init.zeros):
+        """Set up everything of the network (with the arguments of __init__) except the values of weights and biases"""
+        self.num_inputs = num_inputs
+        self.num_hidden = np.array(num_hidden)
+        self.num_outputs = num_outputs
+        self.layers = np.concatenate(([self.num_inputs], self.num_hidden, [self.num_outputs]))
+        self.dtype = np.dtype(dtype)
+        self._set_activation_function(activation_function)
+        self._set_loss_function(loss_function)
+        self._set_fused_deriv()
+        self._set_optimizer(optimizer)
+        
+        
+        # Random generator used to initialize weights and biases and to shuffle the training data
+        self._rng = np.random.default_rng(seed)
+        self._set_initializers(weights_initializer, biases_initializer)
         
         # Create a list of array that will store the values of the neuron's linear combinations
         self.linear_comb = []
         for i in range (len(self.layers) - 1):
-            single_layer = np.zeros(int(self.layers[i+1]))
+            single_layer = np.zeros(int(self.layers[i+1]), dtype=self.dtype)
             self.linear_comb.append(single_layer)
               
         
         # Create a list of array that will store the values of the neuron's activations
         self.activations = []
         for i in range (len(self.layers)):
-            single_layer = np.zeros(int(self.layers[i])) 
+            single_layer = np.zeros(int(self.layers[i]), dtype=self.dtype) 
             self.activations.append(single_layer)
         
-        # Create a list of array that will store the weights' derivatives
+        # Create a list of array that will store the weights' derivatives (zero-filled memory is not used until it is written)
         self.weights_deriv = []
         for i in range(len(self.layers) - 1):
-            d_w = np.random.rand(int(self.layers[i]) , int(self.layers[i+1]))
+            d_w = np.zeros((int(self.layers[i]) , int(self.layers[i+1])), dtype=self.dtype)
             self.weights_deriv.append(d_w)
         
         # Create a list of array that will store the biases' derivatives
         self.biases_deriv = []
         for i in range (len(self.layers) - 1):
-            d_b = np.random.rand(int(self.layers[i+1]))
+            d_b = np.zeros(int(self.layers[i+1]), dtype=self.dtype)
             self.biases_deriv.append(d_b)
         
+        # Buffers for the training are allocated for a given batch size (see _allocate_workspace)
+        self._free_workspace()
+        # Vectors used by predict_one, allocated at its first call
+        self._sample_buffers = None
+        
+            
+    def _allocate_workspace(self, batch_size):
+        """Allocate the buffers used by forward propagation, backpropagation and gradient descendent for batches
+        of up to batch_size inputs, so that each step of training writes in them instead of allocating new arrays.
+        Nothing is done if the workspace is already allocated for the same batch size.
+        
+        Parameters
+        ----------
+        batch_size : int
+            Maximum number of inputs of a batch.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self._workspace_size == batch_size:
+            return
+        
+        # New lists (and not in-place changes) so that copies of the network sharing the parameters get their own buffers
+        self._inputs_buffer = np.empty((batch_size, self.num_inputs), dtype=self.dtype)
+        self._linear_comb_buffer = []
+        self._activations_buffer = []
+        self._deltas_buffer = []
+        self._errors_buffer = []
+        self._jacobians_buffer = []
+        self.linear_comb = list(self.linear_comb)
+        self.activations = list(self.activations)
+        self.weights_deriv = [np.zeros(w.shape, dtype=self.dtype) for w in self.weights]
+        self.biases_deriv = [np.zeros(b.shape, dtype=self.dtype) for b in self.biases]
+        
+        for i in range(len(self.layers) - 1):
+            neurons = int(self.layers[i+1])
+            self._linear_comb_buffer.append(np.empty((batch_size, neurons), dtype=self.dtype))
+            self._activations_buffer.append(np.empty((batch_size, neurons), dtype=self.dtype))
+            self._deltas_buffer.append(np.empty((batch_size, neurons), dtype=self.dtype))
+            self._errors_buffer.append(np.empty((batch_size, neurons), dtype=self.dtype))
+            if self.act_funcs_elementwise_deriv[i] is None:
+                self._jacobians_buffer.append(np.empty((batch_size, neurons, neurons), dtype=self.dtype))
+            else:
+                self._jacobians_buffer.append(None)
+        self._losses_buffer = np.empty(batch_size, dtype=self.dtype)
+        self._workspace_size = batch_size
+    
+    
+    def _free_workspace(self):
+        """Release the buffers allocated by _allocate_workspace: forward propagation and backpropagation allocate new arrays again"""
+        self._workspace_size = None
+        self._inputs_buffer = None
+        self._linear_comb_buffer = []
+        self._activations_buffer = []
+        self._deltas_buffer = []
+        self._errors_buffer = []
+        self._jacobians_buffer = []
+        self._losses_buffer = None
+    
+    
+    def _workspace_rows(self, array):
+        """Return the number of rows of array if it is a batch that fits in the workspace buffers, None otherwise"""
+        if self._workspace_size is not None and np.ndim(array) == 2 and len(array) <= self._workspace_size:
+            return len(array)
+        return None
+    
+    
+    @staticmethod
+    def _workspace_view(buffers, i, rows):
+        """Return the first rows of the i-th buffer of the list buffers, or None (allocate a new array) if rows is None"""
+        if rows is None:
+            return None
+        return buffers[i][:rows]
+    
             
     def _forward_prop(self, inputs):
         
@@ -104,60 +236,92 @@ class Ann:
         Parameters
         ----------
         inputs : array_like
-            Vector of inputs for the Neural Network
+            Vector of inputs for the Neural Network, or matrix (batch, num_inputs) whose rows are propagated together.
         
         Returns
         -------
         array_like
-            Array of outputs of the neural network
+            Array of outputs of the neural network (one row for each input in the batch case)
         
         """
         
-        activations = np.array(inputs)
+        activations = np.asarray(inputs)
+        rows = self._workspace_rows(activations)
+        if activations.dtype != self.dtype:
+            # Cast the inputs, in the workspace buffer if possible, so that all the products are done with dtype
+            if rows is None:
+                activations = activations.astype(self.dtype)
+            else:
+                activations = self._workspace_view([self._inputs_buffer], 0, rows)
+                np.copyto(activations, inputs, casting='unsafe')
         self.activations[0] = activations
         
         for i in range(self.layers.size - 1):
             # Calculate the linear combination between inputs of the previous layer and weights of the current one
-            z = np.dot(activations, self.weights[i]) + self.biases[i]
+            z = np.dot(activations, self.weights[i], out=self._workspace_view(self._linear_comb_buffer, i, rows))
+            z += self.biases[i]
             self.linear_comb[i] = z
             
             # Apply the activation function to the linear part
-            activations = self.activation_func(z)
+            activations = self.activation_funcs[i](z, out=self._workspace_view(self._activations_buffer, i, rows))
             
             # Store the activations in object attribute self.activations
             self.activations[i+1] = activations
         return activations
     
     
-    def _backward_prop(self, error,verbose = False):
+    def _backward_prop(self, error,verbose = False, fused = False):
         """ Perform the backpropagation algorithm
         
         Parameters
         ----------
         error : array_like
             Derivative of the error function evaluated in each neuron of the output layer.
+            If it is bi-dimensional (batch, num_outputs), the derivatives of weights and biases are averaged over the batch.
         verbose : Boolean, optional
             If it is set to True, print all the derivatives of the weights and biases. The default is False.
+        fused : Boolean, optional
+            If it is set to True, error is already the derivative with respect to the linear combination of the output layer
+            (see fused_deriv_list), so the derivative of the output activation function is not applied. The default is False.
 
         Returns
         -------
         array_like
-            Error backpropagated to the input layer.
+            Error backpropagated to the input layer. It is None when the batch is in the workspace buffers (training),
+            where it is not computed because it is not needed.
         
         """
         
-        
+        error = np.asarray(error)
+        rows = self._workspace_rows(error)
         for i in reversed(range(len(self.weights_deriv))):
             z = self.linear_comb[i]    
-            delta = np.dot(error, self.act_func_deriv(z))
-            delta_reshaped = delta.reshape(delta.shape[0], -1).T          
+            if fused and i == len(self.weights_deriv) - 1:
+                delta = error
+            elif self.act_funcs_elementwise_deriv[i] is not None:
+                # Diagonal jacobian: the vector-jacobian product is an elementwise product
+                delta = self.act_funcs_elementwise_deriv[i](z, out=self._workspace_view(self._deltas_buffer, i, rows))
+                delta *= error
+            else:
+                # Vector-jacobian product, row by row in the batch case
+                jacobian = self.act_funcs_deriv[i](z, out=self._workspace_view(self._jacobians_buffer, i, rows))
+                delta = np.einsum('...i,...ij->...j', error, jacobian, out=self._workspace_view(self._deltas_buffer, i, rows))
+            delta_reshaped = delta.reshape(-1, delta.shape[-1])
             current_activation = self.activations[i]
-            current_activation_reshaped = current_activation.reshape(current_activation.shape[0], -1)
+            current_activation_reshaped = current_activation.reshape(-1, current_activation.shape[-1])
+            batch_size = len(delta_reshaped)
             
-            self.weights_deriv[i] = np.dot(current_activation_reshaped, delta_reshaped)
-            self.biases_deriv[i] = delta
+            # The derivatives are written in place, averaged over the batch
+            np.dot(current_activation_reshaped.T, delta_reshaped, out=self.weights_deriv[i])
+            np.sum(delta_reshaped, axis=0, out=self.biases_deriv[i])
+            if batch_size > 1:
+                self.weights_deriv[i] /= batch_size
+                self.biases_deriv[i] /= batch_size
             
-            error = np.dot(delta, self.weights[i].T)
+            if i > 0 or rows is None:
+                error = np.dot(delta, self.weights[i].T, out=self._workspace_view(self._errors_buffer, i - 1, rows))
+            else:
+                error = None
             
             if verbose == True:
                 print ("Derivatives for W{}: {}".format(i, self.weights_deriv[i]))
@@ -167,7 +331,7 @@ class Ann:
             
             
     def _gradient_descendent(self, learning_rate):
-        """ Implementation of the stochastic gradient descendent to update weights and biases
+        """ Update in place weights and biases with the optimizer of the network (the stochastic gradient descendent by default)
         
         Parameters
         ----------
@@ -182,28 +346,157 @@ class Ann:
             List of biases updated for each layer.
 
         """
-        for i in range(len(self.weights)):
-            # Update weights and biases for each level of the neural network
-            self.weights[i] -= learning_rate*self.weights_deriv[i]
-            self.biases[i] -= learning_rate*self.biases_deriv[i]
+        self.optimizer.step(self.weights + self.biases, self.weights_deriv + self.biases_deriv, learning_rate)
         return self.weights, self.biases
     
     
-    def train(self, inputs, targets, epochs, learning_rate, verbose=True):
-        """ Train method: the neural network update weights and biases, according to the inputs and the targets in order to minimize the loss function
+    def _batch_gradients(self, inputs, targets):
+        """Compute the derivatives of weights and biases (forward propagation and backpropagation) on a batch of data,
+        averaged over the batch and stored in weights_deriv and biases_deriv
         
         Parameters
         ----------
         inputs : array_like
-            Array of input data used to train the network, together with the array of targets.
+            Matrix (batch, num_inputs) of input data.
         targets : array_like
-            Array of labels used to train the network, together with the array of input data.
-        epochs : int
-            Number of times the entire set of input data is given to the neural network for the process of training.
+            Matrix (batch, num_outputs) of labels linked with the input data.
+
+        Returns
+        -------
+        float
+            Sum of the errors evaluated with the loss function over the batch.
+
+        """
+        # forward propagation
+        output = self._forward_prop(inputs=inputs)
+        rows = self._workspace_rows(output)
+        error_buffer = self._workspace_view(self._errors_buffer, -1, rows)
+        
+        # calculate the error, directly with respect to the output linear combination when there is a closed form
+        if self.fused_deriv is not None:
+            error = self.fused_deriv(prediction=output, target=targets, out=error_buffer)
+        else:
+            error = self.loss_func_deriv(prediction=output, target=targets, out=error_buffer)
+        
+        # backpropagation
+        self._backward_prop(error=error, fused=self.fused_deriv is not None)
+        
+        # evaluate the error for each input
+        losses = self.loss_func(prediction=output, target=targets, axis=-1, out=self._workspace_view([self._losses_buffer], 0, rows))
+        return np.sum(losses)
+    
+    
+    def _train_batch(self, inputs, targets, learning_rate):
+        """Perform a single step of training (forward propagation, backpropagation and gradient descendent) on a batch of data
+        
+        Parameters
+        ----------
+        inputs : array_like
+            Matrix (batch, num_inputs) of input data.
+        targets : array_like
+            Matrix (batch, num_outputs) of labels linked with the input data.
         learning_rate : float
             Learning rate used to update weights and biases with the gradient descendent method.
+
+        Returns
+        -------
+        float
+            Sum of the errors evaluated with the loss function over the batch.
+
+        """
+        sum_error = self._batch_gradients(inputs, targets)
+        
+        # apply gradient descendent
+        self._gradient_descendent(learning_rate=learning_rate)
+        
+        return sum_error
+    
+    
+    def _accumulate_gradients(self, accumulators, rows, first):
+        """Add the derivatives of weights and biases of a batch of rows inputs (averaged over the batch), multiplied by rows,
+        to the accumulators (a list of arrays with the shapes of weights and biases), which are overwritten if first is True"""
+        for accumulator, derivative in zip(accumulators, self.weights_deriv + self.biases_deriv):
+            if first:
+                np.multiply(derivative, rows, out=accumulator)
+            else:
+                # the derivatives are overwritten by the next batch, so they are used as scratch buffer
+                accumulator += np.multiply(derivative, rows, out=derivative)
+    
+    
+    def _apply_accumulated_gradients(self, accumulators, rows, learning_rate):
+        """Update weights and biases with the derivatives in the accumulators averaged over the rows accumulated inputs"""
+        for accumulator, derivative in zip(accumulators, self.weights_deriv + self.biases_deriv):
+            np.divide(accumulator, rows, out=derivative)
+        self._gradient_descendent(learning_rate=learning_rate)
+    
+    
+    def train(self, inputs, targets, epochs, learning_rate, verbose=True, batch_size=1, workers=1, shuffle_buffer=0, shuffle=False,
+              validation=None, validation_interval=1, patience=None, min_delta=0., monitor='loss', restore_best=True,
+              checkpoint_dir=None, checkpoint_interval=1, resume_from=None, accumulation_steps=1):
+        """ Train method: the neural network update weights and biases, according to the inputs and the targets in order to minimize the loss function
+        
+        Parameters
+        ----------
+        inputs : array_like or iterable
+            Array of input data used to train the network, together with the array of targets (it can be a np.memmap, which
+            is read a batch at a time). If targets is None, source of (inputs, targets) chunks of data that are streamed
+            through the network with bounded memory: an iterable, or a function returning a new iterable for each epoch
+            (see data.BatchStream), or a data.DataLoader, which prepares the batches in a background thread.
+        targets : array_like or None
+            Array of labels used to train the network, together with the array of input data, or None if inputs is a source
+            of chunks or a data.DataLoader.
+        epochs : int
+            Number of times the entire set of input data is given to the neural network for the process of training.
+        learning_rate : float or schedules.Schedule
+            Learning rate used to update weights and biases with the gradient descendent method, or a schedule that gives
+            the learning rate of each update and receives the mean error of each epoch (e.g. schedules.ReduceOnPlateau).
         verbose : bool
             Default value: True. If it is equal to True, the error is printed for each epoch. 
+        batch_size : int
+            Default value: 1. Number of inputs propagated together through the network for each update of weights and biases;
+            the derivatives are averaged over the batch. With the default value the stochastic gradient descendent is performed.
+            It is not used with a data.DataLoader, which has its own batch size.
+        workers : int
+            Default value: 1. If it is greater than one, each batch is split among this number of processes, which compute
+            the derivatives of their part in parallel (see parallel.DataParallel); useful with large batches.
+        shuffle_buffer : int
+            Default value: 0. If it is greater than zero, the data is read in consecutive chunks of (about) this number of
+            inputs, and each chunk is shuffled before being split in batches, with a generator seeded by the seed of the network.
+        shuffle : bool
+            Default value: False. If it is equal to True, the inputs (arrays) are presented in a new random order at each
+            epoch, with a generator seeded by the seed of the network: a permutation of the indices is used to gather each
+            batch in a reusable buffer, so the data is never copied.
+        validation : tuple
+            Default value: None. Validation set (inputs, targets), evaluated with a batched forward propagation every
+            validation_interval epochs.
+        validation_interval : int
+            Default value: 1. Number of epochs between two evaluations of the validation set.
+        patience : int
+            Default value: None. If it is given, the training stops when the validation score has not improved for this
+            number of evaluations (early stopping).
+        min_delta : float
+            Default value: 0. Minimum change of the validation score considered an improvement.
+        monitor : string
+            Default value: 'loss'. Validation score: 'loss' (mean error evaluated with the loss function, to be minimized)
+            or 'accuracy' (fraction of correct classifications, to be maximized).
+        restore_best : bool
+            Default value: True. If it is equal to True, at the end of the training weights and biases are set to the ones
+            with the best validation score, kept in a preallocated buffer.
+        checkpoint_dir : string
+            Default value: None. If it is given, every checkpoint_interval epochs the state of the training (weights, biases,
+            optimizer, schedule, counters and random generator) is saved in a new checkpoint in this directory, written by
+            a background thread (see checkpoint.Checkpointer).
+        checkpoint_interval : int
+            Default value: 1. Number of epochs between two checkpoints.
+        resume_from : string
+            Default value: None. Checkpoint directory (or directory of a single checkpoint) from which the training is
+            resumed: with the same arguments, the training continues exactly as if it had not been interrupted (the random
+            generator of a data.DataLoader given as inputs is also saved in the checkpoints and restored).
+        accumulation_steps : int
+            Default value: 1. Number of batches (micro-batches) whose derivatives are accumulated, in buffers allocated once,
+            before each update of weights and biases: the update is the same of a batch of accumulation_steps * batch_size
+            inputs, while the memory of forward propagation and backpropagation is the one of batch_size inputs. The last
+            update of each epoch uses the batches left.
 
         Returns
         -------
@@ -215,49 +508,210 @@ class Ann:
         >>> import import activation_functions as act
         >>> import loss_functions as lf
         >>> ann.Ann(num_inputs=10, num_hidden=[5, 3], num_outputs=2, activation_function=act.sigmoid, loss_function=lf.binary_cross_entropy)
-        >>> Ann.train(inputs=data, targets=labels, epochs=1000, learning_rate=0.1)
+        >>> Ann.train(inputs=data, targets=labels, epochs=1000, learning_rate=0.1, batch_size=32)
 
         """     
-        n = len(inputs)
-        
-        for i in range(epochs):
-            
-            sum_error = 0
-            
-            for single_input, target in zip(inputs, targets):
+        # batches() returns an iterable over the batches of an epoch
+        if isinstance(inputs, data.DataLoader):
+            batch_size = inputs.batch_size
+            batches = lambda: inputs
+        elif targets is None:
+            stream = data.BatchStream(inputs, batch_size, self.num_inputs, self.num_outputs, self.dtype, shuffle_buffer, self._rng)
+            batches = lambda: stream
+        else:
+            inputs = np.reshape(inputs, (-1, self.num_inputs))
+            targets = np.reshape(targets, (-1, self.num_outputs))
+            batch_size = min(batch_size, len(inputs))
+            if shuffle and shuffle_buffer > 0:
+                raise ValueError("Use either shuffle (random order of all the inputs) or shuffle_buffer (random order inside chunks)")
+            if shuffle:
+                stream = data.ShuffledArrays(inputs, targets, batch_size, self.dtype, self._rng)
+                batches = lambda: stream
+            elif shuffle_buffer > 0:
+                stream = data.BatchStream(lambda: data.array_chunks(inputs, targets, shuffle_buffer), batch_size,
+                                          self.num_inputs, self.num_outputs, self.dtype, shuffle_buffer, self._rng)
+                batches = lambda: stream
+            else:
+                batches = lambda: data.array_chunks(inputs, targets, batch_size)
+        
+        schedule = learning_rate if isinstance(learning_rate, sch.Schedule) else sch.Constant(learning_rate)
+        step = 0
+        if accumulation_steps < 1:
+            raise ValueError("accumulation_steps must be at least 1, not {}".format(accumulation_steps))
+        
+        if validation is not None:
+            if monitor not in ('loss', 'accuracy'):
+                raise ValueError("monitor must be 'loss' or 'accuracy', not {}".format(monitor))
+            validation_inputs = np.reshape(validation[0], (-1, self.num_inputs))
+            validation_targets = np.reshape(validation[1], (-1, self.num_outputs))
+            validation_predictions = np.empty((len(validation_inputs), self.num_outputs), dtype=self.dtype)
+            # weights and biases with the best validation score, in a single buffer allocated once
+            best_parameters = np.empty(sum(w.size + b.size for w, b in zip(self.weights, self.biases)), dtype=self.dtype)
+            best_score = np.inf
+            waited = 0
+        
+        start_epoch = 0
+        error = None
+        if resume_from is not None:
+            location = ckpt.latest_checkpoint(resume_from)
+            if location is None:
+                raise ValueError("No checkpoint to resume from in {}".format(resume_from))
+            training_state, arrays = ckpt.restore(self, location)
+            start_epoch, step, error = training_state['Epoch'], training_state['Step'], training_state['Error']
+            schedule.set_state(training_state['Schedule'])
+            if isinstance(inputs, data.DataLoader) and 'Loader random generator' in training_state:
+                inputs.rng.bit_generator.state = training_state['Loader random generator']
+            if validation is not None and 'Validation' in training_state:
+                best_score, waited = training_state['Validation']
+                np.copyto(best_parameters, arrays['best_parameters'])
+        checkpointer = None if checkpoint_dir is None else ckpt.Checkpointer(self, checkpoint_dir)
+        
+        if workers > 1:
+            train_batch = parallel.DataParallel(self, workers, batch_size)
+            batch_gradients = train_batch.batch_gradients
+        else:
+            self._allocate_workspace(batch_size)
+            train_batch = self._train_batch
+            batch_gradients = self._batch_gradients
+        if accumulation_steps > 1:
+            accumulators = [np.empty(p.shape, dtype=self.dtype) for p in self.weights + self.biases]
+        
+        try:
+            for i in range(start_epoch, epochs):
                 
-                # forward propagation
-                output = self._forward_prop(inputs=single_input)
+                sum_error = 0
+                n = 0
+                # number of batches and of inputs whose derivatives are in the accumulators
+                accumulated = 0
+                accumulated_rows = 0
                 
-                # calculate the error
-                error = self.loss_func_deriv(prediction=output, target=target)
+                for batch_inputs, batch_targets in batches():
+                    if accumulation_steps == 1:
+                        sum_error += train_batch(batch_inputs, batch_targets, schedule(i, step))
+                        step += 1
+                    else:
+                        sum_error += batch_gradients(batch_inputs, batch_targets)
+                        self._accumulate_gradients(accumulators, len(batch_inputs), first=accumulated == 0)
+                        accumulated += 1
+                        accumulated_rows += len(batch_inputs)
+                        if accumulated == accumulation_steps:
+                            self._apply_accumulated_gradients(accumulators, accumulated_rows, schedule(i, step))
+                            step += 1
+                            accumulated = 0
+                            accumulated_rows = 0
+                    n += len(batch_inputs)
                 
-                # backpropagation
-                self._backward_prop(error=error)
+                if accumulated > 0:
+                    self._apply_accumulated_gradients(accumulators, accumulated_rows, schedule(i, step))
+                    step += 1
                 
-                # apply gradient descendent
-                self._gradient_descendent(learning_rate=learning_rate)
+                if n == 0:
+                    raise ValueError("No data to train the network")
+                error = float(sum_error / n)
+                schedule.end_epoch(i, error)
+                    
+                if verbose == True:
+                    print("Epoch {}/{} - Error: {}".format(i+1, epochs, error))
                 
-                # evaluate the error for each input
-                sum_error += self.loss_func(prediction=output, target=target)
+                stop = False
+                if validation is not None and (i + 1) % validation_interval == 0:
+                    score = self._validation_score(validation_inputs, validation_targets, monitor, validation_predictions)
+                    if verbose == True:
+                        print("Epoch {}/{} - Validation {}: {}".format(i+1, epochs, monitor, abs(score)))
+                    if score < best_score - min_delta:
+                        best_score = score
+                        waited = 0
+                        self._copy_parameters_to(best_parameters)
+                    else:
+                        waited += 1
+                        stop = patience is not None and waited >= patience
+                
+                if checkpointer is not None and (i + 1) % checkpoint_interval == 0:
+                    training_state = {'Epoch' : i + 1, 'Step' : step, 'Error' : error, 'Schedule' : schedule.get_state()}
+                    if isinstance(inputs, data.DataLoader):
+                        # the loader shuffles the data with its own generator
+                        training_state['Loader random generator'] = inputs.rng.bit_generator.state
+                    arrays = {}
+                    if validation is not None:
+                        training_state['Validation'] = [best_score, waited]
+                        arrays['best_parameters'] = best_parameters
+                    checkpointer.save(training_state, arrays)
+                
+                if stop:
+                    if verbose == True:
+                        print("Early stopping: no improvement in the last {} evaluations".format(waited))
+                    break
+            
+            if validation is not None and restore_best == True and best_score < np.inf:
+                self._copy_parameters_from(best_parameters)
+        finally:
+            if workers > 1:
+                train_batch.close()
+            if checkpointer is not None:
+                checkpointer.wait()
+        
+        return error
+    
+    
+    def train_async(self, inputs, targets, epochs, learning_rate, verbose=True, batch_size=1, threads=2):
+        """ Asynchronous train method (Hogwild): the data is split among several threads, which train the network on their part
+        at the same time and update weights and biases in place without locks (see parallel.hogwild).
+        The result depends on the scheduling of the threads, so it is not reproducible also with a fixed seed.
+        
+        Parameters
+        ----------
+        inputs : array_like
+            Array of input data used to train the network, together with the array of targets.
+        targets : array_like
+            Array of labels used to train the network, together with the array of input data.
+        epochs : int
+            Number of times the entire set of input data is given to the neural network for the process of training.
+        learning_rate : float
+            Learning rate used to update weights and biases with the gradient descendent method.
+        verbose : bool
+            Default value: True. If it is equal to True, the error is printed for each epoch.
+        batch_size : int
+            Default value: 1. Number of inputs propagated together by a thread for each update of weights and biases.
+        threads : int
+            Default value: 2. Number of threads.
+
+        Returns
+        -------
+        float
+            Mean error evaluated with the loss function in the last epoch.
+
+        """
+        inputs = np.reshape(inputs, (-1, self.num_inputs))
+        targets = np.reshape(targets, (-1, self.num_outputs))
+        n = len(inputs)
+        
+        def print_error(i, sum_error):
             if verbose == True:
                 print("Epoch {}/{} - Error: {}".format(i+1, epochs, float(sum_error / n)))
         
-        return sum_error / n
+        errors = parallel.hogwild(self, inputs, targets, epochs, learning_rate, threads, batch_size, epoch_end=print_error)
+        return float(errors[-1] / n)
                 
                            
-    def predict(self, inputs):
+    def predict(self, inputs, out=None):
         """Once the neural network is trained, this method predicts the output of a given input
         
+        All the inputs are propagated together, with one matrix product for each layer; the values stored for the backpropagation
+        (linear combinations and activations) are not modified.
+        
         Parameters
         ----------
         inputs : array_like
             Input data of which you are interested to predict the output of the neural network.
+        out : numpy array, optional
+            C-contiguous array with shape (number of inputs, num_outputs), and the same dtype of the network,
+            where the predictions are written. The default is None (a new array is allocated).
 
         Returns
         -------
         prediction : array_like
             Result of the forward propagation of the input data with the trained neural network (weights and biases updated).
+            It has shape (number of inputs, num_outputs).
 
         Example
         -------
@@ -265,17 +719,125 @@ class Ann:
         
         """
         
-        if self.num_outputs == 1:
-            predictions = self._forward_prop(inputs)
-            predictions = np.reshape(predictions, (len(predictions), 1))
-        else:
-            inp = np.reshape(inputs, (-1, self.num_inputs))
-            predictions = np.zeros((len(inp), self.num_outputs))
-            for i in range(len(predictions)):
-                predictions[i] = self._forward_prop(inp[i])
-                
-        return predictions
+        activations = np.asarray(np.reshape(inputs, (-1, self.num_inputs)), dtype=self.dtype)
+        if out is not None and out.shape != (len(activations), self.num_outputs):
+            raise ValueError("out must have shape {}, not {}".format((len(activations), self.num_outputs), out.shape))
+        
+        last = self.layers.size - 2
+        for i in range(last + 1):
+            # the linear combination of the output layer is computed directly in the output buffer, if given
+            z = np.dot(activations, self.weights[i], out=out if i == last else None)
+            z += self.biases[i]
+            activations = self.activation_funcs[i](z, out=z)
+        
+        return activations
+    
+    
+    
+    def predict_one(self, inputs, out=None):
+        """Predict the output of a single input with the lowest overhead: no reshapes and no copies (if inputs has the
+        dtype of the network), vector operations written in buffers allocated at the first call, and the only array
+        allocated is the result (if out is not given). The buffers are not shared between threads: for concurrent
+        predictions use a predictor for each thread (see compile_inference).
+        
+        Parameters
+        ----------
+        inputs : numpy array
+            Vector (num_inputs,) of input data.
+        out : numpy array, optional
+            Vector (num_outputs,), with the dtype of the network, where the prediction is written. The default is None.
+
+        Returns
+        -------
+        numpy array
+            Vector (num_outputs,) with the output of the network (for any number of outputs, also one).
+
+        Example
+        -------
+        >>> Ann.predict_one(inputs=data[0])
+        
+        """
+        buffers = self._sample_buffers
+        if buffers is None:
+            buffers = self._sample_buffers = [np.empty(int(neurons), dtype=self.dtype) for neurons in self.layers[:-1]]
+        activations = inputs
+        if type(inputs) is not np.ndarray or inputs.dtype != self.dtype:
+            if np.shape(inputs) != (self.num_inputs,):
+                raise ValueError("inputs must have shape ({},), not {}".format(self.num_inputs, np.shape(inputs)))
+            activations = buffers[0]
+            np.copyto(activations, inputs, casting='unsafe')
+        elif inputs.shape != (self.num_inputs,):
+            raise ValueError("inputs must have shape ({},), not {}".format(self.num_inputs, inputs.shape))
+        if out is None:
+            out = np.empty(self.num_outputs, dtype=self.dtype)
+        
+        last = len(self.weights) - 1
+        for i in range(last + 1):
+            z = np.dot(activations, self.weights[i], out=out if i == last else buffers[i + 1])
+            z += self.biases[i]
+            activations = self.activation_funcs[i](z, out=z)
+        return activations
+    
+    
+    def compile_inference(self):
+        """Return an immutable predictor (inference.Predictor) with a copy of the current weights and biases: it has no
+        training state, it applies a fixed list of steps (matrix product, bias addition and activation function of each
+        layer) with buffers reused between calls, and it is cheap to pickle, e.g. to send it to worker processes.
+        Further training of the network does not change the predictor.
+
+        Returns
+        -------
+        inference.Predictor
+            Predictor of the network.
+
+        Example
+        -------
+        >>> predictor = Ann.compile_inference()
+        >>> predictor.predict(inputs=data)
+        
+        """
+        return inference.Predictor(self.weights, self.biases, self.activation_funcs, self.dtype)
+    
+    
+    def freeze(self):
+        """Return an immutable predictor of the network (same as compile_inference)"""
+        return self.compile_inference()
+    
     
+    def _validation_score(self, inputs, targets, monitor, predictions):
+        """Evaluate the network on a validation set, with a batched forward propagation written in the buffer predictions
+        
+
+        Parameters
+        ----------
+        inputs : numpy array
+            Matrix (n, num_inputs) of validation data.
+        targets : numpy array
+            Matrix (n, num_outputs) of labels of the validation data.
+        monitor : string
+            'loss' or 'accuracy'.
+        predictions : numpy array
+            Buffer (n, num_outputs) where the predictions are written.
+
+        Returns
+        -------
+        float
+            Mean error evaluated with the loss function ('loss') or opposite of the fraction of correct classifications
+            ('accuracy'): in both cases, lower values are better.
+
+        """
+        self.predict(inputs, out=predictions)
+        if monitor == 'loss':
+            return float(np.mean(self.loss_func(prediction=predictions, target=targets, axis=-1)))
+        elif monitor == 'accuracy':
+            return - float(np.mean(self._correct_predictions(self._discretize_predictions(predictions), targets)))
+        raise ValueError("monitor must be 'loss' or 'accuracy', not {}".format(monitor))
+    
+    
+    def _correct_predictions(self, predictions_discr, targets):
+        """Return a boolean array that is True for each discretized prediction equal to the target"""
+        targets_reshaped = np.reshape(targets, (-1, self.num_outputs))
+        return np.all(predictions_discr == targets_reshaped, axis=1)
     
     
     def _discretize_predictions(self, predictions):
@@ -327,14 +889,45 @@ class Ann:
         """
         predictions = self.predict(inputs)
         predictions_discr = self._discretize_predictions(predictions)
-        targets_reshaped = np.reshape(targets, (-1, self.num_outputs))
-        correct_predictions = np.all(predictions_discr == targets_reshaped, axis=1)
+        correct_predictions = self._correct_predictions(predictions_discr, targets)
         num_correct_prediction = np.sum(correct_predictions)
         percentage = num_correct_prediction / len(predictions) * 100
         print("Correct classification on the test dataset: {}/{}".format(num_correct_prediction, len(predictions)))
         print ("Percentage of correct classification on the test dataset: {:.2f}%".format(percentage))
         
         return predictions_discr, num_correct_prediction, percentage
+    
+    
+    def evaluate_metrics(self, inputs, targets, chunk_size=10000, workers=None, top_k=(1,)):
+        """Evaluate the classification metrics on a (possibly large) test dataset, in chunks evaluated in parallel by a pool
+        of threads, with memory bounded by the size of the chunks. Nothing is printed.
+        
+
+        Parameters
+        ----------
+        inputs : array_like
+            Test dataset (it can be a np.memmap).
+        targets : array_like
+            True labels of the test dataset (one-hot rows or integer labels for multi-class classification).
+        chunk_size : int, optional
+            Number of inputs evaluated together. The default is 10000.
+        workers : int, optional
+            Number of threads. The default is None (chosen by concurrent.futures.ThreadPoolExecutor).
+        top_k : tuple, optional
+            Values of k for the top-k accuracy. The default is (1,).
+
+        Returns
+        -------
+        metrics.ClassificationMetrics
+            Confusion matrix, accuracy, precision, recall and F1 of each class, mean loss and top-k accuracies.
+
+        Example
+        -------
+        >>> result = Ann.evaluate_metrics(inputs=test_data, targets=test_labels, workers=4, top_k=(1, 3))
+        >>> result.f1
+        
+        """
+        return metrics.evaluate_classification_metrics(self, inputs, targets, chunk_size=chunk_size, workers=workers, top_k=top_k)
         
  
 ###############################################################################################################################    
@@ -352,14 +945,25 @@ class Ann:
     
     
     def get_activation_function(self):
-        """Return the activation function used in the neural network process of training"""
+        """Return the activation function used in the neural network process of training (the one of the output layer,
+        if the layers use different activation functions)"""
         return self.activation_func
     
     
+    def get_activation_functions(self):
+        """Return a list with the activation function of each layer (hidden layers first, then the output layer)"""
+        return list(self.activation_funcs)
+    
+    
     def get_loss_function(self):
         """Return the loss function used in the neural network process of training"""
         return self.loss_func
     
+    
+    def get_optimizer(self):
+        """Return the optimizer used to update weights and biases in the process of training"""
+        return self.optimizer
+    
 #################################################################################################
     
     #Set methods
@@ -370,16 +974,86 @@ class Ann:
         self.biases = saved_biases
      
         
-    def _set_activation_function(self, act_func):
-        """Set the activation function of the network"""    
-        self.activation_func = act_func
+    @staticmethod
+    def _flatten_parameters(weights, biases):
+        """Return a mono-dimensional array with, for each layer, the weights (row by row) followed by the biases"""
+        parameters = []
+        for w, b in zip(weights, biases):
+            parameters.append(np.ravel(w))
+            parameters.append(np.ravel(b))
+        return np.concatenate(parameters)
+    
+    
+    @staticmethod
+    def _parameters_views(parameters, layers):
+        """Split the mono-dimensional array built by _flatten_parameters in the lists of weights and biases,
+        which are views of the array (no copy is done)"""
+        weights = []
+        biases = []
+        start = 0
+        for i in range(len(layers) - 1):
+            rows, columns = int(layers[i]), int(layers[i+1])
+            weights.append(parameters[start : start + rows*columns].reshape((rows, columns)))
+            start += rows*columns
+            biases.append(parameters[start : start + columns])
+            start += columns
+        return weights, biases
+     
+        
+    def _copy_parameters_to(self, parameters):
+        """Copy weights and biases in the mono-dimensional array parameters, with the layout of _flatten_parameters"""
+        weights, biases = self._parameters_views(parameters, self.layers)
+        for i in range(len(weights)):
+            np.copyto(weights[i], self.weights[i])
+            np.copyto(biases[i], self.biases[i])
+    
+    
+    def _copy_parameters_from(self, parameters):
+        """Copy in place in weights and biases the values of the mono-dimensional array parameters, with the layout of _flatten_parameters"""
+        weights, biases = self._parameters_views(parameters, self.layers)
+        for i in range(len(weights)):
+            np.copyto(self.weights[i], weights[i])
+            np.copyto(self.biases[i], biases[i])
+     
         
-        if act_func == act.sigmoid:
-            self.act_func_deriv = act.deriv_sigmoid
-        elif act_func == act.softmax:
-            self.act_func_deriv = act.deriv_softmax
+    def _set_activation_function(self, act_func):
+        """Set the activation function of each layer of the network (the same one for all the layers, if act_func is a function)"""
+        num_layers = len(self.layers) - 1
+        if callable(act_func):
+            act_func = [act_func] * num_layers
+        elif len(act_func) != num_layers:
+            raise ValueError("{} activation functions are needed (one for each layer), not {}".format(num_layers, len(act_func)))
+        for function in act_func:
+            if self.activation_list.get(function.__name__) is not function:
+                raise ValueError("The activation function {} is not registered (see activation_functions.register)".format(function.__name__))
+        
+        self.activation_funcs = list(act_func)
+        # activation function of the output layer
+        self.activation_func = self.activation_funcs[-1]
+        # None if the activation function of the layer has no jacobian (it has an elementwise derivative)
+        self.act_funcs_deriv = [act.jacobians.get(function.__name__) for function in self.activation_funcs]
+        # None if the jacobian of the activation function of the layer is not diagonal
+        self.act_funcs_elementwise_deriv = [act.elementwise_derivatives.get(function.__name__) for function in self.activation_funcs]
         
     
+    def _set_initializers(self, weights_initializer, biases_initializer):
+        """Set the initializers of weights and biases of each layer (the same one for all the layers, if a function is given)"""
+        num_layers = len(self.layers) - 1
+        if weights_initializer is None:
+            weights_initializer = [init.default_weights_initializer(function) for function in self.activation_funcs]
+        initializers = []
+        for initializer in [weights_initializer, biases_initializer]:
+            if callable(initializer):
+                initializer = [initializer] * num_layers
+            elif len(initializer) != num_layers:
+                raise ValueError("{} initializers are needed (one for each layer), not {}".format(num_layers, len(initializer)))
+            for function in initializer:
+                if init.registry.get(function.__name__) is not function:
+                    raise ValueError("The initializer {} is not registered (see initializers.register)".format(function.__name__))
+            initializers.append(list(initializer))
+        self.weights_initializers, self.biases_initializers = initializers
+    
+    
     def _set_loss_function(self, loss_func):
         """"Set the loss function of the network"""
         self.loss_func = loss_func
@@ -388,13 +1062,24 @@ class Ann:
             self.loss_func_deriv = lf.binary_cross_entropy_deriv
         elif loss_func == lf.cross_entropy:
             self.loss_func_deriv = lf.cross_entropy_deriv 
+    
+    
+    def _set_fused_deriv(self):
+        """Set the derivative of the loss function with respect to the output linear combination, if the pair
+        activation function of the output layer - loss function has a closed form for it (None otherwise)"""
+        self.fused_deriv = self.fused_deriv_list.get((self.activation_func.__name__, self.loss_func.__name__))
+    
+    
+    def _set_optimizer(self, optimizer):
+        """Set the optimizer of the network (stochastic gradient descendent if it is None)"""
+        self.optimizer = opt.SGD() if optimizer is None else optimizer
         
 ##########################################################################################
     
     #Saving method      
     
     def _save_building_parameters(self, location):
-        """Save number of inputs, hidden layers(number and content) and outputs in the file "building_parameters.json",
+        """Save number of inputs, hidden layers(number and content), outputs and dtype in the file "building_parameters.json",
         stored in the location given as argument to the function.
         
 
@@ -410,14 +1095,14 @@ class Ann:
         """
         
         total_file_name = location + 'building_parameters.json'
-        data = [self.num_inputs, self.num_hidden.tolist(), self.num_outputs]
+        data = [self.num_inputs, self.num_hidden.tolist(), self.num_outputs, self.dtype.name]
         # save
         with open(total_file_name, 'w') as f:
             json.dump(data, f)
         f.close()
 
     
-    def _save_biases(self, location):
+    def _save_biases(self, location, biases=None):
         """Save biases in the file "biases.json", stored in the location given as argument to the function.
         
 
@@ -425,6 +1110,8 @@ class Ann:
         ----------
         location : string
             Directory where the file "biases.json" is stored.
+        biases : list, optional
+            Biases to save (e.g. a snapshot). The default is None (the biases of the network).
 
         Returns
         -------
@@ -433,20 +1120,15 @@ class Ann:
         """
         
         total_file_name = location + 'biases.json'
-        data = self.biases
-        # transform numpy arrays into lists
-        for i in range(len(data)):
-            data[i] = data[i].tolist()
+        # transform numpy arrays into new lists (the arrays are not modified)
+        data = [b.tolist() for b in (self.biases if biases is None else biases)]
         # save
         with open(total_file_name, 'w') as f:
             json.dump(data, f)
         f.close()
-        # restore biases
-        for i in range(len(self.biases)):
-            self.biases[i] = np.asarray(self.biases[i])
             
     
-    def _save_weights(self, location):
+    def _save_weights(self, location, weights=None):
         """Save weights in the file "weights.json", stored in the location given as argument to the function.
         
 
@@ -454,6 +1136,8 @@ class Ann:
         ----------
         location : string
             Directory where the file "weights.json" is stored.
+        weights : list, optional
+            Weights to save (e.g. a snapshot). The default is None (the weights of the network).
 
         Returns
         -------
@@ -462,22 +1146,18 @@ class Ann:
         """
         
         total_file_name = location + 'weights.json'
-        data = self.weights
-        # transform numpy arrays into lists
-        for i in range(len(data)):
-            data[i] = data[i].tolist()
+        # transform numpy arrays into new lists (the arrays are not modified)
+        data = [w.tolist() for w in (self.weights if weights is None else weights)]
         # save
         with open(total_file_name, 'w') as f:
             json.dump(data, f)
         f.close()
-        # restore weights
-        for i in range(len(self.weights)):
-            self.weights[i] = np.asarray(self.weights[i])
         
     
     def _save_activation_and_loss_functions(self, location):
         """Save the activation and loss functions in the file "activation_loss_functions.json",
-        stored in the location given as argument to the function.
+        stored in the location given as argument to the function. If the layers use different activation functions,
+        the list of their names is saved.
         
 
         Parameters
@@ -492,7 +1172,8 @@ class Ann:
         """
         
         total_file_name = location + 'activation_loss_functions.json'
-        data = {'Activation function' : self.activation_func.__name__,
+        names = [function.__name__ for function in self.activation_funcs]
+        data = {'Activation function' : names[0] if len(set(names)) == 1 else names,
                 'Loss function' : self.loss_func.__name__}
         # save
         with open(total_file_name, 'w') as f:
@@ -500,9 +1181,87 @@ class Ann:
         f.close()
         
         
-    def save(self, directory_name = 'network_parameters/', path = './'):
-        """Save the structure of the network (neurons for each layer), weights and biases, activation function
-        and loss function of the neural network in json format.
+    def _save_initializers(self, location):
+        """Save the names of the initializers of weights and biases in the file "initializers.json",
+        stored in the location given as argument to the function (a list of names if the layers use different initializers).
+        
+
+        Parameters
+        ----------
+        location : string
+            Directory where the file "initializers.json" is stored.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        data = {}
+        for key, initializers in [('Weights initializer', self.weights_initializers), ('Biases initializer', self.biases_initializers)]:
+            names = [function.__name__ for function in initializers]
+            data[key] = names[0] if len(set(names)) == 1 else names
+        with open(location + 'initializers.json', 'w') as f:
+            json.dump(data, f)
+        f.close()
+        
+        
+    def _save_parameters_binary(self, location, parameters=None):
+        """Save weights and biases in the binary file "parameters.npy", stored in the location given as argument to the function.
+        The file contains a single mono-dimensional array: for each layer the weights (row by row) followed by the biases.
+        
+
+        Parameters
+        ----------
+        location : string
+            Directory where the file "parameters.npy" is stored.
+        parameters : numpy array, optional
+            Mono-dimensional array to save, built by _flatten_parameters (e.g. a snapshot). The default is None
+            (weights and biases of the network).
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        total_file_name = location + 'parameters.npy'
+        if parameters is None:
+            parameters = self._flatten_parameters(self.weights, self.biases)
+        np.save(total_file_name, parameters, allow_pickle=False)
+        
+        
+    def _optimizer_snapshot(self):
+        """Return the description of the optimizer (name, hyperparameters and number of updates) and a copy of its state
+        arrays, named "slot_i" (i being the index of the parameter: weights, then biases)"""
+        data = {'Optimizer' : self.optimizer.name,
+                'Hyperparameters' : self.optimizer.get_hyperparameters(),
+                'Steps' : self.optimizer.steps}
+        state = {}
+        for slot, arrays in self.optimizer.state.items():
+            for i in range(len(arrays)):
+                state['{}_{}'.format(slot, i)] = np.copy(arrays[i])
+        return data, state
+    
+    
+    @staticmethod
+    def _write_optimizer(location, data, state):
+        """Write the description of the optimizer in "optimizer.json" and, if it is not empty, its state in "optimizer_state.npz"
+        (see _optimizer_snapshot)"""
+        with open(location + 'optimizer.json', 'w') as f:
+            json.dump(data, f)
+        f.close()
+        if len(state) > 0:
+            np.savez(location + 'optimizer_state.npz', **state)
+        
+        
+    def save(self, directory_name = 'network_parameters/', path = './', binary = False, blocking = True):
+        """Save the structure of the network (neurons for each layer), weights and biases, activation function,
+        loss function and optimizer (with its state) of the neural network in json format.
+        
+        Weights, biases and optimizer state are copied in a snapshot (a single contiguous copy) before writing, and the files
+        are written from the snapshot: the parameters of the network are never modified, so the network can be used (for
+        predictions or training, also by other threads) while it is saved.
         
         Parameters
         ----------
@@ -512,26 +1271,55 @@ class Ann:
             
         path : string, optional
             Location where the directory will be created. The default is './'.
+        
+        binary : bool, optional
+            If it is True, weights and biases are saved in the binary file "parameters.npy" instead of "weights.json" and "biases.json":
+            the values are stored exactly and they are loaded without parsing. The default is False.
+        
+        blocking : bool, optional
+            If it is False, the files are written by a background thread and the method returns as soon as the snapshot is
+            taken. The default is True.
 
         Returns
         -------
-        None.
+        concurrent.futures.Future
+            Only if blocking is False: future of the writing, whose method result() waits for its end (and raises its errors).
 
         """
     
         total_directory_name = path + directory_name
         os.mkdir(total_directory_name)
-        self._save_building_parameters(total_directory_name)
-        self._save_biases(total_directory_name)
-        self._save_weights(total_directory_name)
-        self._save_activation_and_loss_functions(total_directory_name)
+        parameters = self._flatten_parameters(self.weights, self.biases)
+        optimizer_data, optimizer_state = self._optimizer_snapshot()
+        if blocking == True:
+            self._save_snapshot(total_directory_name, parameters, binary, optimizer_data, optimizer_state)
+            return None
+        executor = ThreadPoolExecutor(max_workers=1)
+        future = executor.submit(self._save_snapshot, total_directory_name, parameters, binary, optimizer_data, optimizer_state)
+        executor.shutdown(wait=False)
+        return future
+    
+    
+    def _save_snapshot(self, location, parameters, binary, optimizer_data, optimizer_state):
+        """Write all the files of the network in location, with weights and biases taken from parameters (built by
+        _flatten_parameters) and the optimizer from _optimizer_snapshot"""
+        self._save_building_parameters(location)
+        if binary == True:
+            self._save_parameters_binary(location, parameters)
+        else:
+            weights, biases = self._parameters_views(parameters, self.layers)
+            self._save_biases(location, biases)
+            self._save_weights(location, weights)
+        self._save_activation_and_loss_functions(location)
+        self._save_initializers(location)
+        self._write_optimizer(location, optimizer_data, optimizer_state)
 
 ##########################################################################################################################
     
     #Loading methods
     @classmethod
     def _load_parameters(cls, location):
-        """Load the number of neural network inputs, hidden layers and outputs from the file "building_parameters.json",
+        """Load the number of neural network inputs, hidden layers and outputs, and the dtype, from the file "building_parameters.json",
         placed in the location given as input to the function. 
         
 
@@ -549,6 +1337,8 @@ class Ann:
             by the dimension of the array.
         num_out : int
             Number of outputs of the neural network.
+        dtype : string
+            Name of the floating point type of the network ("float64" for files saved before it was stored).
 
         """
         
@@ -558,7 +1348,8 @@ class Ann:
         num_inp = parameters[0]
         num_hidd = parameters[1]
         num_out = parameters[2]
-        return num_inp, num_hidd, num_out
+        dtype = parameters[3] if len(parameters) > 3 else 'float64'
+        return num_inp, num_hidd, num_out, dtype
     
     
     @classmethod
@@ -575,8 +1366,8 @@ class Ann:
 
         Returns
         -------
-        activation_function : func
-            Activation function of the neural network.
+        activation_function : func or list
+            Activation function of the neural network (list of the activation functions of each layer, if they are different).
         loss_function : func
             Loss function of the neural network.
 
@@ -585,14 +1376,17 @@ class Ann:
         with open(location + 'activation_loss_functions.json', 'r') as f:
             data = json.load(f)
         f.close()
-        activation_function = cls.activation_list[data['Activation function']]
+        if isinstance(data['Activation function'], list):
+            activation_function = [cls.activation_list[name] for name in data['Activation function']]
+        else:
+            activation_function = cls.activation_list[data['Activation function']]
         loss_function = cls.loss_list[data['Loss function']]
         return activation_function, loss_function
     
     
     
     @classmethod
-    def _load_biases(cls, location):
+    def _load_biases(cls, location, dtype='float64'):
         """Load the neural network's biases from the file "biases.json",
         placed in the location given as input to the function. 
         
@@ -602,6 +1396,8 @@ class Ann:
         cls : Ann
         location : string
             Location where "biases.json" is stored.
+        dtype : string, optional
+            Floating point type of the loaded arrays. The default is 'float64'.
 
         Returns
         -------
@@ -615,12 +1411,12 @@ class Ann:
         f.close()
         
         for i in range(len(biases)):
-            biases[i] = np.asarray(biases[i])
+            biases[i] = np.asarray(biases[i], dtype=dtype)
         
         return biases
     
     @classmethod
-    def _load_weights(cls, location):
+    def _load_weights(cls, location, dtype='float64'):
         """Load the neural network's weights from the file "weights.json",
         placed in the location given as input to the function. 
         
@@ -630,6 +1426,8 @@ class Ann:
         cls : Ann
         location : string
             Location where "biases.json" is stored.
+        dtype : string, optional
+            Floating point type of the loaded arrays. The default is 'float64'.
 
         Returns
         -------
@@ -643,14 +1441,119 @@ class Ann:
         f.close()
         
         for i in range(len(weights)):
-            weights[i] = np.asarray(weights[i])
+            weights[i] = np.asarray(weights[i], dtype=dtype)
         
         return weights
 
 
 
     @classmethod
-    def _load_all(cls, directory_name):
+    def _load_parameters_binary(cls, location, layers, mmap=False):
+        """Load the neural network's weights and biases from the binary file "parameters.npy",
+        placed in the location given as input to the function. 
+        
+
+        Parameters
+        ----------
+        cls : Ann
+        location : string
+            Location where "parameters.npy" is stored.
+        layers : array_like
+            Number of neurons of each layer, from the input to the output one.
+        mmap : bool, optional
+            If it is True, the file is memory-mapped read-only instead of read. The default is False.
+
+        Returns
+        -------
+        biases : list
+            Neural network's biases.
+        weights : list
+            Neural network's weights.
+
+        """
+        
+        parameters = np.load(location + 'parameters.npy', mmap_mode='r' if mmap else None, allow_pickle=False)
+        weights, biases = cls._parameters_views(parameters, layers)
+        return biases, weights
+    
+    
+    @classmethod
+    def _load_initializers(cls, location):
+        """Load the initializers of weights and biases from the file "initializers.json",
+        placed in the location given as input to the function. 
+        
+
+        Parameters
+        ----------
+        cls : Ann
+        location : string
+            Location where "initializers.json" is stored.
+
+        Returns
+        -------
+        weights_initializer : func or list
+            Initializer of the weights (list of the initializers of each layer, if they are different).
+        biases_initializer : func or list
+            Initializer of the biases (list of the initializers of each layer, if they are different).
+            Both are initializers.uniform for networks saved before the initializers were stored.
+
+        """
+        
+        if not os.path.exists(location + 'initializers.json'):
+            return init.uniform, init.uniform
+        with open(location + 'initializers.json', 'r') as f:
+            data = json.load(f)
+        f.close()
+        initializers = []
+        for key in ['Weights initializer', 'Biases initializer']:
+            if isinstance(data[key], list):
+                initializers.append([init.registry[name] for name in data[key]])
+            else:
+                initializers.append(init.registry[data[key]])
+        return tuple(initializers)
+    
+    
+    @classmethod
+    def _load_optimizer(cls, location, state=True):
+        """Load the optimizer, with its state, from the files "optimizer.json" and "optimizer_state.npz",
+        placed in the location given as input to the function. 
+        
+
+        Parameters
+        ----------
+        cls : Ann
+        location : string
+            Location where "optimizer.json" is stored.
+        state : bool, optional
+            If it is False, only the hyperparameters and the number of steps are loaded, not the state arrays (which have
+            the size of weights and biases). The default is True.
+
+        Returns
+        -------
+        optimizer : optimizers.Optimizer
+            Optimizer of the neural network, or None if it was not saved (stochastic gradient descendent).
+
+        """
+        
+        if not os.path.exists(location + 'optimizer.json'):
+            return None
+        with open(location + 'optimizer.json', 'r') as f:
+            data = json.load(f)
+        f.close()
+        optimizer = cls.optimizer_list[data['Optimizer']](**data['Hyperparameters'])
+        optimizer.steps = data['Steps']
+        
+        if state == True and os.path.exists(location + 'optimizer_state.npz'):
+            with np.load(location + 'optimizer_state.npz', allow_pickle=False) as arrays:
+                for slot in optimizer.slots:
+                    num_arrays = len([name for name in arrays.files if name.rsplit('_', 1)[0] == slot])
+                    optimizer.state[slot] = [arrays['{}_{}'.format(slot, i)] for i in range(num_arrays)]
+        
+        return optimizer
+    
+    
+    @classmethod
+    def _load_all(cls, directory_name, mmap=False):
         """Clip all the load function together.
         
 
@@ -658,7 +1561,9 @@ class Ann:
         ----------
         cls : Ann
         directory_name : string
-            Directory where the json files needed to setup the neural network are stored.
+            Directory where the files (json and, for the binary format, "parameters.npy") needed to setup the neural network are stored.
+        mmap : bool, optional
+            If it is True, the binary file of weights and biases is memory-mapped read-only. The default is False.
 
         Returns
         -------
@@ -669,27 +1574,44 @@ class Ann:
             by the dimension of the array.
         num_out : int
             Number of outputs of the neural network.
-        activation_function : func
-            Activation function of the neural network.
+        activation_function : func or list
+            Activation function of the neural network (list of the activation functions of each layer, if they are different).
         loss_function : func
             Loss function of the neural network.
         biases : list
             Neural network's biases.
         weights : list
             Neural network's weights.
+        dtype : string
+            Name of the floating point type of the network.
+        optimizer : optimizers.Optimizer
+            Optimizer of the neural network, or None if it was not saved.
+        initializers : tuple
+            Initializers of weights and biases of the neural network.
 
         """
         
-        num_inp, num_hidd, num_out = cls._load_parameters(directory_name)
+        num_inp, num_hidd, num_out, dtype = cls._load_parameters(directory_name)
         activation_function, loss_function = cls._load_activation_and_loss(directory_name)
-        biases = cls._load_biases(directory_name)
-        weights = cls._load_weights(directory_name)
+        # the binary format is used if the file is present, otherwise the json one
+        if os.path.exists(directory_name + 'parameters.npy'):
+            layers = [num_inp] + list(num_hidd) + [num_out]
+            biases, weights = cls._load_parameters_binary(directory_name, layers, mmap)
+        elif mmap == True:
+            raise ValueError("Memory-mapping requires the binary format: save the network with binary=True")
+        else:
+            biases = cls._load_biases(directory_name, dtype)
+            weights = cls._load_weights(directory_name, dtype)
+        
+        # a memory-mapped network is read-only (it cannot be trained), so the state of the optimizer is not loaded in memory
+        optimizer = cls._load_optimizer(directory_name, state=not mmap)
+        initializers = cls._load_initializers(directory_name)
         
-        return num_inp, num_hidd, num_out, activation_function, loss_function, biases, weights
+        return num_inp, num_hidd, num_out, activation_function, loss_function, biases, weights, dtype, optimizer, initializers
     
 
     @classmethod
-    def load_neural_network(cls, directory_name):
+    def load_neural_network(cls, directory_name, mmap=False):
         """Return an Ann object created with the parameters stored in the directory given as argument to the function.
         
 
@@ -697,7 +1619,12 @@ class Ann:
         ----------
         cls : Ann
         directory_name : string
-            Directory where the json files needed to setup the neural network are stored.
+            Directory where the files (json and, for the binary format, "parameters.npy") needed to setup the neural network are stored.
+        mmap : bool, optional
+            Only for the binary format. If it is True, weights and biases are read-only views of "parameters.npy" mapped in memory:
+            the values are read from disk only when they are used, and all the processes that map the same file share the same
+            physical memory (page cache). The network can be used for predictions, but not trained, so the state of the
+            optimizer is not loaded (only its hyperparameters). The default is False.
 
         Returns
         -------
@@ -707,15 +1634,18 @@ class Ann:
         """
         
         
-        num_inp, num_hidd, num_out, activation_function, loss_function, biases, weights = cls._load_all(directory_name)
+        num_inp, num_hidd, num_out, activation_function, loss_function, biases, weights, dtype, optimizer, initializers = cls._load_all(directory_name, mmap)
         
-        neural_network = cls(num_inputs = num_inp,
+        neural_network = cls._from_parameters(weights, biases,
+                             num_inputs = num_inp,
                              num_hidden = num_hidd, 
                              num_outputs = num_out,
                              activation_function = activation_function,
-                             loss_function = loss_function)
-        
-        neural_network._set_parameters(weights, biases)
+                             loss_function = loss_function,
+                             dtype = dtype,
+                             optimizer = optimizer,
+                             weights_initializer = initializers[0],
+                             biases_initializer = initializers[1])
         
         return neural_network 
 
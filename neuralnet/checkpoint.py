@@ -0,0 +1,182 @@
+#Periodic checkpoints of the training of the Artificial Neural Network, written in background, and their restoring
+
+import os
+import json
+import shutil
+import threading
+import numpy as np
+
+###############################################################################
+
+# File, in the checkpoint directory, with the name of the last complete checkpoint
+latest_file_name = 'latest'
+
+
+def _write_json(file_name, data):
+    """Write data in the json file file_name"""
+    with open(file_name, 'w') as f:
+        json.dump(data, f)
+    f.close()
+
+
+def latest_checkpoint(directory):
+    """Return the location of the last complete checkpoint in directory, or None if there is no checkpoint
+
+    Parameters
+    ----------
+    directory : string
+        Checkpoint directory given to the train method of Ann, or directory of a single checkpoint.
+
+    Returns
+    -------
+    string
+        Location of the checkpoint (ending with '/'), or None.
+
+    """
+    if os.path.exists(directory + 'training.json'):
+        return directory
+    if not os.path.exists(directory + latest_file_name):
+        return None
+    with open(directory + latest_file_name, 'r') as f:
+        name = f.read().strip()
+    f.close()
+    return directory + name + '/'
+
+###############################################################################
+
+class Checkpointer:
+    """Periodic checkpoints of a training: the state of the training (weights, biases, optimizer, counters and random
+    generator) is copied in memory when save is called, and written on disk by a background thread while the training goes on.
+
+    Each checkpoint is a directory "epoch_N/" inside the checkpoint directory, written with a temporary name and renamed when
+    it is complete; then the file "latest" is replaced (atomically) with its name, so an interrupted write never corrupts the
+    last checkpoint. A checkpoint can also be loaded with Ann.load_neural_network (binary format).
+    """
+
+    def __init__(self, network, directory, keep=2):
+        """
+        Parameters
+        ----------
+        network : Ann
+            Neural network being trained.
+        directory : string
+            Directory of the checkpoints (created if it does not exist).
+        keep : int, optional
+            Number of checkpoints kept on disk; the older ones are removed. The default is 2.
+        """
+        self.network = network
+        self.directory = directory
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+        # weights and biases are copied in a buffer allocated once (the previous write is finished before it is reused)
+        self._parameters = np.empty(sum(w.size + b.size for w, b in zip(network.weights, network.biases)), dtype=network.dtype)
+        self._writer = None
+        self._error = None
+
+
+    def save(self, training_state, arrays=None):
+        """Copy the state of the training and start writing it in a new checkpoint in background
+
+        Parameters
+        ----------
+        training_state : dict
+            State of the training loop (json-serializable), with at least the key 'Epoch' (number of completed epochs).
+        arrays : dict, optional
+            Further arrays of the training loop, saved in "name.npy" files. The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.wait()
+        network = self.network
+        network._copy_parameters_to(self._parameters)
+        optimizer_data, optimizer_state = network._optimizer_snapshot()
+        training_state = dict(training_state, **{'Random generator' : network._rng.bit_generator.state})
+        arrays = {name : np.copy(a) for name, a in (arrays or {}).items()}
+        self._writer = threading.Thread(target=self._write, args=(training_state, optimizer_data, optimizer_state, arrays))
+        self._writer.start()
+
+
+    def wait(self):
+        """Wait the end of the last write, raising its error if it failed"""
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+
+    def _write(self, training_state, optimizer_data, optimizer_state, arrays):
+        """Write a checkpoint (executed by the background thread)"""
+        try:
+            network = self.network
+            name = 'epoch_{}'.format(training_state['Epoch'])
+            location = self.directory + name + '.tmp/'
+            shutil.rmtree(location, ignore_errors=True)
+            os.mkdir(location)
+            network._save_snapshot(location, self._parameters, True, optimizer_data, optimizer_state)
+            for array_name, array in arrays.items():
+                np.save(location + array_name + '.npy', array, allow_pickle=False)
+            _write_json(location + 'training.json', training_state)
+
+            shutil.rmtree(self.directory + name, ignore_errors=True)
+            os.replace(location, self.directory + name)
+            with open(self.directory + latest_file_name + '.tmp', 'w') as f:
+                f.write(name)
+            f.close()
+            os.replace(self.directory + latest_file_name + '.tmp', self.directory + latest_file_name)
+            self._remove_old_checkpoints()
+        except BaseException as error:
+            self._error = error
+
+
+    def _remove_old_checkpoints(self):
+        """Remove the checkpoints older than the last keep ones"""
+        names = [name for name in os.listdir(self.directory) if name.startswith('epoch_') and not name.endswith('.tmp')]
+        names.sort(key=lambda name: int(name[len('epoch_'):]))
+        for name in names[:-self.keep]:
+            shutil.rmtree(self.directory + name, ignore_errors=True)
+
+###############################################################################
+
+def restore(network, location):
+    """Restore in place in the network the state saved in a checkpoint: weights, biases, optimizer state and random generator
+
+    Parameters
+    ----------
+    network : Ann
+        Neural network with the same structure of the saved one.
+    location : string
+        Location of the checkpoint (see latest_checkpoint).
+
+    Returns
+    -------
+    training_state : dict
+        State of the training loop saved in the checkpoint.
+    arrays : dict
+        Further arrays of the training loop saved in the checkpoint.
+
+    """
+    with open(location + 'training.json', 'r') as f:
+        training_state = json.load(f)
+    f.close()
+
+    network._copy_parameters_from(np.load(location + 'parameters.npy', allow_pickle=False))
+    optimizer = network._load_optimizer(location)
+    if optimizer is not None:
+        if optimizer.name != network.optimizer.name:
+            raise ValueError("The checkpoint was saved with the optimizer {}, not {}".format(optimizer.name, network.optimizer.name))
+        network.optimizer.steps = optimizer.steps
+        network.optimizer.state = optimizer.state
+    network._rng.bit_generator.state = training_state['Random generator']
+
+    arrays = {}
+    for file_name in os.listdir(location):
+        if file_name.endswith('.npy') and file_name != 'parameters.npy':
+            arrays[file_name[:-len('.npy')]] = np.load(location + file_name, allow_pickle=False)
+    return training_state, arrays
+
+###############################################################################
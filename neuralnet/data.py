@@ -0,0 +1,356 @@
+#Sources of batches of data for the training of the Artificial Neural Network
+
+import queue
+import threading
+import numpy as np
+
+###############################################################################
+
+def array_chunks(inputs, targets, chunk_size):
+    """Iterate over consecutive chunks of two arrays (also memory-mapped ones), without copying them
+
+    Parameters
+    ----------
+    inputs : numpy array
+        Matrix (n, num_inputs) of input data.
+    targets : numpy array
+        Matrix (n, num_outputs) of labels linked with the input data.
+    chunk_size : int
+        Number of rows of each chunk (the last one can be shorter).
+
+    Yields
+    ------
+    tuple
+        (inputs, targets) chunk, as views of the arrays.
+
+    """
+    for start in range(0, len(inputs), chunk_size):
+        stop = start + chunk_size
+        yield inputs[start:stop], targets[start:stop]
+
+
+def one_hot(labels, num_classes, out=None, dtype=np.float64):
+    """One-hot encoding of integer labels
+
+    Parameters
+    ----------
+    labels : array_like
+        Vector of integer labels, between 0 and num_classes - 1.
+    num_classes : int
+        Number of classes.
+    out : numpy array, optional
+        Matrix (len(labels), num_classes) where the result is stored. The default is None.
+    dtype : data-type, optional
+        Type of the result, when out is None. The default is np.float64.
+
+    Returns
+    -------
+    numpy array
+        Matrix (len(labels), num_classes) whose row i has a one in the column labels[i] and zeros elsewhere.
+
+    """
+    labels = np.asarray(labels, dtype=np.intp).reshape(-1)
+    if out is None:
+        out = np.empty((len(labels), num_classes), dtype=dtype)
+    out[...] = 0
+    out[np.arange(len(labels)), labels] = 1
+    return out
+
+
+def _gather(source, rows, out):
+    """Copy in out the rows of source given by rows (a slice or an array of indices), casting them to the type of out"""
+    if isinstance(rows, slice) or source.dtype != out.dtype:
+        # np.take does not cast into out
+        np.copyto(out, source[rows], casting='unsafe')
+    else:
+        # Gather the rows directly in out (with mode='raise' np.take would use a temporary buffer)
+        np.take(source, rows, axis=0, out=out, mode='clip')
+    return out
+
+
+def _is_iterator(source):
+    """Return True if source can be iterated only once (e.g. a generator)"""
+    return not callable(source) and iter(source) is source
+
+###############################################################################
+
+class BatchStream:
+    """Stream of batches with a fixed size built from chunks of data of any size, with bounded memory: the chunks are
+    copied in a buffer of (about) shuffle_buffer rows, shuffled inside the buffer and split in batches.
+
+    Each epoch is a new iteration over the stream. The batches are views of buffers that are overwritten by the next
+    batches, so they must be used before asking for the next one.
+    """
+
+    def __init__(self, source, batch_size, num_inputs, num_outputs, dtype=np.float64, shuffle_buffer=0, rng=None):
+        """Create the stream and allocate its buffers
+
+        Parameters
+        ----------
+        source : iterable or function
+            Source of (inputs, targets) chunks: an iterable (a list, a generator...), or a function without arguments that
+            returns a new iterable for each epoch. An iterator (as a generator) can be used for a single epoch only.
+        batch_size : int
+            Number of rows of each batch (the last one of an epoch can be shorter).
+        num_inputs : int
+            Number of inputs of each row.
+        num_outputs : int
+            Number of targets of each row.
+        dtype : data-type, optional
+            Type of the batches. The default is np.float64.
+        shuffle_buffer : int, optional
+            Number of rows shuffled together (rounded up to a multiple of batch_size). The default is 0 (no shuffling).
+        rng : numpy Generator, optional
+            Random generator used for the shuffling. The default is None (a new generator without seed).
+
+        Returns
+        -------
+        None.
+
+        """
+        self.source = source
+        self.batch_size = batch_size
+        self.num_inputs = num_inputs
+        self.num_outputs = num_outputs
+        self.shuffle = shuffle_buffer > 0
+        self.rng = np.random.default_rng() if rng is None else rng
+        self._used = False
+
+        capacity = -(-max(shuffle_buffer, batch_size) // batch_size) * batch_size
+        self._inputs = np.empty((capacity, num_inputs), dtype=dtype)
+        self._targets = np.empty((capacity, num_outputs), dtype=dtype)
+        if self.shuffle:
+            self._batch_inputs = np.empty((batch_size, num_inputs), dtype=dtype)
+            self._batch_targets = np.empty((batch_size, num_outputs), dtype=dtype)
+
+
+    def __iter__(self):
+        """Iterate over the batches of an epoch
+
+        Yields
+        ------
+        tuple
+            (inputs, targets) batch, matrices (batch, num_inputs) and (batch, num_outputs).
+
+        """
+        if _is_iterator(self.source) and self._used:
+            raise ValueError("The source of data can be iterated only once: use a function that returns a new iterable for each epoch")
+        self._used = True
+        chunks = self.source() if callable(self.source) else self.source
+
+        capacity = len(self._inputs)
+        filled = 0
+        for inputs, targets in chunks:
+            inputs = np.reshape(inputs, (-1, self.num_inputs))
+            targets = np.reshape(targets, (-1, self.num_outputs))
+            start = 0
+            while start < len(inputs):
+                rows = min(capacity - filled, len(inputs) - start)
+                np.copyto(self._inputs[filled:filled+rows], inputs[start:start+rows], casting='unsafe')
+                np.copyto(self._targets[filled:filled+rows], targets[start:start+rows], casting='unsafe')
+                filled += rows
+                start += rows
+                if filled == capacity:
+                    yield from self._batches(filled)
+                    filled = 0
+        if filled > 0:
+            yield from self._batches(filled)
+
+
+    def _batches(self, rows):
+        """Split the first rows of the buffer in batches, in random order if the stream is shuffled"""
+        if not self.shuffle:
+            yield from array_chunks(self._inputs[:rows], self._targets[:rows], self.batch_size)
+            return
+        order = self.rng.permutation(rows)
+        for start in range(0, rows, self.batch_size):
+            indices = order[start:start+self.batch_size]
+            inputs = np.take(self._inputs, indices, axis=0, out=self._batch_inputs[:len(indices)])
+            targets = np.take(self._targets, indices, axis=0, out=self._batch_targets[:len(indices)])
+            yield inputs, targets
+
+###############################################################################
+
+class ShuffledArrays:
+    """Batches of two arrays in a new random order at each epoch: an array of indices is permuted in place and the rows of
+    each batch are gathered in reusable buffers, so the arrays are never copied or modified.
+
+    The batches are views of buffers that are overwritten by the next batches, so they must be used before asking for
+    the next one.
+    """
+
+    def __init__(self, inputs, targets, batch_size, dtype=np.float64, rng=None):
+        """Create the iterable and allocate its buffers
+
+        Parameters
+        ----------
+        inputs : numpy array
+            Matrix (n, num_inputs) of input data.
+        targets : numpy array
+            Matrix (n, num_outputs) of labels linked with the input data.
+        batch_size : int
+            Number of rows of each batch (the last one of an epoch can be shorter).
+        dtype : data-type, optional
+            Type of the batches. The default is np.float64.
+        rng : numpy Generator, optional
+            Random generator used for the permutations. The default is None (a new generator without seed).
+
+        Returns
+        -------
+        None.
+
+        """
+        self.inputs = inputs
+        self.targets = targets
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng() if rng is None else rng
+        self._indices = np.arange(len(inputs))
+        self._order = np.empty_like(self._indices)
+        self._inputs = np.empty((batch_size, inputs.shape[1]), dtype=dtype)
+        self._targets = np.empty((batch_size, targets.shape[1]), dtype=dtype)
+
+
+    def __iter__(self):
+        """Iterate over the batches of an epoch, in a new random order
+
+        Yields
+        ------
+        tuple
+            (inputs, targets) batch, matrices (batch, num_inputs) and (batch, num_outputs).
+
+        """
+        # the order depends only on the state of the generator, not on the previous epochs
+        np.copyto(self._order, self._indices)
+        self.rng.shuffle(self._order)
+        for start in range(0, len(self._order), self.batch_size):
+            rows = self._order[start:start+self.batch_size]
+            yield _gather(self.inputs, rows, self._inputs[:len(rows)]), _gather(self.targets, rows, self._targets[:len(rows)])
+
+###############################################################################
+
+class DataLoader:
+    """Iterable over the batches of a dataset, prepared in a background thread while the network trains on the previous ones.
+
+    At most prefetch batches are prepared in advance, each one in its own preallocated buffer: the buffers are reused for
+    the whole training, so the batches are not allocated at each step (rows of another type than the batches, and integer
+    labels, still go through a temporary array before being cast or one-hot encoded in the buffer).
+    Each epoch (each iteration over the loader) has a new random order of the data. A batch is a view of a buffer that is
+    reused after the next batch is requested, so it must be used before.
+    """
+
+    def __init__(self, inputs, targets, batch_size, shuffle=True, num_classes=None, prefetch=2, dtype=np.float64, seed=None):
+        """Create the loader and allocate its buffers
+
+        Parameters
+        ----------
+        inputs : array_like
+            Matrix (n, num_inputs) of input data (it can be a np.memmap).
+        targets : array_like
+            Matrix (n, num_outputs) of labels linked with the input data, or vector of n integer labels if num_classes is given.
+        batch_size : int
+            Number of rows of each batch (the last one of an epoch can be shorter).
+        shuffle : bool, optional
+            If True, the order of the data changes at each epoch. The default is True.
+        num_classes : int, optional
+            If it is given, the targets are integer labels, one-hot encoded in the batches. The default is None.
+        prefetch : int, optional
+            Maximum number of batches prepared in advance. The default is 2.
+        dtype : data-type, optional
+            Type of the batches. The default is np.float64.
+        seed : int, optional
+            Seed of the random generator used for the shuffling. The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.inputs = inputs if isinstance(inputs, np.ndarray) else np.asarray(inputs)
+        self.targets = targets if isinstance(targets, np.ndarray) else np.asarray(targets)
+        if self.inputs.ndim == 1:
+            self.inputs = self.inputs.reshape(-1, 1)
+        if num_classes is None and self.targets.ndim == 1:
+            self.targets = self.targets.reshape(-1, 1)
+        if len(self.inputs) != len(self.targets):
+            raise ValueError("Inputs and targets must have the same number of rows")
+        self.batch_size = min(batch_size, len(self.inputs))
+        self.shuffle = shuffle
+        self.num_classes = num_classes
+        self.rng = np.random.default_rng(seed)
+
+        num_outputs = self.targets.shape[1] if num_classes is None else num_classes
+        # One buffer for each prefetched batch, plus the one used by the training
+        self._buffers = [(np.empty((self.batch_size, self.inputs.shape[1]), dtype=dtype),
+                          np.empty((self.batch_size, num_outputs), dtype=dtype)) for i in range(prefetch + 1)]
+
+
+    def __len__(self):
+        """Number of batches of an epoch"""
+        return -(-len(self.inputs) // self.batch_size)
+
+
+    def _fill(self, buffer, rows):
+        """Write in buffer the rows of the dataset given by rows (a slice or an array of indices) and return the batch"""
+        inputs, targets = buffer
+        size = len(range(len(self.inputs))[rows]) if isinstance(rows, slice) else len(rows)
+        inputs, targets = inputs[:size], targets[:size]
+        _gather(self.inputs, rows, inputs)
+        if self.num_classes is None:
+            _gather(self.targets, rows, targets)
+        else:
+            one_hot(self.targets[rows], self.num_classes, out=targets)
+        return inputs, targets
+
+
+    def _produce(self, order, free, ready, stop):
+        """Prepare the batches of an epoch in the free buffers and put them, with the index of their buffer, in the ready queue
+        (executed by the background thread)"""
+        try:
+            for start in range(0, len(self.inputs), self.batch_size):
+                rows = slice(start, start + self.batch_size) if order is None else order[start:start+self.batch_size]
+                k = free.get()
+                if stop.is_set():
+                    return
+                ready.put((k, self._fill(self._buffers[k], rows)))
+            ready.put(None)
+        except BaseException as error:
+            ready.put(error)
+
+
+    def __iter__(self):
+        """Iterate over the batches of an epoch, while the next ones are prepared in a background thread
+
+        Yields
+        ------
+        tuple
+            (inputs, targets) batch, matrices (batch, num_inputs) and (batch, num_outputs).
+
+        """
+        order = self.rng.permutation(len(self.inputs)) if self.shuffle else None
+        # Indices of the buffers that can be filled: the batches prepared in advance are bounded by the number of buffers
+        free = queue.Queue()
+        for k in range(len(self._buffers)):
+            free.put(k)
+        ready = queue.Queue()
+        stop = threading.Event()
+        producer = threading.Thread(target=self._produce, args=(order, free, ready, stop), daemon=True)
+        producer.start()
+        
+        try:
+            while True:
+                item = ready.get()
+                if item is None:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                k, batch = item
+                yield batch
+                # The next batch is requested, so the buffer of this one can be filled again
+                free.put(k)
+        finally:
+            # Stop the background thread also when the iteration is interrupted
+            stop.set()
+            free.put(None)
+            producer.join()
+
+###############################################################################
@@ -0,0 +1,158 @@
+#Compiled inference of a trained Artificial Neural Network: a lightweight predictor without training state
+
+import numpy as np
+
+###############################################################################
+
+class Predictor:
+    """Immutable predictor built by Ann.compile_inference (or Ann.freeze): it keeps only read-only, C-contiguous copies of
+    weights and biases and the activation function of each layer, as a fixed list of steps (matrix product, bias addition
+    and activation function in place), and writes the hidden layers in buffers allocated once for the largest batch seen.
+
+    It is pickled with weights, biases and activation functions only (not the buffers), so it can be cheaply sent to
+    worker processes. The buffers are not shared between threads: each thread should use its own copy (see copy).
+    """
+
+    __slots__ = ('num_inputs', 'num_outputs', 'dtype', '_steps', '_buffers', '_capacity', '_vectors')
+
+    def __init__(self, weights, biases, activation_functions, dtype=np.float64):
+        """
+        Parameters
+        ----------
+        weights : list
+            Weight matrices (inputs, outputs) of each layer.
+        biases : list
+            Bias vectors of each layer.
+        activation_functions : list
+            Activation function of each layer, with signature function(x, out=None).
+        dtype : data-type, optional
+            Floating point type of the predictions. The default is np.float64.
+        """
+        dtype = np.dtype(dtype)
+        steps = []
+        for w, b, function in zip(weights, biases, activation_functions):
+            w = np.array(w, dtype=dtype, order='C', copy=True)
+            b = np.array(b, dtype=dtype, copy=True)
+            w.flags.writeable = False
+            b.flags.writeable = False
+            steps.append((w, b, function))
+        if not steps:
+            raise ValueError("The predictor needs at least one layer")
+        object.__setattr__(self, 'num_inputs', steps[0][0].shape[0])
+        object.__setattr__(self, 'num_outputs', steps[-1][0].shape[1])
+        object.__setattr__(self, 'dtype', dtype)
+        object.__setattr__(self, '_steps', tuple(steps))
+        self._allocate(0)
+
+
+    def __setattr__(self, name, value):
+        raise AttributeError("The predictor is immutable: compile a new one from the network")
+
+
+    def __reduce__(self):
+        weights = [w for w, _, _ in self._steps]
+        biases = [b for _, b, _ in self._steps]
+        functions = [function for _, _, function in self._steps]
+        return (Predictor, (weights, biases, functions, self.dtype.name))
+
+
+    def _allocate(self, rows):
+        """Allocate the buffers of the hidden layers (and of the inputs, used when they must be converted) for batches of up to rows inputs,
+        and the vectors used by predict_one (once)"""
+        buffers = [np.empty((rows, self.num_inputs), dtype=self.dtype)]
+        buffers += [np.empty((rows, w.shape[1]), dtype=self.dtype) for w, _, _ in self._steps[:-1]]
+        object.__setattr__(self, '_buffers', tuple(buffers))
+        object.__setattr__(self, '_capacity', rows)
+        if rows == 0:
+            vectors = [np.empty(self.num_inputs, dtype=self.dtype)]
+            vectors += [np.empty(w.shape[1], dtype=self.dtype) for w, _, _ in self._steps[:-1]]
+            object.__setattr__(self, '_vectors', tuple(vectors))
+
+
+    def copy(self):
+        """Return a predictor that shares the (read-only) weights and biases, with its own buffers"""
+        new = object.__new__(Predictor)
+        for name in ('num_inputs', 'num_outputs', 'dtype', '_steps'):
+            object.__setattr__(new, name, getattr(self, name))
+        new._allocate(0)
+        return new
+
+
+    def predict(self, inputs, out=None):
+        """Predict the outputs of a batch of inputs
+
+        Parameters
+        ----------
+        inputs : numpy array
+            Matrix (batch, num_inputs) of input data.
+        out : numpy array, optional
+            C-contiguous array (batch, num_outputs), with the type of the predictor, where the predictions are written.
+            The default is None (a new array is allocated).
+
+        Returns
+        -------
+        numpy array
+            Matrix (batch, num_outputs) of predictions.
+
+        """
+        if np.ndim(inputs) != 2 or np.shape(inputs)[1] != self.num_inputs:
+            raise ValueError("inputs must have shape (batch, {}), not {}".format(self.num_inputs, np.shape(inputs)))
+        rows = len(inputs)
+        if out is None:
+            out = np.empty((rows, self.num_outputs), dtype=self.dtype)
+        elif out.shape != (rows, self.num_outputs):
+            raise ValueError("out must have shape {}, not {}".format((rows, self.num_outputs), out.shape))
+        if rows > self._capacity:
+            self._allocate(rows)
+
+        buffers = self._buffers
+        activations = inputs
+        if not isinstance(inputs, np.ndarray) or inputs.dtype != self.dtype:
+            activations = buffers[0][:rows]
+            np.copyto(activations, inputs, casting='unsafe')
+        last = len(self._steps) - 1
+        for i, (w, b, function) in enumerate(self._steps):
+            z = np.dot(activations, w, out=out if i == last else buffers[i + 1][:rows])
+            z += b
+            activations = function(z, out=z)
+        return activations
+
+    __call__ = predict
+
+
+    def predict_one(self, inputs, out=None):
+        """Predict the outputs of a single input, with vector operations in preallocated buffers (the only array allocated
+        is the result, if out is not given)
+
+        Parameters
+        ----------
+        inputs : numpy array
+            Vector (num_inputs,) of input data.
+        out : numpy array, optional
+            Vector (num_outputs,), with the type of the predictor, where the prediction is written. The default is None.
+
+        Returns
+        -------
+        numpy array
+            Vector (num_outputs,) of predictions.
+
+        """
+        vectors = self._vectors
+        activations = inputs
+        if type(inputs) is not np.ndarray or inputs.dtype != self.dtype:
+            if np.shape(inputs) != (self.num_inputs,):
+                raise ValueError("inputs must have shape ({},), not {}".format(self.num_inputs, np.shape(inputs)))
+            activations = vectors[0]
+            np.copyto(activations, inputs, casting='unsafe')
+        elif inputs.shape != (self.num_inputs,):
+            raise ValueError("inputs must have shape ({},), not {}".format(self.num_inputs, inputs.shape))
+        if out is None:
+            out = np.empty(self.num_outputs, dtype=self.dtype)
+        last = len(self._steps) - 1
+        for i, (w, b, function) in enumerate(self._steps):
+            z = np.dot(activations, w, out=out if i == last else vectors[i + 1])
+            z += b
+            activations = function(z, out=z)
+        return activations
+
+###############################################################################
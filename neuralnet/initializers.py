@@ -0,0 +1,124 @@
+#Initializers of weights and biases of the Artificial Neural Network
+
+import numpy as np
+
+###############################################################################
+
+def _fans(shape):
+    """Return the number of inputs (fan-in) and outputs (fan-out) of a layer with weights of the given shape
+    (for a vector of biases both are its length)"""
+    if len(shape) == 1:
+        return shape[0], shape[0]
+    return shape[0], shape[1]
+
+
+def uniform(shape, rng, dtype=np.float64):
+    """Values drawn uniformly in [0, 1) (the original initialization of the network: all the values are positive, so
+    sigmoid and softmax layers start close to saturation)
+
+    Parameters
+    ----------
+    shape : tuple
+        Shape of the array: (inputs, outputs) of a layer for the weights, (outputs,) for the biases.
+    rng : numpy.random.Generator
+        Random generator used to draw the values.
+    dtype : data-type, optional
+        Type of the array. The default is np.float64.
+
+    Returns
+    -------
+    numpy array
+        Initialized array.
+
+    """
+    return rng.random(shape).astype(dtype, copy=False)
+
+
+def zeros(shape, rng, dtype=np.float64):
+    """All values equal to zero (usually for the biases; the weights need random values to break the symmetry)"""
+    return np.zeros(shape, dtype=dtype)
+
+##############################################################################
+
+def xavier_uniform(shape, rng, dtype=np.float64):
+    """Xavier/Glorot initialization: values drawn uniformly in [-limit, limit], limit = sqrt(6 / (fan_in + fan_out)),
+    which keeps the variance of activations and derivatives through the layers (for sigmoid, tanh, softmax)"""
+    fan_in, fan_out = _fans(shape)
+    limit = np.sqrt(6 / (fan_in + fan_out))
+    return rng.uniform(-limit, limit, size=shape).astype(dtype, copy=False)
+
+
+def xavier_normal(shape, rng, dtype=np.float64):
+    """Xavier/Glorot initialization: values drawn from a normal distribution with standard deviation sqrt(2 / (fan_in + fan_out))"""
+    fan_in, fan_out = _fans(shape)
+    return rng.normal(0., np.sqrt(2 / (fan_in + fan_out)), size=shape).astype(dtype, copy=False)
+
+
+def he_uniform(shape, rng, dtype=np.float64):
+    """He initialization: values drawn uniformly in [-limit, limit], limit = sqrt(6 / fan_in), for relu layers
+    (which set half of their inputs to zero)"""
+    fan_in, _ = _fans(shape)
+    limit = np.sqrt(6 / fan_in)
+    return rng.uniform(-limit, limit, size=shape).astype(dtype, copy=False)
+
+
+def he_normal(shape, rng, dtype=np.float64):
+    """He initialization: values drawn from a normal distribution with standard deviation sqrt(2 / fan_in)"""
+    fan_in, _ = _fans(shape)
+    return rng.normal(0., np.sqrt(2 / fan_in), size=shape).astype(dtype, copy=False)
+
+
+def lecun_uniform(shape, rng, dtype=np.float64):
+    """LeCun initialization: values drawn uniformly in [-limit, limit], limit = sqrt(3 / fan_in)"""
+    fan_in, _ = _fans(shape)
+    limit = np.sqrt(3 / fan_in)
+    return rng.uniform(-limit, limit, size=shape).astype(dtype, copy=False)
+
+
+def lecun_normal(shape, rng, dtype=np.float64):
+    """LeCun initialization: values drawn from a normal distribution with standard deviation sqrt(1 / fan_in)"""
+    fan_in, _ = _fans(shape)
+    return rng.normal(0., np.sqrt(1 / fan_in), size=shape).astype(dtype, copy=False)
+
+
+def orthogonal(shape, rng, dtype=np.float64):
+    """Orthogonal initialization: the rows (or the columns, whichever are fewer) of the weight matrix are orthonormal,
+    obtained from the QR decomposition of a matrix of normally distributed values"""
+    if len(shape) != 2:
+        raise ValueError("The orthogonal initialization needs a matrix, not an array with shape {}".format(shape))
+    rows, columns = shape
+    q, r = np.linalg.qr(rng.standard_normal((max(rows, columns), min(rows, columns))))
+    # the signs of the diagonal of r make the decomposition unique, so q is uniformly distributed
+    q *= np.sign(np.diag(r))
+    if rows < columns:
+        q = q.T
+    return q.astype(dtype, copy=False)
+
+# Alternative names of the Xavier initializers
+glorot_uniform = xavier_uniform
+glorot_normal = xavier_normal
+
+###############################################################################
+
+# Registry of the initializers, by name: the network can use (and save) the registered ones
+registry = {}
+
+
+def register(function):
+    """Register an initializer, with signature function(shape, rng, dtype), so that it can be saved and loaded by its name"""
+    registry[function.__name__] = function
+    return function
+
+
+for _function in [uniform, zeros, xavier_uniform, xavier_normal, he_uniform, he_normal, lecun_uniform, lecun_normal, orthogonal]:
+    register(_function)
+
+
+def default_weights_initializer(activation_function):
+    """Return the initializer of the weights of a layer suited to its activation function: He for relu and leaky relu,
+    Xavier otherwise"""
+    if activation_function.__name__ in ('relu', 'leaky_relu'):
+        return he_uniform
+    return xavier_uniform
+
+###############################################################################
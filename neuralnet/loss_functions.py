@@ -3,42 +3,63 @@
 import numpy as np
 
 clip_value = 1e-15
+
+
+def _clip_value(prediction):
+    """Return the value used to clip the prediction: clip_value, or the machine epsilon if the prediction type is not precise enough
+    to represent 1 - clip_value (for example float32)"""
+    dtype = np.asarray(prediction).dtype
+    if not np.issubdtype(dtype, np.floating):
+        return clip_value
+    return max(clip_value, float(np.finfo(dtype).eps))
+
 ###############################################################################
 
 # Binary Cross Entropy is used for binary classification tasks
 
-def binary_cross_entropy(prediction, target):
+def binary_cross_entropy(prediction, target, axis=None, out=None):
     """Binary Cross Entropy loss function
 
     Parameters
     ----------
-    prediction : float
+    prediction : float or array-like
         Neural network prediction or, in other words, the output of the feedforward phase.
-    target : float
+    target : float or array-like
         Label linked with the neural network input.
+    axis : int, optional
+        Axis along which the binary cross entropies of the outputs are summed: with axis=-1 and a batch (batch, n) of
+        predictions, the result is the loss of each input of the batch. The default is None (evaluation elementwise).
+    out : numpy array, optional
+        Array where the result is stored. The default is None.
 
     Returns
     -------
-    float
+    float or numpy array
         Evaluation of the binary cross entropy between prediction and target.
         
     """
     # Use np.clip in order to avoid nan problems when evaluating np.log()
-    prediction = np.clip(prediction, a_min=clip_value, a_max=1-clip_value)
+    clip = _clip_value(prediction)
+    prediction = np.clip(prediction, a_min=clip, a_max=1-clip)
     term_1 = target * np.log(prediction)
     term_2 = (1 - target) * np.log(1 - prediction)
-    return -(term_1 + term_2)
+    term_1 += term_2
+    if axis is not None:
+        term_1 = np.sum(term_1, axis=axis, out=out)
+    return np.negative(term_1, out=out)
 
 
-def binary_cross_entropy_deriv(prediction, target):
+def binary_cross_entropy_deriv(prediction, target, out=None):
     """Derivative of the Binary Cross Entropy
 
     Parameters
     ----------
-    prediction : float
+    prediction : float or array-like
         Neural network prediction or, in other words, the output of the feedforward phase.
-    target : float
+    target : float or array-like
         Label linked with the neural network input.
+    out : numpy array, optional
+        Array, with the same shape of prediction, where the result is stored. The default is None.
 
     Returns
     -------
@@ -47,16 +68,17 @@ def binary_cross_entropy_deriv(prediction, target):
 
     """
     # Use np.clip in order to avoid nan problems when evaluating the fraction target/prediction
-    prediction = np.clip(prediction, a_min=clip_value, a_max=1-clip_value)
+    clip = _clip_value(prediction)
+    prediction = np.clip(prediction, a_min=clip, a_max=1-clip)
     term_1 = target / prediction 
     term_2 = (1 - target) / (1 - prediction)
-    return term_2 - term_1
+    return np.subtract(term_2, term_1, out=out)
 
 ###############################################################################
 
 # Cross entropy is used for multiple-class classification tasks
 
-def cross_entropy(prediction, target):
+def cross_entropy(prediction, target, axis=None, out=None):
     """Cross Entropy loss function
     
     Parameters
@@ -65,21 +87,26 @@ def cross_entropy(prediction, target):
         Neural network prediction or, in other words, the output of the feedforward phase.
     target : array-like
         Label linked with the neural network input.
+    axis : int, optional
+        Axis along which the sum is performed: with axis=-1 and a batch (batch, n) of predictions, the result is
+        the loss of each input of the batch. The default is None (sum over all the elements).
+    out : numpy array, optional
+        Array where the result is stored, when axis is not None. The default is None.
 
     Returns
     -------
-    float
+    float or numpy array
        Evaluation of the cross entropy between prediction and target.
 
     """
     # Use np.clip in order to avoid nan problems when evaluating np.log()
-    prediction = np.clip(prediction, a_min=clip_value, a_max=1)
+    prediction = np.clip(prediction, a_min=_clip_value(prediction), a_max=1)
     log = np.log(prediction)
     ylog = target * log
-    return -np.sum(ylog)
+    return np.negative(np.sum(ylog, axis=axis, out=out), out=out)
 
 
-def cross_entropy_deriv(prediction, target):
+def cross_entropy_deriv(prediction, target, out=None):
     """Derivative of the Cross Entropy
 
     Parameters
@@ -88,6 +115,8 @@ def cross_entropy_deriv(prediction, target):
         Neural network prediction or, in other words, the output of the feedforward phase.
     target : array-like
         Label linked with the neural network input.
+    out : numpy array, optional
+        Array, with the same shape of prediction, where the result is stored. The default is None.
 
     Returns
     -------
@@ -96,8 +125,55 @@ def cross_entropy_deriv(prediction, target):
 
     """
     # Use np.clip in order to avoid nan problems when evaluating the fraction target/prediction
-    prediction = np.clip(prediction, a_min=clip_value, a_max=1)
-    target = np.array(target)
-    return - target/prediction
+    prediction = np.clip(prediction, a_min=_clip_value(prediction), a_max=1)
+    derivative = np.divide(target, prediction, out=out)
+    return np.negative(derivative, out=out)
+
+###############################################################################
+
+# Derivatives with respect to the linear combination of the output layer, when the loss function
+# is paired with its natural activation function: the jacobian of the activation and the division
+# by the (clipped) prediction cancel out, leaving prediction - target
+
+def binary_cross_entropy_sigmoid_deriv(prediction, target, out=None):
+    """Derivative of the Binary Cross Entropy composed with the sigmoid function
+    
+    Parameters
+    ----------
+    prediction : array-like
+        Neural network prediction, output of a sigmoid layer.
+    target : array-like
+        Label linked with the neural network input.
+    out : numpy array, optional
+        Array, with the same shape of prediction, where the result is stored. The default is None.
+
+    Returns
+    -------
+    numpy array
+        Derivative of the binary cross entropy with respect to the input of the sigmoid function.
+
+    """
+    return np.subtract(prediction, target, out=out)
+
+
+def cross_entropy_softmax_deriv(prediction, target, out=None):
+    """Derivative of the Cross Entropy composed with the softmax function
+    
+    Parameters
+    ----------
+    prediction : array-like
+        Neural network prediction, output of a softmax layer.
+    target : array-like
+        Label linked with the neural network input.
+    out : numpy array, optional
+        Array, with the same shape of prediction, where the result is stored. The default is None.
+
+    Returns
+    -------
+    numpy array
+        Derivative of the cross entropy with respect to the input of the softmax function.
+
+    """
+    return np.subtract(prediction, target, out=out)
 
 ###############################################################################
@@ -0,0 +1,138 @@
+#Evaluation metrics of the Artificial Neural Network on large datasets, computed in chunks by a pool of threads
+
+import collections
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from neuralnet import data
+
+###############################################################################
+
+ClassificationMetrics = collections.namedtuple('ClassificationMetrics',
+                                               ['num_samples', 'confusion_matrix', 'accuracy', 'precision', 'recall', 'f1',
+                                                'log_loss', 'top_k_accuracy'])
+ClassificationMetrics.__doc__ = """Result of evaluate_classification_metrics
+
+num_samples : int
+    Number of evaluated inputs.
+confusion_matrix : numpy array
+    Matrix (classes, classes) whose element [i, j] is the number of inputs of class i predicted as class j.
+accuracy : float
+    Fraction of correct predictions.
+precision : numpy array
+    Precision of each class (0 for a class never predicted).
+recall : numpy array
+    Recall of each class (0 for a class never present).
+f1 : numpy array
+    F1 score of each class.
+log_loss : float
+    Mean error evaluated with the loss function of the network.
+top_k_accuracy : dict
+    For each k, fraction of inputs whose class is among the k highest outputs.
+"""
+
+###############################################################################
+
+def _chunk_statistics(network, inputs, targets, num_classes, top_k, chunk_size, buffers):
+    """Evaluate the network on a chunk and return its partial sums: confusion matrix, sum of the losses and, for each k,
+    number of inputs whose class is among the k highest outputs"""
+    rows = len(inputs)
+    if not hasattr(buffers, 'predictions'):
+        # buffers of the thread, allocated once and reused for all its chunks
+        buffers.predictions = np.empty((chunk_size, network.num_outputs), dtype=network.dtype)
+        buffers.targets = np.empty((chunk_size, network.num_outputs), dtype=network.dtype)
+    predictions = network.predict(inputs, out=buffers.predictions[:rows])
+
+    if network.num_outputs == 1:
+        labels = (np.reshape(targets, -1) > 0.5).astype(np.intp)
+        predicted = (predictions[:, 0] > 0.5).astype(np.intp)
+    elif np.ndim(targets) == 1:
+        labels = np.asarray(targets, dtype=np.intp)
+        predicted = np.argmax(predictions, axis=1)
+        # integer labels are converted to one-hot rows for the loss function
+        targets = data.one_hot(labels, num_classes, out=buffers.targets[:rows])
+    else:
+        labels = np.argmax(targets, axis=1)
+        predicted = np.argmax(predictions, axis=1)
+
+    confusion = np.bincount(labels * num_classes + predicted, minlength=num_classes**2).reshape((num_classes, num_classes))
+    loss = float(np.sum(network.loss_func(prediction=predictions, target=targets, axis=-1)))
+    top = {}
+    for k in top_k:
+        if network.num_outputs == 1 or k >= num_classes:
+            top[k] = int(np.sum(predicted == labels)) if k == 1 else rows
+        else:
+            highest = np.argpartition(predictions, -k, axis=1)[:, -k:]
+            top[k] = int(np.sum(np.any(highest == labels[:, np.newaxis], axis=1)))
+    return confusion, loss, top
+
+
+def evaluate_classification_metrics(network, inputs, targets, chunk_size=10000, workers=None, top_k=(1,)):
+    """Evaluate a classification network on a dataset, in chunks of chunk_size inputs evaluated in parallel by a pool of
+    threads (NumPy releases the GIL in the matrix products). Only the partial sums of each chunk are kept, so the memory
+    used is bounded by the size of the chunks, not of the dataset (which can be a np.memmap).
+
+    Parameters
+    ----------
+    network : Ann
+        Neural network to evaluate.
+    inputs : array_like
+        Matrix (n, num_inputs) of input data.
+    targets : array_like
+        Labels linked with the input data: 0 or 1 for binary classification, one-hot rows (or integer labels)
+        for multi-class classification.
+    chunk_size : int, optional
+        Number of inputs of each chunk. The default is 10000.
+    workers : int, optional
+        Number of threads. The default is None (chosen by concurrent.futures.ThreadPoolExecutor).
+    top_k : tuple, optional
+        Values of k for the top-k accuracy. The default is (1,).
+
+    Returns
+    -------
+    ClassificationMetrics
+        Confusion matrix, accuracy, precision, recall and F1 of each class, mean loss and top-k accuracies.
+
+    """
+    inputs = np.reshape(inputs, (-1, network.num_inputs))
+    if len(inputs) == 0:
+        raise ValueError("No data to evaluate the metrics")
+    if network.num_outputs == 1 or np.ndim(targets) > 1:
+        targets = np.reshape(targets, (-1, network.num_outputs))
+    num_classes = 2 if network.num_outputs == 1 else network.num_outputs
+    buffers = threading.local()
+
+    def chunk_statistics(start):
+        stop = start + chunk_size
+        return _chunk_statistics(network, inputs[start:stop], targets[start:stop], num_classes, top_k, chunk_size,
+                                 buffers)
+
+    confusion = np.zeros((num_classes, num_classes), dtype=np.int64)
+    loss = 0.
+    top = dict.fromkeys(top_k, 0)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # the partial sums are reduced in the order of the chunks, so the result does not depend on the threads
+        for chunk_confusion, chunk_loss, chunk_top in executor.map(chunk_statistics, range(0, len(inputs), chunk_size)):
+            confusion += chunk_confusion
+            loss += chunk_loss
+            for k in top_k:
+                top[k] += chunk_top[k]
+
+    num_samples = len(inputs)
+    correct = np.diag(confusion).astype(float)
+    predicted_per_class = np.sum(confusion, axis=0)
+    true_per_class = np.sum(confusion, axis=1)
+    precision = np.divide(correct, predicted_per_class, out=np.zeros(num_classes), where=predicted_per_class > 0)
+    recall = np.divide(correct, true_per_class, out=np.zeros(num_classes), where=true_per_class > 0)
+    f1 = np.divide(2 * precision * recall, precision + recall, out=np.zeros(num_classes), where=precision + recall > 0)
+    return ClassificationMetrics(num_samples=num_samples,
+                                 confusion_matrix=confusion,
+                                 accuracy=float(np.sum(correct) / num_samples),
+                                 precision=precision,
+                                 recall=recall,
+                                 f1=f1,
+                                 log_loss=loss / num_samples,
+                                 top_k_accuracy={k : top[k] / num_samples for k in top_k})
+
+###############################################################################
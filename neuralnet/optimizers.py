@@ -0,0 +1,195 @@
+#Update rules (optimizers) of weights and biases used in the training of the Artificial Neural Network
+
+import numpy as np
+
+###############################################################################
+
+class Optimizer:
+    """Base class of the optimizers: an optimizer updates in place a list of parameters (weights and biases of each layer)
+    given their derivatives, keeping its state (e.g. velocities or moments) in arrays with the same shapes of the parameters.
+
+    The subclasses define name, slots (names of the state arrays of each parameter), the hyperparameters given to
+    __init__ and the method _update.
+    """
+
+    name = None
+    slots = ()
+
+    def __init__(self):
+        # number of updates done, used by the bias correction of Adam
+        self.steps = 0
+        # for each slot, list of state arrays (one for each parameter), allocated at the first update
+        self.state = {}
+        self._scratch = []
+
+
+    def get_hyperparameters(self):
+        """Return a dictionary with the arguments of __init__, used to save the optimizer"""
+        return {}
+
+
+    def _allocate(self, parameters):
+        """Allocate the state arrays (zero-filled) and the scratch buffers for the given parameters, if it was not done before"""
+        if len(self._scratch) != len(parameters):
+            self._scratch = [np.empty(p.shape, dtype=p.dtype) for p in parameters]
+        for slot in self.slots:
+            if len(self.state.get(slot, [])) != len(parameters):
+                self.state[slot] = [np.zeros(p.shape, dtype=p.dtype) for p in parameters]
+
+
+    def step(self, parameters, derivatives, learning_rate):
+        """Update in place the parameters
+
+        Parameters
+        ----------
+        parameters : list
+            List of numpy arrays (weights and biases) to update.
+        derivatives : list
+            List of the derivatives of the loss function with respect to each parameter.
+        learning_rate : float
+            Learning rate of the update.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._allocate(parameters)
+        self.steps += 1
+        for i in range(len(parameters)):
+            self._update(i, parameters[i], derivatives[i], learning_rate, self._scratch[i])
+
+
+    def _update(self, i, parameter, derivative, learning_rate, scratch):
+        """Update in place the i-th parameter, using scratch (an array with the same shape) for the intermediate values"""
+        raise NotImplementedError
+
+###############################################################################
+
+class SGD(Optimizer):
+    """Stochastic gradient descendent: w = w - learning_rate * dw"""
+
+    name = 'sgd'
+
+    def _update(self, i, parameter, derivative, learning_rate, scratch):
+        parameter -= np.multiply(derivative, learning_rate, out=scratch)
+
+
+class Momentum(Optimizer):
+    """Gradient descendent with momentum: v = momentum * v - learning_rate * dw, w = w + v"""
+
+    name = 'momentum'
+    slots = ('velocity',)
+
+    def __init__(self, momentum=0.9):
+        """
+        Parameters
+        ----------
+        momentum : float, optional
+            Fraction of the previous velocity kept at each update. The default is 0.9.
+        """
+        super().__init__()
+        self.momentum = momentum
+
+
+    def get_hyperparameters(self):
+        return {'momentum' : self.momentum}
+
+
+    def _update(self, i, parameter, derivative, learning_rate, scratch):
+        velocity = self.state['velocity'][i]
+        velocity *= self.momentum
+        velocity -= np.multiply(derivative, learning_rate, out=scratch)
+        parameter += velocity
+
+
+class Nesterov(Momentum):
+    """Nesterov accelerated gradient: the velocity is updated as in Momentum, and the parameter moves by
+    momentum * v - learning_rate * dw (the derivative is looked ahead along the velocity)"""
+
+    name = 'nesterov'
+
+    def _update(self, i, parameter, derivative, learning_rate, scratch):
+        velocity = self.state['velocity'][i]
+        step = np.multiply(derivative, learning_rate, out=scratch)
+        velocity *= self.momentum
+        velocity -= step
+        parameter -= step
+        parameter += np.multiply(velocity, self.momentum, out=scratch)
+
+
+class RMSProp(Optimizer):
+    """RMSProp: s = decay * s + (1 - decay) * dw^2, w = w - learning_rate * dw / (sqrt(s) + epsilon)"""
+
+    name = 'rmsprop'
+    slots = ('square_average',)
+
+    def __init__(self, decay=0.9, epsilon=1e-8):
+        """
+        Parameters
+        ----------
+        decay : float, optional
+            Decay rate of the moving average of the squared derivatives. The default is 0.9.
+        epsilon : float, optional
+            Small value added to the denominator for numerical stability. The default is 1e-8.
+        """
+        super().__init__()
+        self.decay = decay
+        self.epsilon = epsilon
+
+
+    def get_hyperparameters(self):
+        return {'decay' : self.decay, 'epsilon' : self.epsilon}
+
+
+    def _update(self, i, parameter, derivative, learning_rate, scratch):
+        square_average = self.state['square_average'][i]
+        square_average *= self.decay
+        square_average += np.multiply(np.square(derivative, out=scratch), 1 - self.decay, out=scratch)
+        denominator = np.sqrt(square_average, out=scratch)
+        denominator += self.epsilon
+        parameter -= np.multiply(np.divide(derivative, denominator, out=scratch), learning_rate, out=scratch)
+
+
+class Adam(Optimizer):
+    """Adam: moving averages m and v of the derivatives and of their squares, with bias correction,
+    w = w - learning_rate * m_hat / (sqrt(v_hat) + epsilon)"""
+
+    name = 'adam'
+    slots = ('first_moment', 'second_moment')
+
+    def __init__(self, beta_1=0.9, beta_2=0.999, epsilon=1e-8):
+        """
+        Parameters
+        ----------
+        beta_1 : float, optional
+            Decay rate of the moving average of the derivatives. The default is 0.9.
+        beta_2 : float, optional
+            Decay rate of the moving average of the squared derivatives. The default is 0.999.
+        epsilon : float, optional
+            Small value added to the denominator for numerical stability. The default is 1e-8.
+        """
+        super().__init__()
+        self.beta_1 = beta_1
+        self.beta_2 = beta_2
+        self.epsilon = epsilon
+
+
+    def get_hyperparameters(self):
+        return {'beta_1' : self.beta_1, 'beta_2' : self.beta_2, 'epsilon' : self.epsilon}
+
+
+    def _update(self, i, parameter, derivative, learning_rate, scratch):
+        first_moment = self.state['first_moment'][i]
+        second_moment = self.state['second_moment'][i]
+        first_moment *= self.beta_1
+        first_moment += np.multiply(derivative, 1 - self.beta_1, out=scratch)
+        second_moment *= self.beta_2
+        second_moment += np.multiply(np.square(derivative, out=scratch), 1 - self.beta_2, out=scratch)
+        # the bias correction of both moments is included in the step size
+        step_size = learning_rate * np.sqrt(1 - self.beta_2 ** self.steps) / (1 - self.beta_1 ** self.steps)
+        denominator = np.sqrt(second_moment, out=scratch)
+        denominator += self.epsilon * np.sqrt(1 - self.beta_2 ** self.steps)
+        parameter -= np.multiply(np.divide(first_moment, denominator, out=scratch), step_size, out=scratch)
+
+###############################################################################
@@ -0,0 +1,331 @@
+#Data-parallel training of the Artificial Neural Network on several processes or threads
+
+import copy
+import multiprocessing
+import threading
+import numpy as np
+
+###############################################################################
+
+# State of a worker process, set once by _init_worker when the process starts
+_worker = {}
+
+
+def _shared_array(raw, dtype, shape):
+    """Return a numpy array with the given dtype and shape that is a view of the shared memory raw"""
+    return np.frombuffer(raw, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+
+def _num_parameters(layers):
+    """Return the total number of weights and biases of a network with the given number of neurons for each layer"""
+    layers = [int(n) for n in layers]
+    return sum(layers[i] * layers[i+1] + layers[i+1] for i in range(len(layers) - 1))
+
+
+def _init_worker(network, shard_size, raw_parameters, raw_gradients, raw_inputs, raw_targets, num_slots):
+    """Initialize a worker process: the copy of the network reads weights and biases from the shared memory
+    and has its own workspace for up to shard_size inputs.
+
+    Parameters
+    ----------
+    network : Ann
+        Copy of the neural network to train (sent once, when the process starts).
+    shard_size : int
+        Maximum number of inputs computed by the worker for each step.
+    raw_parameters : multiprocessing.RawArray
+        Shared memory with weights and biases, in the layout of Ann._flatten_parameters.
+    raw_gradients : multiprocessing.RawArray
+        Shared memory with the derivatives computed by each task (num_slots rows, same layout of the parameters).
+    raw_inputs : multiprocessing.RawArray
+        Shared memory with the inputs of the current batch.
+    raw_targets : multiprocessing.RawArray
+        Shared memory with the targets of the current batch.
+    num_slots : int
+        Number of rows of raw_gradients, i.e. maximum number of tasks for each step.
+
+    Returns
+    -------
+    None.
+
+    """
+    dtype = network.dtype
+    num_parameters = _num_parameters(network.layers)
+    parameters = _shared_array(raw_parameters, dtype, (num_parameters,))
+    gradients = _shared_array(raw_gradients, dtype, (num_slots, num_parameters))
+
+    network._free_workspace()
+    network._allocate_workspace(shard_size)
+    weights, biases = network._parameters_views(parameters, network.layers)
+    network._set_parameters(weights, biases)
+
+    _worker['network'] = network
+    _worker['gradients'] = [network._parameters_views(gradients[k], network.layers) for k in range(num_slots)]
+    _worker['inputs'] = _shared_array(raw_inputs, dtype, (-1, network.num_inputs))
+    _worker['targets'] = _shared_array(raw_targets, dtype, (-1, network.num_outputs))
+
+
+def _worker_gradients(task):
+    """Compute, in a worker process, the derivatives for the rows [start, stop) of the current batch
+    and write them in the gradients slot of the task.
+
+    Parameters
+    ----------
+    task : tuple
+        (slot, start, stop): index of the slot of the shared gradients and rows of the batch.
+
+    Returns
+    -------
+    float
+        Sum of the errors evaluated with the loss function over the rows.
+
+    """
+    slot, start, stop = task
+    network = _worker['network']
+    network.weights_deriv, network.biases_deriv = _worker['gradients'][slot]
+    return float(network._batch_gradients(_worker['inputs'][start:stop], _worker['targets'][start:stop]))
+
+###############################################################################
+
+class DataParallel:
+    """Data-parallel training step: each batch is split in (at most) one shard for each worker process, the workers compute
+    the derivatives of their shard with the network's forward propagation and backpropagation, and the derivatives are
+    averaged (weighted by the shard sizes, always in the same order) before a single update of weights and biases.
+
+    Weights and biases live in shared memory during the training: the workers read them directly and the network of the
+    main process updates them in place, so they are never pickled after the workers start. The result does not depend on
+    the scheduling of the processes, so it is deterministic for a fixed seed and number of workers.
+    """
+
+    def __init__(self, network, workers, batch_size):
+        """Start the worker processes and move weights and biases of the network in shared memory.
+
+        Parameters
+        ----------
+        network : Ann
+            Neural network to train.
+        workers : int
+            Number of worker processes.
+        batch_size : int
+            Maximum number of inputs of a batch.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.network = network
+        self.workers = workers
+        self.batch_size = batch_size
+        dtype = network.dtype
+        num_parameters = _num_parameters(network.layers)
+        shard_size = -(-batch_size // workers)
+
+        context = multiprocessing.get_context()
+        raw_parameters = context.RawArray('b', num_parameters * dtype.itemsize)
+        raw_gradients = context.RawArray('b', workers * num_parameters * dtype.itemsize)
+        raw_inputs = context.RawArray('b', batch_size * network.num_inputs * dtype.itemsize)
+        raw_targets = context.RawArray('b', batch_size * network.num_outputs * dtype.itemsize)
+
+        self.parameters = _shared_array(raw_parameters, dtype, (num_parameters,))
+        self.parameters[:] = network._flatten_parameters(network.weights, network.biases)
+        self.gradients = _shared_array(raw_gradients, dtype, (workers, num_parameters))
+        self.inputs = _shared_array(raw_inputs, dtype, (batch_size, network.num_inputs))
+        self.targets = _shared_array(raw_targets, dtype, (batch_size, network.num_outputs))
+        # averaged derivatives, used by the gradient descendent of the main process
+        self.gradient = np.zeros(num_parameters, dtype=dtype)
+        self._weighted_gradient = np.empty(num_parameters, dtype=dtype)
+
+        self.pool = context.Pool(processes=workers, initializer=_init_worker,
+                                 initargs=(network, shard_size, raw_parameters, raw_gradients, raw_inputs, raw_targets, workers))
+
+        # arrays of the network, given back (with the values of the training) by close
+        self._own_arrays = (network.weights, network.biases, network.weights_deriv, network.biases_deriv)
+        weights, biases = network._parameters_views(self.parameters, network.layers)
+        network._set_parameters(weights, biases)
+        network.weights_deriv, network.biases_deriv = network._parameters_views(self.gradient, network.layers)
+
+
+    def __call__(self, inputs, targets, learning_rate):
+        """Perform a single step of training on a batch of data, with the same interface of Ann._train_batch
+
+        Parameters
+        ----------
+        inputs : array_like
+            Matrix (batch, num_inputs) of input data.
+        targets : array_like
+            Matrix (batch, num_outputs) of labels linked with the input data.
+        learning_rate : float
+            Learning rate used to update weights and biases with the gradient descendent method.
+
+        Returns
+        -------
+        float
+            Sum of the errors evaluated with the loss function over the batch.
+
+        """
+        sum_error = self.batch_gradients(inputs, targets)
+        self.network._gradient_descendent(learning_rate=learning_rate)
+        return sum_error
+
+
+    def batch_gradients(self, inputs, targets):
+        """Compute in parallel the derivatives of weights and biases on a batch of data, averaged over the batch and stored in
+        weights_deriv and biases_deriv of the network, with the same interface of Ann._batch_gradients
+
+        Parameters
+        ----------
+        inputs : array_like
+            Matrix (batch, num_inputs) of input data.
+        targets : array_like
+            Matrix (batch, num_outputs) of labels linked with the input data.
+
+        Returns
+        -------
+        float
+            Sum of the errors evaluated with the loss function over the batch.
+
+        """
+        rows = len(inputs)
+        np.copyto(self.inputs[:rows], inputs, casting='unsafe')
+        np.copyto(self.targets[:rows], targets, casting='unsafe')
+
+        bounds = np.linspace(0, rows, self.workers + 1).astype(int)
+        tasks = [(k, bounds[k], bounds[k+1]) for k in range(self.workers) if bounds[k+1] > bounds[k]]
+        sum_errors = self.pool.map(_worker_gradients, tasks)
+
+        # Average of the derivatives of the shards, weighted by their number of rows
+        np.multiply(self.gradients[tasks[0][0]], (tasks[0][2] - tasks[0][1]) / rows, out=self.gradient)
+        for slot, start, stop in tasks[1:]:
+            self.gradient += np.multiply(self.gradients[slot], (stop - start) / rows, out=self._weighted_gradient)
+        return sum(sum_errors)
+
+
+    def close(self):
+        """Stop the worker processes and give back to the network its own arrays of weights, biases and their derivatives,
+        with the values reached in shared memory (so the arrays keep their identity across the training)"""
+        self.pool.close()
+        self.pool.join()
+        network = self.network
+        weights, biases, weights_deriv, biases_deriv = self._own_arrays
+        network._set_parameters(weights, biases)
+        network._copy_parameters_from(self.parameters)
+        network.weights_deriv, network.biases_deriv = weights_deriv, biases_deriv
+        gradient_weights, gradient_biases = network._parameters_views(self.gradient, network.layers)
+        for i in range(len(weights_deriv)):
+            np.copyto(weights_deriv[i], gradient_weights[i])
+            np.copyto(biases_deriv[i], gradient_biases[i])
+
+###############################################################################
+
+# Asynchronous (Hogwild) training: threads update the shared weights and biases without locks
+
+def _hogwild_worker(network, inputs, targets, epochs, learning_rate, batch_size, barrier, errors, k):
+    """Train, in a thread, a copy of the network that shares weights and biases on its own part of the data.
+
+    Parameters
+    ----------
+    network : Ann
+        Copy of the neural network with its own workspace (see hogwild).
+    inputs : numpy array
+        Matrix (n, num_inputs) of input data of the thread.
+    targets : numpy array
+        Matrix (n, num_outputs) of labels of the thread.
+    epochs : int
+        Number of passes over the data of the thread.
+    learning_rate : float
+        Learning rate used to update weights and biases with the gradient descendent method.
+    batch_size : int
+        Number of inputs for each update of weights and biases.
+    barrier : threading.Barrier
+        Barrier shared by the threads, waited at the end of each epoch.
+    errors : numpy array
+        Matrix (epochs, threads) where the sum of the errors of each epoch is stored in the column k.
+    k : int
+        Index of the thread.
+
+    Returns
+    -------
+    None.
+
+    """
+    try:
+        for epoch in range(epochs):
+            sum_error = 0
+            for start in range(0, len(inputs), batch_size):
+                stop = start + batch_size
+                sum_error += network._train_batch(inputs[start:stop], targets[start:stop], learning_rate)
+            errors[epoch, k] = sum_error
+            barrier.wait()
+    except threading.BrokenBarrierError:
+        pass
+    except BaseException:
+        # Do not leave the other threads waiting for this one
+        barrier.abort()
+        raise
+
+
+def hogwild(network, inputs, targets, epochs, learning_rate, threads, batch_size=1, epoch_end=None):
+    """Asynchronous lock-free training (Hogwild): the data is split in one contiguous part for each thread, and each thread
+    performs the forward propagation, backpropagation and gradient descendent of its part, updating in place the weights
+    and biases shared by all the threads without any synchronization.
+
+    Each thread works on a copy of the network with its own activations, derivatives and workspace buffers, while weights
+    and biases are the same arrays of network. NumPy releases the GIL in the matrix products, so the threads run in parallel;
+    the result depends on the scheduling of the threads, so it is not deterministic.
+
+    Parameters
+    ----------
+    network : Ann
+        Neural network to train.
+    inputs : numpy array
+        Matrix (n, num_inputs) of input data.
+    targets : numpy array
+        Matrix (n, num_outputs) of labels linked with the input data.
+    epochs : int
+        Number of passes over the data of each thread.
+    learning_rate : float
+        Learning rate used to update weights and biases with the gradient descendent method.
+    threads : int
+        Number of threads.
+    batch_size : int, optional
+        Number of inputs for each update of weights and biases. The default is 1.
+    epoch_end : function, optional
+        Function called with the index of the epoch and the sum of the errors over all the inputs, when all the threads
+        have finished the epoch. The default is None.
+
+    Returns
+    -------
+    errors : numpy array
+        Sum of the errors over all the inputs, for each epoch.
+
+    """
+    bounds = np.linspace(0, len(inputs), threads + 1).astype(int)
+    parts = [(bounds[k], bounds[k+1]) for k in range(threads) if bounds[k+1] > bounds[k]]
+    errors = np.zeros((epochs, len(parts)))
+    epoch = iter(range(epochs))
+
+    def end_of_epoch():
+        i = next(epoch)
+        if epoch_end is not None:
+            epoch_end(i, errors[i].sum())
+
+    barrier = threading.Barrier(len(parts), action=end_of_epoch)
+    workers = []
+    for k, (start, stop) in enumerate(parts):
+        clone = copy.copy(network)
+        # each thread has its own optimizer, whose state and scratch buffers are not shared
+        clone.optimizer = copy.deepcopy(network.optimizer)
+        clone._free_workspace()
+        clone._allocate_workspace(min(batch_size, stop - start))
+        workers.append(threading.Thread(target=_hogwild_worker,
+                                        args=(clone, inputs[start:stop], targets[start:stop], epochs, learning_rate,
+                                              batch_size, barrier, errors, k)))
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    if barrier.broken:
+        raise RuntimeError("Asynchronous training interrupted by an error in one of the threads")
+    return errors.sum(axis=1)
+
+###############################################################################
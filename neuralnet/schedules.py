@@ -0,0 +1,220 @@
+#Learning rate schedules used in the training of the Artificial Neural Network
+
+import numpy as np
+
+###############################################################################
+
+class Schedule:
+    """Base class of the learning rate schedules: the train method of Ann calls the schedule before each update of weights
+    and biases, with the index of the epoch and of the update, and calls end_epoch with the mean error of each epoch."""
+
+    def __call__(self, epoch, step):
+        """Return the learning rate
+
+        Parameters
+        ----------
+        epoch : int
+            Index of the current epoch (starting from 0).
+        step : int
+            Index of the current update of weights and biases since the beginning of the training (starting from 0).
+
+        Returns
+        -------
+        float
+            Learning rate of the update.
+
+        """
+        raise NotImplementedError
+
+
+    def end_epoch(self, epoch, error):
+        """Receive the mean error of the epoch evaluated with the loss function (not used by default)"""
+        pass
+
+
+    def get_state(self):
+        """Return a dictionary (json-serializable) with the attributes of the schedule, used to checkpoint the training"""
+        return dict(vars(self))
+
+
+    def set_state(self, state):
+        """Restore the attributes of the schedule returned by get_state"""
+        vars(self).update(state)
+
+
+def _rate(learning_rate, epoch, step):
+    """Return the value of learning_rate, which can be a number or a Schedule"""
+    if isinstance(learning_rate, Schedule):
+        return learning_rate(epoch, step)
+    return learning_rate
+
+###############################################################################
+
+class Constant(Schedule):
+    """Constant learning rate"""
+
+    def __init__(self, learning_rate):
+        """
+        Parameters
+        ----------
+        learning_rate : float
+            Learning rate.
+        """
+        self.learning_rate = learning_rate
+
+
+    def __call__(self, epoch, step):
+        return self.learning_rate
+
+
+class StepDecay(Schedule):
+    """Learning rate multiplied by drop every epochs_drop epochs: learning_rate * drop ** (epoch // epochs_drop)"""
+
+    def __init__(self, learning_rate, drop=0.5, epochs_drop=10):
+        """
+        Parameters
+        ----------
+        learning_rate : float
+            Initial learning rate.
+        drop : float, optional
+            Factor applied to the learning rate every epochs_drop epochs. The default is 0.5.
+        epochs_drop : int, optional
+            Number of epochs between two drops. The default is 10.
+        """
+        self.learning_rate = learning_rate
+        self.drop = drop
+        self.epochs_drop = epochs_drop
+
+
+    def __call__(self, epoch, step):
+        return self.learning_rate * self.drop ** (epoch // self.epochs_drop)
+
+
+class ExponentialDecay(Schedule):
+    """Learning rate decreasing exponentially with the epochs: learning_rate * decay_rate ** epoch"""
+
+    def __init__(self, learning_rate, decay_rate=0.95):
+        """
+        Parameters
+        ----------
+        learning_rate : float
+            Initial learning rate.
+        decay_rate : float, optional
+            Factor applied to the learning rate at each epoch. The default is 0.95.
+        """
+        self.learning_rate = learning_rate
+        self.decay_rate = decay_rate
+
+
+    def __call__(self, epoch, step):
+        return self.learning_rate * self.decay_rate ** epoch
+
+
+class CosineAnnealing(Schedule):
+    """Learning rate decreasing from learning_rate to minimum along half a cosine in epochs epochs (then it stays at minimum)"""
+
+    def __init__(self, learning_rate, epochs, minimum=0.):
+        """
+        Parameters
+        ----------
+        learning_rate : float
+            Initial learning rate.
+        epochs : int
+            Number of epochs of the annealing.
+        minimum : float, optional
+            Final learning rate. The default is 0.
+        """
+        self.learning_rate = learning_rate
+        self.epochs = epochs
+        self.minimum = minimum
+
+
+    def __call__(self, epoch, step):
+        progress = min(epoch / self.epochs, 1.)
+        return self.minimum + (self.learning_rate - self.minimum) * (1 + np.cos(np.pi * progress)) / 2
+
+
+class LinearWarmup(Schedule):
+    """Learning rate increasing linearly during the first warmup_steps updates, up to the one given by learning_rate"""
+
+    def __init__(self, learning_rate, warmup_steps):
+        """
+        Parameters
+        ----------
+        learning_rate : float or Schedule
+            Learning rate (or schedule) used after the warmup.
+        warmup_steps : int
+            Number of updates of the warmup.
+        """
+        self.learning_rate = learning_rate
+        self.warmup_steps = warmup_steps
+
+
+    def __call__(self, epoch, step):
+        rate = _rate(self.learning_rate, epoch, step)
+        if step < self.warmup_steps:
+            return rate * (step + 1) / self.warmup_steps
+        return rate
+
+
+    def end_epoch(self, epoch, error):
+        if isinstance(self.learning_rate, Schedule):
+            self.learning_rate.end_epoch(epoch, error)
+
+
+    def get_state(self):
+        state = dict(vars(self))
+        if isinstance(self.learning_rate, Schedule):
+            state['learning_rate'] = self.learning_rate.get_state()
+        return state
+
+
+    def set_state(self, state):
+        state = dict(state)
+        if isinstance(self.learning_rate, Schedule):
+            self.learning_rate.set_state(state.pop('learning_rate'))
+        vars(self).update(state)
+
+
+class ReduceOnPlateau(Schedule):
+    """Learning rate multiplied by factor when the mean error of the epoch has not improved for patience epochs"""
+
+    def __init__(self, learning_rate, factor=0.1, patience=10, min_delta=0., minimum=0.):
+        """
+        Parameters
+        ----------
+        learning_rate : float
+            Initial learning rate.
+        factor : float, optional
+            Factor applied to the learning rate when the error stops improving. The default is 0.1.
+        patience : int, optional
+            Number of epochs without improvement after which the learning rate is reduced. The default is 10.
+        min_delta : float, optional
+            Minimum decrease of the error considered an improvement. The default is 0.
+        minimum : float, optional
+            Lower bound of the learning rate. The default is 0.
+        """
+        self.learning_rate = learning_rate
+        self.factor = factor
+        self.patience = patience
+        self.min_delta = min_delta
+        self.minimum = minimum
+        self.best = np.inf
+        self.wait = 0
+
+
+    def __call__(self, epoch, step):
+        return self.learning_rate
+
+
+    def end_epoch(self, epoch, error):
+        if error < self.best - self.min_delta:
+            self.best = error
+            self.wait = 0
+            return
+        self.wait += 1
+        if self.wait >= self.patience:
+            self.learning_rate = max(self.learning_rate * self.factor, self.minimum)
+            self.wait = 0
+
+###############################################################################
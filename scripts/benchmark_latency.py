@@ -0,0 +1,47 @@
+import time
+import numpy as np
+from neuralnet import ann
+from neuralnet import activation_functions as act
+from neuralnet import loss_functions as lf
+
+
+#LATENCY OF THE PREDICTION OF A SINGLE INPUT
+
+num_inputs = 64
+num_hidden = [32, 16]
+num_outputs = 10
+num_calls = 20000
+num_warmup = 1000
+
+
+def latencies(predict, samples):
+    "Return the latency (in microseconds) of each call of predict, one for each input in samples"
+    for x in samples[:num_warmup]:
+        predict(x)
+    times = np.empty(len(samples))
+    for i, x in enumerate(samples):
+        start = time.perf_counter_ns()
+        predict(x)
+        times[i] = time.perf_counter_ns() - start
+    return times / 1000
+
+
+#Create the neural network (the latency does not depend on the values of weights and biases)
+neural_network = ann.Ann(num_inputs=num_inputs, num_hidden=num_hidden, num_outputs=num_outputs,
+                         activation_function=[act.relu] * len(num_hidden) + [act.softmax], loss_function=lf.cross_entropy, seed=1)
+predictor = neural_network.freeze()
+
+#Inputs of the calls: one row at a time, as in an online service
+samples = np.random.default_rng(0).random((num_calls, num_inputs))
+batches = samples[:, np.newaxis, :]
+
+paths = [('Ann.predict (batch of one input)', neural_network.predict, batches),
+         ('Ann.predict_one', neural_network.predict_one, samples),
+         ('Predictor.predict (batch of one input)', predictor.predict, batches),
+         ('Predictor.predict_one', predictor.predict_one, samples)]
+
+print("Latency of {} calls (microseconds)".format(num_calls))
+print("{:<40} {:>8} {:>8} {:>8}".format('', 'p50', 'p99', 'mean'))
+for name, predict, inputs in paths:
+    times = latencies(predict, inputs)
+    print("{:<40} {:>8.1f} {:>8.1f} {:>8.1f}".format(name, np.percentile(times, 50), np.percentile(times, 99), np.mean(times)))
@@ -19,6 +19,7 @@ setup(
    scripts=[
             'scripts/binary_classification.py',
             'scripts/classification_Digits.py',
-            'scripts/classification_Iris.py'
+            'scripts/classification_Iris.py',
+            'scripts/benchmark_latency.py'
            ]
 )
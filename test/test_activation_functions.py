@@ -63,6 +63,13 @@ def test_symmetry_derivative_sigmoid(x):
     assert np.abs(act.deriv_sigmoid([x]) - act.deriv_sigmoid([-x])) < 1e-5
     
     
+@given(inputs = st.lists(st.floats(allow_nan=False, allow_infinity=True), min_size=1, max_size=100))
+def test_elementwise_derivative_sigmoid_is_jacobian_diagonal(inputs):
+    "Test that the elementwise derivative of the sigmoid function is the principal diagonal of its jacobian"
+    inputs = np.asarray(inputs)
+    assert np.all(np.isclose(act.deriv_sigmoid_elementwise(inputs), np.diagonal(act.deriv_sigmoid(inputs))))
+    
+    
     # softmax function
     
     
@@ -135,3 +142,92 @@ def test_range_softmax_function_derivative(inputs):
     assert np.all(jacobian >= -1) and np.all(jacobian <= 1)
     
 
+
+def test_batch_softmax_is_applied_row_by_row():
+    "Test that for a bi-dimensional input the softmax function is applied to each row separately"
+    inputs = np.array([[8.0, 5.0, 0.0], [1.0, 2.0, 3.0]])
+    result = act.softmax(inputs)
+    assert np.all(np.isclose(result[0], act.softmax(inputs[0])))
+    assert np.all(np.isclose(result[1], act.softmax(inputs[1])))
+
+
+def test_batch_jacobians_are_stacked():
+    "Test that for a bi-dimensional input the jacobians of sigmoid and softmax are stacked row by row"
+    inputs = np.array([[0., 1.], [2., -1.]])
+    for function in [act.deriv_sigmoid, act.deriv_softmax]:
+        jacobians = function(inputs)
+        assert jacobians.shape == (2, 2, 2)
+        assert np.all(np.isclose(jacobians[1], function(inputs[1])))
+
+
+def test_softmax_along_axis_and_in_output_buffer():
+    "Test that the softmax function can be normalized along a given axis and stored in the output buffer given by the caller"
+    inputs = np.array([[8.0, 5.0, 0.0], [1.0, 2.0, 3.0]])
+    out = np.empty_like(inputs)
+    result = act.softmax(inputs, axis=0, out=out)
+    assert result is out
+    assert np.all(np.isclose(result[:, 2], act.softmax(inputs[:, 2])))
+
+
+def test_sigmoid_in_place():
+    "Test that the sigmoid function and its elementwise derivative can overwrite their input"
+    inputs = np.array([[0., 1.], [-800., 50.]])
+    expected_sigmoid = act.sigmoid(inputs)
+    expected_derivative = act.deriv_sigmoid_elementwise(inputs)
+    x = np.copy(inputs)
+    assert act.sigmoid(x, out=x) is x
+    assert np.all(x == expected_sigmoid)
+    x = np.copy(inputs)
+    assert act.deriv_sigmoid_elementwise(x, out=x) is x
+    assert np.all(x == expected_derivative)
+
+
+def test_sigmoid_float32_limit_case():
+    "Test that in float32 the sigmoid function keeps the type and does not overflow for large negative inputs"
+    inputs = np.array([-800., -100., 0., 100.], dtype=np.float32)
+    with np.errstate(over='raise'):
+        result = act.sigmoid(inputs)
+    assert result.dtype == np.float32
+    assert np.all(result >= 0) and np.all(result <= 1)
+
+
+    # elementwise activation functions (relu, leaky relu, tanh, identity)
+
+
+@given(inputs = st.lists(st.floats(min_value=-10, max_value=10).filter(lambda x: abs(x) > 1e-3), min_size=1, max_size=50))
+def test_elementwise_derivatives_are_numerical_derivatives(inputs):
+    "Test that the elementwise derivatives of relu, leaky relu, tanh and identity agree with the finite differences"
+    inputs = np.asarray(inputs)
+    h = 1e-6
+    for name in ['relu', 'leaky_relu', 'tanh', 'identity']:
+        function = act.registry[name]
+        numerical = (function(inputs + h) - function(inputs - h)) / (2 * h)
+        assert np.allclose(act.elementwise_derivatives[name](inputs), numerical, atol=1e-5)
+
+
+def test_elementwise_activations_in_place():
+    "Test that relu, leaky relu, tanh, identity and their derivatives can overwrite their input, keeping the type"
+    inputs = np.array([[-2., 0.], [0.5, 3.]], dtype=np.float32)
+    for name in ['relu', 'leaky_relu', 'tanh', 'identity']:
+        for function in [act.registry[name], act.elementwise_derivatives[name]]:
+            expected = function(inputs)
+            x = np.copy(inputs)
+            assert function(x, out=x) is x
+            assert x.dtype == np.float32
+            assert np.allclose(x, expected)
+
+
+def test_register_activation_function():
+    "Test that a registered activation function is available by name, and that a derivative is required"
+    def softplus(x, out=None):
+        return np.logaddexp(x, 0, out=out)
+    try:
+        act.register(softplus)
+    except ValueError:
+        pass
+    else:
+        assert False
+    act.register(softplus, elementwise_derivative=act.sigmoid)
+    assert act.registry['softplus'] is softplus
+    assert act.elementwise_derivatives['softplus'] is act.sigmoid
+    del act.registry['softplus'], act.elementwise_derivatives['softplus']
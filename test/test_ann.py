@@ -4,10 +4,15 @@ from hypothesis import given
 from hypothesis.strategies import data
 import hypothesis.strategies as st
 import shutil
+import os
 
 from neuralnet import ann
 from neuralnet import activation_functions as act
 from neuralnet import loss_functions as lf
+from neuralnet import initializers as init
+from neuralnet import optimizers as opt
+from neuralnet import schedules as sch
+from neuralnet.data import DataLoader
 
 
 max_num_neurons = 20
@@ -25,6 +30,27 @@ def test_num_layers(inp, hidd, out):
     assert network.layers.size == len([network.num_inputs]) + network.num_hidden.size + len([network.num_outputs])
  
 
+def test_initialization_uses_a_local_generator():
+    "Test that the seed gives the same initial weights without modifying the global random state of NumPy"
+    np.random.seed(5)
+    expected = np.random.rand()
+    np.random.seed(5)
+    first = ann.Ann(num_inputs=4, num_hidden=[3], num_outputs=2, activation_function=act.sigmoid, loss_function=lf.binary_cross_entropy, seed=1)
+    second = ann.Ann(num_inputs=4, num_hidden=[3], num_outputs=2, activation_function=act.sigmoid, loss_function=lf.binary_cross_entropy, seed=1)
+    assert np.random.rand() == expected
+    for i in range(len(first.weights)):
+        assert np.array_equal(first.weights[i], second.weights[i])
+
+
+def test_default_initializers():
+    "Test that by default relu layers use He initialization, the other layers Xavier initialization, and the biases are zero"
+    network = ann.Ann(num_inputs=4, num_hidden=[3, 3], num_outputs=2, activation_function=[act.relu, act.tanh, act.softmax],
+                      loss_function=lf.cross_entropy, seed=1)
+    assert network.weights_initializers == [init.he_uniform, init.xavier_uniform, init.xavier_uniform]
+    assert all(np.all(b == 0) for b in network.biases)
+    assert np.any(network.weights[0] < 0)
+
+
 @given(inp = st.integers(min_value=1, max_value=1e5),
        hidd = st.lists(st.integers(min_value=1, max_value=max_num_neurons), min_size=0, max_size=10),
        out = st.integers(min_value=1, max_value=50)) 
@@ -192,6 +218,78 @@ def test_limit_case_backward_propagation():
     assert np.all(np.isclose(result, expected_result, rtol=0.1, atol=1e-5))
 
 
+def test_elementwise_backprop_equals_jacobian_backprop():
+    "Test that the backpropagation with the elementwise derivative of the sigmoid gives the same result as the one with the full jacobian"
+    neural_network = ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 2,
+                             activation_function = act.sigmoid,
+                             loss_function = lf.binary_cross_entropy,
+                             seed=1)
+    inputs = np.array([[0.1, 0.5, 0.9], [0.7, 0.2, 0.3]])
+    error = np.array([[0.3, -0.2], [-0.5, 0.1]])
+    neural_network._forward_prop(inputs)
+    result = neural_network._backward_prop(error)
+    weights_deriv = [np.copy(w) for w in neural_network.weights_deriv]
+    neural_network.act_funcs_elementwise_deriv = [None, None]
+    expected_result = neural_network._backward_prop(error)
+    assert np.allclose(result, expected_result)
+    for i in range(len(weights_deriv)):
+        assert np.allclose(weights_deriv[i], neural_network.weights_deriv[i])
+
+
+def test_fused_backprop_equals_chain_rule_backprop():
+    "Test that the fused softmax - cross entropy gradient gives the same derivatives as the chain rule with the softmax jacobian"
+    neural_network = ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 3,
+                             activation_function = act.softmax,
+                             loss_function = lf.cross_entropy,
+                             seed=1)
+    assert neural_network.fused_deriv == lf.cross_entropy_softmax_deriv
+    inputs = np.array([[0.1, 0.5, 0.9], [0.7, 0.2, 0.3]])
+    targets = np.array([[0., 1., 0.], [1., 0., 0.]])
+    output = neural_network._forward_prop(inputs)
+    neural_network._backward_prop(neural_network.fused_deriv(output, targets), fused=True)
+    weights_deriv = [np.copy(w) for w in neural_network.weights_deriv]
+    neural_network._backward_prop(neural_network.loss_func_deriv(output, targets))
+    for i in range(len(weights_deriv)):
+        assert np.allclose(weights_deriv[i], neural_network.weights_deriv[i])
+
+
+def test_per_layer_activations_backprop_equals_numerical_gradient():
+    "Test the derivatives of a network with a different activation function in each layer against the finite differences"
+    neural_network = ann.Ann(num_inputs = 3, num_hidden = [4, 4], num_outputs = 3,
+                             activation_function = [act.tanh, act.leaky_relu, act.softmax],
+                             loss_function = lf.cross_entropy,
+                             seed=1)
+    assert neural_network.activation_func == act.softmax
+    assert neural_network.fused_deriv == lf.cross_entropy_softmax_deriv
+    inputs = np.array([[0.1, -0.5, 0.9], [0.7, 0.2, -0.3]])
+    targets = np.array([[0., 1., 0.], [1., 0., 0.]])
+    output = neural_network._forward_prop(inputs)
+    neural_network._backward_prop(neural_network.fused_deriv(output, targets), fused=True)
+    h = 1e-6
+    for i in range(len(neural_network.weights)):
+        numerical = np.zeros(neural_network.weights[i].shape)
+        for index in np.ndindex(numerical.shape):
+            original = neural_network.weights[i][index]
+            neural_network.weights[i][index] = original + h
+            loss_plus = np.mean(lf.cross_entropy(neural_network.predict(inputs), targets, axis=-1))
+            neural_network.weights[i][index] = original - h
+            loss_minus = np.mean(lf.cross_entropy(neural_network.predict(inputs), targets, axis=-1))
+            neural_network.weights[i][index] = original
+            numerical[index] = (loss_plus - loss_minus) / (2 * h)
+        assert np.allclose(neural_network.weights_deriv[i], numerical, atol=1e-6)
+
+
+def test_number_of_activation_functions():
+    "Test that a list of activation functions must have one function for each layer"
+    try:
+        ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 2,
+                activation_function = [act.relu], loss_function = lf.binary_cross_entropy)
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
 @given(inp = st.integers(min_value=1, max_value=1e5),
        hidd = st.lists(st.integers(min_value=1, max_value=max_num_neurons), min_size=0, max_size=10),
        out = st.integers(min_value=1, max_value=20))
@@ -309,7 +407,274 @@ def test_biases_structure_after_gradient (inp, hidd, out, learning_rate):
  
 ##########################################################################################################################
 
-# Test the train method  -> not necessary because it is the collection of methods already tested.
+# Test the train method  -> the single step is the collection of methods already tested, here only the batch mode is tested.
+
+def test_batch_backprop_is_average_of_single_backprops():
+    "Test that the derivatives computed on a batch are the average of the derivatives computed on each input of the batch"
+    neural_network = ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 2,
+                             activation_function = act.softmax,
+                             loss_function = lf.cross_entropy,
+                             seed=1)
+    inputs = np.array([[0.1, 0.5, 0.9], [0.7, 0.2, 0.3], [0.4, 0.4, 0.8]])
+    targets = np.array([[1., 0.], [0., 1.], [1., 0.]])
+    weights_deriv = [np.zeros_like(w) for w in neural_network.weights]
+    biases_deriv = [np.zeros_like(b) for b in neural_network.biases]
+    for single_input, target in zip(inputs, targets):
+        output = neural_network._forward_prop(single_input)
+        neural_network._backward_prop(neural_network.loss_func_deriv(output, target))
+        for i in range(len(weights_deriv)):
+            weights_deriv[i] += neural_network.weights_deriv[i] / len(inputs)
+            biases_deriv[i] += neural_network.biases_deriv[i] / len(inputs)
+    output = neural_network._forward_prop(inputs)
+    neural_network._backward_prop(neural_network.loss_func_deriv(output, targets))
+    for i in range(len(weights_deriv)):
+        assert np.allclose(neural_network.weights_deriv[i], weights_deriv[i])
+        assert np.allclose(neural_network.biases_deriv[i], biases_deriv[i])
+
+
+def test_workspace_training_step_equals_allocating_step():
+    "Test that a step of training written in the workspace buffers gives the same weights and biases of a step without workspace"
+    networks = [ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 2,
+                        activation_function = act.sigmoid,
+                        loss_function = lf.cross_entropy,
+                        seed=1) for i in range(2)]
+    inputs = np.array([[0.1, 0.5, 0.9], [0.7, 0.2, 0.3], [0.4, 0.4, 0.8]])
+    targets = np.array([[1., 0.], [0., 1.], [1., 0.]])
+    networks[0]._allocate_workspace(batch_size=4)
+    buffers = [id(a) for a in networks[0]._linear_comb_buffer + networks[0].weights_deriv + networks[0].biases_deriv]
+    errors = [network._train_batch(inputs, targets, learning_rate=0.1) for network in networks]
+    assert np.isclose(errors[0], errors[1])
+    assert buffers == [id(a) for a in networks[0]._linear_comb_buffer + networks[0].weights_deriv + networks[0].biases_deriv]
+    for i in range(len(networks[0].weights)):
+        assert np.allclose(networks[0].weights[i], networks[1].weights[i])
+        assert np.allclose(networks[0].biases[i], networks[1].biases[i])
+
+
+@given(batch_size = st.integers(min_value=1, max_value=12))
+def test_train_batch_size_returns_finite_error(batch_size):
+    "Test that the training in batch mode works for any batch size, also when it does not divide the number of inputs"
+    neural_network = ann.Ann(num_inputs = 2, num_hidden = [3], num_outputs = 1,
+                             activation_function = act.sigmoid,
+                             loss_function = lf.binary_cross_entropy,
+                             seed=1)
+    inputs = np.linspace(start = -1, stop = 1, num = 20).reshape((10, 2))
+    targets = np.array([0., 1., 0., 1., 1., 0., 0., 1., 1., 0.])
+    error = neural_network.train(inputs, targets, epochs=2, learning_rate=0.1, verbose=False, batch_size=batch_size)
+    assert np.isfinite(error) and error >= 0
+
+
+def test_data_parallel_training_equals_single_process():
+    "Test that the training split among several processes is deterministic and gives the same weights of the training in a single process"
+    inputs = np.linspace(start = -1, stop = 1, num = 60).reshape((20, 3))
+    targets = np.eye(2)[np.arange(20) % 2]
+    networks = [ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 2,
+                        activation_function = act.softmax,
+                        loss_function = lf.cross_entropy,
+                        seed=1) for i in range(3)]
+    errors = [network.train(inputs, targets, epochs=2, learning_rate=0.1, verbose=False, batch_size=8, workers=workers)
+              for network, workers in zip(networks, [2, 2, 1])]
+    assert errors[0] == errors[1]
+    assert np.isclose(errors[0], errors[2])
+    for i in range(len(networks[0].weights)):
+        assert np.array_equal(networks[0].weights[i], networks[1].weights[i])
+        assert np.array_equal(networks[0].biases[i], networks[1].biases[i])
+        assert np.allclose(networks[0].weights[i], networks[2].weights[i])
+        assert np.allclose(networks[0].biases[i], networks[2].biases[i])
+
+
+def test_data_parallel_training_keeps_arrays():
+    "Test that after the training in several processes the network updates the same arrays of weights, biases and derivatives"
+    inputs = np.linspace(start = -1, stop = 1, num = 60).reshape((20, 3))
+    targets = np.eye(2)[np.arange(20) % 2]
+    neural_network = ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 2,
+                             activation_function = act.softmax,
+                             loss_function = lf.cross_entropy,
+                             seed=1)
+    arrays = neural_network.weights + neural_network.biases + neural_network.weights_deriv + neural_network.biases_deriv
+    initial_weights = [np.copy(w) for w in neural_network.weights]
+    neural_network.train(inputs, targets, epochs=2, learning_rate=0.1, verbose=False, batch_size=8, workers=2)
+    after = neural_network.weights + neural_network.biases + neural_network.weights_deriv + neural_network.biases_deriv
+    assert all(a is b for a, b in zip(arrays, after))
+    assert not np.array_equal(neural_network.weights[0], initial_weights[0])
+
+
+def test_gradient_accumulation_equals_large_batch():
+    "Test that accumulating the derivatives of micro-batches gives the same training of the corresponding large batches"
+    inputs = np.linspace(start = -1, stop = 1, num = 60).reshape((20, 3))
+    targets = np.eye(2)[np.arange(20) % 3 % 2]
+    networks = []
+    errors = []
+    for batch_size, accumulation_steps in [(8, 1), (2, 4), (3, 3)]:
+        neural_network = ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 2,
+                                 activation_function = [act.tanh, act.softmax],
+                                 loss_function = lf.cross_entropy,
+                                 seed=1, optimizer=opt.Adam())
+        errors.append(neural_network.train(inputs, targets, epochs=3, learning_rate=0.05, verbose=False,
+                                           batch_size=batch_size, accumulation_steps=accumulation_steps))
+        networks.append(neural_network)
+    assert np.isclose(errors[0], errors[1])
+    assert networks[0].optimizer.steps == networks[1].optimizer.steps == 9
+    for i in range(len(networks[0].weights)):
+        assert np.allclose(networks[0].weights[i], networks[1].weights[i])
+        assert np.allclose(networks[0].biases[i], networks[1].biases[i])
+    # micro-batches of 3 inputs: updates with 9, 9 and 2 inputs (the last one with the batches left)
+    assert networks[2].optimizer.steps == 9
+
+
+def test_training_with_learning_rate_schedule():
+    "Test that a constant schedule gives the same training of the fixed learning rate, and that the schedule receives the epoch errors"
+    inputs = np.linspace(start = -1, stop = 1, num = 60).reshape((20, 3))
+    targets = np.eye(2)[np.arange(20) % 2]
+    networks = [ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 2,
+                        activation_function = act.softmax,
+                        loss_function = lf.cross_entropy,
+                        seed=1) for i in range(3)]
+    plateau = sch.ReduceOnPlateau(0.1, factor=0.5, patience=1, min_delta=1.)
+    errors = [networks[0].train(inputs, targets, epochs=3, learning_rate=0.1, verbose=False, batch_size=4),
+              networks[1].train(inputs, targets, epochs=3, learning_rate=sch.Constant(0.1), verbose=False, batch_size=4),
+              networks[2].train(inputs, targets, epochs=3, learning_rate=plateau, verbose=False, batch_size=4)]
+    assert errors[0] == errors[1]
+    assert np.array_equal(networks[0].weights[0], networks[1].weights[0])
+    assert plateau.learning_rate == 0.1 * 0.5**2
+
+def test_early_stopping_restores_best_parameters():
+    "Test that the training stops after patience evaluations without improvement and restores the parameters with the best validation loss"
+    inputs = np.linspace(start = -1, stop = 1, num = 60).reshape((20, 3))
+    targets = np.eye(2)[np.arange(20) % 2]
+    neural_network = ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 2,
+                             activation_function = act.softmax,
+                             loss_function = lf.cross_entropy,
+                             seed=1)
+    weights = [id(w) for w in neural_network.weights]
+    # a huge min_delta: only the first evaluation is an improvement
+    neural_network.train(inputs, targets, epochs=50, learning_rate=0.5, verbose=False, batch_size=4,
+                         validation=(inputs, targets), validation_interval=2, patience=3, min_delta=1e6)
+    reference = ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 2,
+                        activation_function = act.softmax,
+                        loss_function = lf.cross_entropy,
+                        seed=1)
+    reference.train(inputs, targets, epochs=2, learning_rate=0.5, verbose=False, batch_size=4)
+    assert weights == [id(w) for w in neural_network.weights]
+    for i in range(len(reference.weights)):
+        assert np.array_equal(neural_network.weights[i], reference.weights[i])
+        assert np.array_equal(neural_network.biases[i], reference.biases[i])
+
+
+def test_validation_accuracy_monitor():
+    "Test the validation score with the accuracy, equal to the one of evaluate_classification"
+    inputs = np.linspace(start = -1, stop = 1, num = 60).reshape((20, 3))
+    targets = np.eye(2)[np.arange(20) % 2]
+    neural_network = ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 2,
+                             activation_function = act.softmax,
+                             loss_function = lf.cross_entropy,
+                             seed=1)
+    score = neural_network._validation_score(inputs, targets, 'accuracy', np.empty((20, 2)))
+    predictions_discr, num_correct, percentage = neural_network.evaluate_classification(inputs, targets)
+    assert np.isclose(-score * 100, percentage)
+
+def test_training_from_chunks_equals_training_from_arrays():
+    "Test that streaming the data in chunks of any size gives the same training of the whole arrays"
+    inputs = np.linspace(start = -1, stop = 1, num = 60).reshape((20, 3))
+    targets = np.eye(2)[np.arange(20) % 2]
+    networks = [ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 2,
+                        activation_function = act.softmax,
+                        loss_function = lf.cross_entropy,
+                        seed=1) for i in range(2)]
+    chunks = lambda: ((inputs[start:start+7], targets[start:start+7]) for start in range(0, 20, 7))
+    errors = [networks[0].train(inputs, targets, epochs=3, learning_rate=0.1, verbose=False, batch_size=4),
+              networks[1].train(chunks, None, epochs=3, learning_rate=0.1, verbose=False, batch_size=4)]
+    assert np.isclose(errors[0], errors[1])
+    for i in range(len(networks[0].weights)):
+        assert np.allclose(networks[0].weights[i], networks[1].weights[i])
+        assert np.allclose(networks[0].biases[i], networks[1].biases[i])
+
+
+def test_training_from_memory_mapped_arrays_with_shuffle_buffer():
+    "Test the training on memory-mapped arrays read in shuffled chunks, reproducible for a fixed seed"
+    location = 'training_test_memmap.npy'
+    np.save(location, np.linspace(start = -1, stop = 1, num = 60).reshape((20, 3)))
+    inputs = np.load(location, mmap_mode='r')
+    targets = np.eye(2)[np.arange(20) % 2]
+    weights = []
+    for i in range(2):
+        neural_network = ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 2,
+                                 activation_function = act.softmax,
+                                 loss_function = lf.cross_entropy,
+                                 seed=1)
+        error = neural_network.train(inputs, targets, epochs=3, learning_rate=0.1, verbose=False, batch_size=3, shuffle_buffer=8)
+        weights.append(neural_network.weights)
+    del inputs
+    os.remove(location)
+    
+    assert np.isfinite(error)
+    for i in range(len(weights[0])):
+        assert np.array_equal(weights[0][i], weights[1][i])
+
+def test_shuffled_training_is_reproducible():
+    "Test that the training with shuffling depends only on the seed of the network and does not change the data"
+    inputs = np.linspace(start = -1, stop = 1, num = 60).reshape((20, 3))
+    targets = np.eye(2)[np.arange(20) % 2]
+    original = inputs.copy()
+    networks = [ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 2,
+                        activation_function = act.softmax,
+                        loss_function = lf.cross_entropy,
+                        seed=seed) for seed in [1, 1, None]]
+    networks[2]._set_parameters([np.copy(w) for w in networks[0].weights], [np.copy(b) for b in networks[0].biases])
+    for network in networks:
+        network.train(inputs, targets, epochs=3, learning_rate=0.1, verbose=False, batch_size=3, shuffle=True)
+    unshuffled = ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 2,
+                         activation_function = act.softmax,
+                         loss_function = lf.cross_entropy,
+                         seed=1)
+    unshuffled.train(inputs, targets, epochs=3, learning_rate=0.1, verbose=False, batch_size=3)
+    assert np.array_equal(inputs, original)
+    assert np.array_equal(networks[0].weights[0], networks[1].weights[0])
+    assert not np.array_equal(networks[0].weights[0], networks[2].weights[0])
+    assert not np.array_equal(networks[0].weights[0], unshuffled.weights[0])
+
+
+def test_shuffled_training_with_integer_data():
+    "Test that integer inputs and labels are converted to the type of the network when the shuffled batches are gathered"
+    inputs = np.arange(40).reshape((10, 4)) % 5
+    targets = np.arange(10) % 2
+    networks = [ann.Ann(num_inputs = 4, num_hidden = [3], num_outputs = 1,
+                        activation_function = act.sigmoid,
+                        loss_function = lf.binary_cross_entropy,
+                        seed=1) for _ in range(2)]
+    errors = [networks[0].train(inputs, targets, epochs=2, learning_rate=0.1, verbose=False, batch_size=3, shuffle=True),
+              networks[1].train(inputs.astype(float), targets.astype(float), epochs=2, learning_rate=0.1, verbose=False, batch_size=3, shuffle=True)]
+    assert errors[0] == errors[1]
+    assert np.array_equal(networks[0].weights[0], networks[1].weights[0])
+
+def test_training_with_data_loader():
+    "Test that the training with a data loader without shuffling gives the same result of the training with the arrays"
+    inputs = np.linspace(start = -1, stop = 1, num = 60).reshape((20, 3))
+    labels = np.arange(20) % 2
+    networks = [ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 2,
+                        activation_function = act.softmax,
+                        loss_function = lf.cross_entropy,
+                        seed=1) for i in range(2)]
+    loader = DataLoader(inputs, labels, batch_size=4, shuffle=False, num_classes=2)
+    errors = [networks[0].train(inputs, np.eye(2)[labels], epochs=3, learning_rate=0.1, verbose=False, batch_size=4),
+              networks[1].train(loader, None, epochs=3, learning_rate=0.1, verbose=False)]
+    assert np.isclose(errors[0], errors[1])
+    for i in range(len(networks[0].weights)):
+        assert np.allclose(networks[0].weights[i], networks[1].weights[i])
+
+def test_asynchronous_training_updates_shared_parameters():
+    "Test that the asynchronous training updates in place the weights and biases of the network and reduces the error"
+    neural_network = ann.Ann(num_inputs = 2, num_hidden = [4], num_outputs = 1,
+                             activation_function = act.sigmoid,
+                             loss_function = lf.binary_cross_entropy,
+                             seed=1)
+    inputs = np.array([[0., 0.], [0., 1.], [1., 0.], [1., 1.]] * 10)
+    targets = np.array([0., 1., 1., 1.] * 10)
+    weights = [id(w) for w in neural_network.weights]
+    first_error = neural_network.train_async(inputs, targets, epochs=1, learning_rate=0.1, verbose=False, threads=3)
+    error = neural_network.train_async(inputs, targets, epochs=50, learning_rate=0.1, verbose=False, batch_size=2, threads=3)
+    assert np.isfinite(error) and error < first_error
+    assert weights == [id(w) for w in neural_network.weights]
+    assert neural_network._workspace_size is None
 
 ##########################################################################################################################
 
@@ -357,6 +722,58 @@ def test_predicti_for_multiclass_classification_specific():
     assert np.all(np.isclose(result, expected_result, rtol=0.1, atol=1e-5))
     
     
+def test_batch_predict_equals_forward_propagation():
+    "Test that the batch prediction gives the same result of the forward propagation of each input, without changing the stored activations"
+    neural_network = ann.Ann(num_inputs = 3, num_hidden = [4, 5], num_outputs = 3,
+                             activation_function = act.softmax,
+                             loss_function = lf.cross_entropy,
+                             seed=1)
+    inputs = np.linspace(start = -2, stop = 2, num = 12).reshape((4, 3))
+    activations_before = [np.copy(a) for a in neural_network.activations]
+    result = neural_network.predict(inputs)
+    for i in range(len(activations_before)):
+        assert np.all(neural_network.activations[i] == activations_before[i])
+    for i in range(len(inputs)):
+        assert np.allclose(result[i], neural_network._forward_prop(inputs[i]))
+
+
+@given(out = st.integers(min_value=1, max_value=5))
+def test_predict_one_equals_predict(out):
+    "Test that the prediction of a single input is the row of the batch prediction, also for a single output"
+    neural_network = ann.Ann(num_inputs = 4, num_hidden = [5], num_outputs = out,
+                             activation_function = [act.relu, act.sigmoid],
+                             loss_function = lf.binary_cross_entropy,
+                             seed=1)
+    inputs = np.linspace(-1, 1, 12).reshape((3, 4))
+    expected = neural_network.predict(inputs)
+    for i in range(len(inputs)):
+        result = neural_network.predict_one(inputs[i])
+        assert result.shape == (out,)
+        assert np.allclose(result, expected[i])
+    buffer = np.empty(out)
+    assert neural_network.predict_one(list(inputs[0]), out=buffer) is buffer
+    assert np.allclose(buffer, expected[0])
+    try:
+        neural_network.predict_one(inputs)
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+def test_predict_in_output_buffer():
+    "Test that the predictions are written in the output buffer given by the caller"
+    neural_network = ann.Ann(num_inputs = 2, num_hidden = [3], num_outputs = 1,
+                             activation_function = act.sigmoid,
+                             loss_function = lf.binary_cross_entropy,
+                             seed=1)
+    inputs = np.ones((5, 2))
+    out = np.zeros((5, 1))
+    result = neural_network.predict(inputs, out=out)
+    assert result is out
+    assert np.allclose(out, neural_network.predict(inputs))
+
+
 @given(inp = st.integers(min_value=1, max_value=1e5),
        hidd = st.lists(st.integers(min_value=1, max_value=max_num_neurons), min_size=0, max_size=10),
        len_dataset = st.integers(min_value=1, max_value=100))
@@ -520,3 +937,204 @@ def test_save_and_load():
     for i in range(len(neural_network.layers) - 1):
         assert np.all(neural_network_loaded.weights[i] == neural_network.weights[i])
         
+
+
+def test_save_and_load_per_layer_activations():
+    "Test that saving and loading record the activation function of each layer"
+    neural_network = ann.Ann(num_inputs = 5, num_hidden = [4, 3], num_outputs = 2,
+                             activation_function = [act.relu, act.tanh, act.sigmoid],
+                             loss_function = lf.binary_cross_entropy,
+                             seed=1)
+    location = 'saving_test_activations/'
+    neural_network.save(directory_name = location)
+    neural_network_loaded = ann.Ann.load_neural_network(directory_name = location)
+    shutil.rmtree(location)
+    
+    assert neural_network_loaded.get_activation_functions() == [act.relu, act.tanh, act.sigmoid]
+    inputs = np.linspace(-1, 1, 15).reshape((3, 5))
+    assert np.allclose(neural_network_loaded.predict(inputs), neural_network.predict(inputs))
+
+
+def test_save_and_load_initializers():
+    "Test that the initializers of weights and biases are saved and loaded with the network"
+    neural_network = ann.Ann(num_inputs = 5, num_hidden = [4], num_outputs = 2,
+                             activation_function = [act.relu, act.sigmoid],
+                             loss_function = lf.binary_cross_entropy,
+                             weights_initializer = [init.orthogonal, init.lecun_normal],
+                             biases_initializer = init.uniform,
+                             seed=1)
+    location = 'saving_test_initializers/'
+    neural_network.save(directory_name = location)
+    neural_network_loaded = ann.Ann.load_neural_network(directory_name = location)
+    shutil.rmtree(location)
+    
+    assert neural_network_loaded.weights_initializers == [init.orthogonal, init.lecun_normal]
+    assert neural_network_loaded.biases_initializers == [init.uniform, init.uniform]
+
+
+def test_save_and_load_binary():
+    "Test that the binary format saves and loads exactly weights and biases, and that it is detected when loading"
+    neural_network = ann.Ann(num_inputs = 5, num_hidden = [4, 3], num_outputs = 2, 
+                             activation_function = act.softmax, 
+                             loss_function = lf.cross_entropy,
+                             seed=1)
+    location = 'saving_test_binary/'
+    neural_network.save(directory_name = location, binary = True)
+    json_files_saved = os.path.exists(location + 'weights.json') or os.path.exists(location + 'biases.json')
+    neural_network_loaded = ann.Ann.load_neural_network(directory_name = location)
+    shutil.rmtree(location)
+    
+    assert not json_files_saved
+    assert neural_network_loaded.activation_func == neural_network.activation_func
+    assert np.all(neural_network_loaded.layers == neural_network.layers)
+    for i in range(len(neural_network.layers) - 1):
+        assert np.array_equal(neural_network_loaded.weights[i], neural_network.weights[i])
+        assert np.array_equal(neural_network_loaded.biases[i], neural_network.biases[i])
+
+
+def test_load_memory_mapped():
+    "Test that a network loaded with memory-mapping has read-only weights and gives the same predictions of the saved one"
+    neural_network = ann.Ann(num_inputs = 5, num_hidden = [4], num_outputs = 3, 
+                             activation_function = act.softmax, 
+                             loss_function = lf.cross_entropy,
+                             seed=1)
+    location = 'saving_test_mmap/'
+    neural_network.save(directory_name = location, binary = True)
+    neural_network_loaded = ann.Ann.load_neural_network(directory_name = location, mmap = True)
+    inputs = np.linspace(start = -2, stop = 2, num = 20).reshape((4, 5))
+    predictions = neural_network_loaded.predict(inputs)
+    writeable = [w.flags.writeable for w in neural_network_loaded.weights + neural_network_loaded.biases]
+    del neural_network_loaded
+    shutil.rmtree(location)
+    
+    assert not np.any(writeable)
+    assert np.array_equal(predictions, neural_network.predict(inputs))
+
+
+def test_load_does_not_draw_initial_values():
+    "Test that loading a network uses the saved weights and biases without calling the initializers"
+    shapes = []
+    def counting_initializer(shape, rng, dtype=np.float64):
+        shapes.append(shape)
+        return init.uniform(shape, rng, dtype)
+    init.register(counting_initializer)
+    neural_network = ann.Ann(num_inputs = 5, num_hidden = [4], num_outputs = 3,
+                             activation_function = act.softmax,
+                             loss_function = lf.cross_entropy,
+                             weights_initializer = counting_initializer,
+                             seed=1)
+    location = 'saving_test_no_initialization/'
+    neural_network.save(directory_name = location, binary = True)
+    shapes.clear()
+    for mmap in [True, False]:
+        neural_network_loaded = ann.Ann.load_neural_network(directory_name = location, mmap = mmap)
+        assert neural_network_loaded.weights_initializers == [counting_initializer, counting_initializer]
+        assert np.array_equal(neural_network_loaded.weights[0], neural_network.weights[0])
+    del neural_network_loaded
+    shutil.rmtree(location)
+    del init.registry['counting_initializer']
+    
+    assert shapes == []
+
+
+def test_load_memory_mapped_skips_optimizer_state():
+    "Test that the state of the optimizer is not loaded in memory with memory-mapping, while its hyperparameters are"
+    neural_network = ann.Ann(num_inputs = 5, num_hidden = [4], num_outputs = 3,
+                             activation_function = act.softmax,
+                             loss_function = lf.cross_entropy,
+                             seed=1, optimizer=opt.Adam(beta_1=0.8))
+    inputs = np.linspace(start = -2, stop = 2, num = 20).reshape((4, 5))
+    neural_network.train(inputs, np.eye(3)[[0, 1, 2, 0]], epochs=2, learning_rate=0.1, verbose=False)
+    location = 'saving_test_mmap_optimizer/'
+    neural_network.save(directory_name = location, binary = True)
+    mapped = ann.Ann.load_neural_network(directory_name = location, mmap = True)
+    loaded = ann.Ann.load_neural_network(directory_name = location)
+    optimizers = [mapped.get_optimizer(), loaded.get_optimizer()]
+    del mapped
+    shutil.rmtree(location)
+    
+    assert optimizers[0].name == 'adam' and optimizers[0].beta_1 == 0.8 and optimizers[0].steps == 8
+    assert optimizers[0].state == {}
+    assert len(optimizers[1].state['first_moment']) == 4
+
+
+def test_save_does_not_modify_parameters():
+    "Test that saving (in json and binary format) keeps the same weight and bias arrays, so that views of them stay valid"
+    neural_network = ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 2,
+                             activation_function = act.softmax,
+                             loss_function = lf.cross_entropy,
+                             seed=1)
+    parameters = neural_network.weights + neural_network.biases
+    view = neural_network.weights[0][:, 0]
+    for binary in [False, True]:
+        location = 'saving_test_snapshot/'
+        neural_network.save(directory_name = location, binary = binary)
+        shutil.rmtree(location)
+        assert all(a is b for a, b in zip(parameters, neural_network.weights + neural_network.biases))
+    neural_network.weights[0] += 1
+    assert np.array_equal(view, neural_network.weights[0][:, 0])
+
+
+def test_non_blocking_save_writes_the_snapshot():
+    "Test that a non-blocking save writes the parameters of the moment of the call, also if they change meanwhile"
+    neural_network = ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 2,
+                             activation_function = act.softmax,
+                             loss_function = lf.cross_entropy,
+                             seed=1)
+    weights = [np.copy(w) for w in neural_network.weights]
+    location = 'saving_test_background/'
+    future = neural_network.save(directory_name = location, blocking = False)
+    for w in neural_network.weights:
+        w += 1
+    future.result()
+    neural_network_loaded = ann.Ann.load_neural_network(directory_name = location)
+    shutil.rmtree(location)
+    
+    for i in range(len(weights)):
+        assert np.array_equal(neural_network_loaded.weights[i], weights[i])
+
+def test_save_and_load_optimizer_state():
+    "Test that a loaded network continues the training with the same optimizer and state of the saved one"
+    neural_network = ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 2,
+                             activation_function = act.softmax,
+                             loss_function = lf.cross_entropy,
+                             seed=1, optimizer=opt.Adam(beta_1=0.8))
+    inputs = np.linspace(start = -1, stop = 1, num = 60).reshape((20, 3))
+    targets = np.eye(2)[np.arange(20) % 2]
+    neural_network.train(inputs, targets, epochs=2, learning_rate=0.01, verbose=False, batch_size=4)
+    location = 'saving_test_optimizer/'
+    neural_network.save(directory_name = location, binary = True)
+    neural_network_loaded = ann.Ann.load_neural_network(directory_name = location)
+    shutil.rmtree(location)
+    
+    optimizer = neural_network_loaded.get_optimizer()
+    assert isinstance(optimizer, opt.Adam) and optimizer.beta_1 == 0.8
+    assert optimizer.steps == neural_network.optimizer.steps
+    for network in [neural_network, neural_network_loaded]:
+        network.train(inputs, targets, epochs=1, learning_rate=0.01, verbose=False, batch_size=4)
+    for i in range(len(neural_network.weights)):
+        assert np.array_equal(neural_network.weights[i], neural_network_loaded.weights[i])
+        assert np.array_equal(neural_network.biases[i], neural_network_loaded.biases[i])
+
+def test_float32_training_prediction_and_saving():
+    "Test that a float32 network keeps the float32 type through training, prediction, saving and loading"
+    neural_network = ann.Ann(num_inputs = 4, num_hidden = [5], num_outputs = 3, 
+                             activation_function = act.softmax, 
+                             loss_function = lf.cross_entropy,
+                             seed=1, dtype=np.float32)
+    inputs = np.linspace(start = -2, stop = 2, num = 24).reshape((6, 4))
+    targets = np.eye(3)[[0, 1, 2, 0, 1, 2]]
+    error = neural_network.train(inputs, targets, epochs=3, learning_rate=0.1, verbose=False, batch_size=4)
+    predictions = neural_network.predict(inputs)
+    assert np.isfinite(error)
+    assert predictions.dtype == np.float32
+    for w, b in zip(neural_network.weights, neural_network.biases):
+        assert w.dtype == np.float32 and b.dtype == np.float32
+    
+    for binary in [False, True]:
+        location = 'saving_test_float32/'
+        neural_network.save(directory_name = location, binary = binary)
+        neural_network_loaded = ann.Ann.load_neural_network(directory_name = location)
+        shutil.rmtree(location)
+        assert neural_network_loaded.dtype == np.float32
+        assert np.array_equal(neural_network_loaded.predict(inputs), predictions)
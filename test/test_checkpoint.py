@@ -0,0 +1,86 @@
+import numpy as np
+import shutil
+import os
+
+from neuralnet import ann
+from neuralnet import activation_functions as act
+from neuralnet import loss_functions as lf
+from neuralnet import optimizers as opt
+from neuralnet import schedules as sch
+from neuralnet import checkpoint as ckpt
+from neuralnet.data import DataLoader
+
+
+#Test the checkpoints of the training
+
+inputs = np.linspace(start = -1, stop = 1, num = 60).reshape((20, 3))
+targets = np.eye(2)[np.arange(20) % 2]
+
+
+def train(network, epochs, **kwargs):
+    "Train the network with shuffling, a learning rate schedule and a validation set"
+    return network.train(inputs, targets, epochs=epochs, learning_rate=sch.LinearWarmup(sch.ReduceOnPlateau(0.05, patience=1), 5),
+                         verbose=False, batch_size=3, shuffle=True, validation=(inputs[:6], targets[:6]), **kwargs)
+
+
+def test_resumed_training_is_exact():
+    "Test that a training interrupted and resumed from its checkpoint gives the same result of an uninterrupted one"
+    location = 'checkpoint_test/'
+    uninterrupted = ann.Ann(num_inputs=3, num_hidden=[4], num_outputs=2, activation_function=act.softmax, loss_function=lf.cross_entropy, seed=1, optimizer=opt.Adam())
+    error = train(uninterrupted, epochs=6)
+    interrupted = ann.Ann(num_inputs=3, num_hidden=[4], num_outputs=2, activation_function=act.softmax, loss_function=lf.cross_entropy, seed=1, optimizer=opt.Adam())
+    train(interrupted, epochs=3, checkpoint_dir=location)
+    resumed = ann.Ann(num_inputs=3, num_hidden=[4], num_outputs=2, activation_function=act.softmax, loss_function=lf.cross_entropy, seed=2, optimizer=opt.Adam())
+    resumed_error = train(resumed, epochs=6, resume_from=location)
+    shutil.rmtree(location)
+    
+    assert error == resumed_error
+    assert resumed.optimizer.steps == uninterrupted.optimizer.steps
+    for i in range(len(uninterrupted.weights)):
+        assert np.array_equal(uninterrupted.weights[i], resumed.weights[i])
+        assert np.array_equal(uninterrupted.biases[i], resumed.biases[i])
+
+
+def test_resumed_training_with_data_loader_is_exact():
+    "Test that the random generator of a DataLoader is restored, so the resumed training shuffles the data as the uninterrupted one"
+    location = 'checkpoint_test_loader/'
+    networks = [ann.Ann(num_inputs = 3, num_hidden = [4], num_outputs = 2,
+                        activation_function = act.softmax,
+                        loss_function = lf.cross_entropy,
+                        seed=seed) for seed in [1, 1, 2]]
+    uninterrupted, interrupted, resumed = networks
+    error = uninterrupted.train(DataLoader(inputs, targets, 8, seed=1), None, epochs=6, learning_rate=0.1, verbose=False)
+    interrupted.train(DataLoader(inputs, targets, 8, seed=1), None, epochs=3, learning_rate=0.1, verbose=False, checkpoint_dir=location)
+    resumed_error = resumed.train(DataLoader(inputs, targets, 8, seed=1), None, epochs=6, learning_rate=0.1, verbose=False, resume_from=location)
+    shutil.rmtree(location)
+    
+    assert error == resumed_error
+    for i in range(len(uninterrupted.weights)):
+        assert np.array_equal(uninterrupted.weights[i], resumed.weights[i])
+        assert np.array_equal(uninterrupted.biases[i], resumed.biases[i])
+
+
+def test_checkpoint_directory():
+    "Test that only the last checkpoints are kept, the latest one is recorded and it can be loaded as a network"
+    location = 'checkpoint_test_directory/'
+    neural_network = ann.Ann(num_inputs=3, num_hidden=[4], num_outputs=2, activation_function=act.softmax, loss_function=lf.cross_entropy, seed=1, optimizer=opt.Adam())
+    train(neural_network, epochs=5, checkpoint_dir=location, checkpoint_interval=2)
+    names = sorted(os.listdir(location))
+    latest = ckpt.latest_checkpoint(location)
+    loaded = ann.Ann.load_neural_network(latest)
+    shutil.rmtree(location)
+    
+    assert names == ['epoch_2', 'epoch_4', 'latest']
+    assert latest == location + 'epoch_4/'
+    assert isinstance(loaded.optimizer, opt.Adam)
+
+
+def test_resume_without_checkpoint():
+    "Test that resuming from a directory without checkpoints raises ValueError"
+    neural_network = ann.Ann(num_inputs=3, num_hidden=[4], num_outputs=2, activation_function=act.softmax, loss_function=lf.cross_entropy, seed=1, optimizer=opt.Adam())
+    try:
+        train(neural_network, epochs=2, resume_from='missing_checkpoint_directory/')
+    except ValueError:
+        pass
+    else:
+        assert False
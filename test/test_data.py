@@ -0,0 +1,176 @@
+import numpy as np
+from hypothesis import given
+import hypothesis.strategies as st
+
+from neuralnet import data
+
+
+#Test the stream of batches
+
+def make_dataset(n):
+    "Return inputs (n, 3) and targets (n, 1) such that each row can be recognized by its first input"
+    inputs = np.arange(3 * n, dtype=float).reshape((n, 3))
+    targets = inputs[:, :1] / 3
+    return inputs, targets
+
+
+@given(n = st.integers(min_value=1, max_value=50),
+       chunk_size = st.integers(min_value=1, max_value=20),
+       batch_size = st.integers(min_value=1, max_value=20))
+def test_batches_without_shuffling_follow_the_data(n, chunk_size, batch_size):
+    "Test that the batches have the given size, whatever the size of the chunks, and follow the order of the data"
+    inputs, targets = make_dataset(n)
+    stream = data.BatchStream(lambda: data.array_chunks(inputs, targets, chunk_size), batch_size, 3, 1)
+    batches = [(x.copy(), y.copy()) for x, y in stream]
+    assert all(len(x) == batch_size for x, y in batches[:-1])
+    assert np.array_equal(np.concatenate([x for x, y in batches]), inputs)
+    assert np.array_equal(np.concatenate([y for x, y in batches]), targets)
+
+
+@given(n = st.integers(min_value=1, max_value=50),
+       shuffle_buffer = st.integers(min_value=1, max_value=30),
+       batch_size = st.integers(min_value=1, max_value=10))
+def test_shuffled_batches_are_a_permutation_within_the_buffer(n, shuffle_buffer, batch_size):
+    "Test that the shuffled stream gives each row once, with inputs and targets together, and moves rows only inside a buffer"
+    inputs, targets = make_dataset(n)
+    stream = data.BatchStream(list(data.array_chunks(inputs, targets, 7)), batch_size, 3, 1,
+                              shuffle_buffer=shuffle_buffer, rng=np.random.default_rng(0))
+    batches = [(x.copy(), y.copy()) for x, y in stream]
+    rows = np.concatenate([x[:, 0] for x, y in batches]) / 3
+    capacity = -(-max(shuffle_buffer, batch_size) // batch_size) * batch_size
+    assert np.array_equal(np.sort(rows), np.arange(n))
+    assert np.all(rows // capacity == np.arange(n) // capacity)
+    assert np.array_equal(np.concatenate([y[:, 0] for x, y in batches]), rows)
+
+
+def test_shuffling_is_reproducible():
+    "Test that two streams with generators with the same seed give the same batches, and that a new epoch has a new order"
+    inputs, targets = make_dataset(40)
+    streams = [data.BatchStream([(inputs, targets)], 4, 3, 1, shuffle_buffer=40, rng=np.random.default_rng(3)) for i in range(2)]
+    first = [np.concatenate([x.copy() for x, y in stream]) for stream in streams]
+    second = np.concatenate([x.copy() for x, y in streams[0]])
+    assert np.array_equal(first[0], first[1])
+    assert not np.array_equal(first[0], second)
+
+
+def test_chunks_with_type_conversion():
+    "Test that chunks of lists and one-dimensional targets are converted to batches with the type of the stream"
+    chunks = [([[1, 2], [3, 4]], [0, 1]), ([[5, 6]], [1])]
+    batches = list((x.copy(), y.copy()) for x, y in data.BatchStream(chunks, 3, 2, 1, dtype=np.float32))
+    assert len(batches) == 1
+    assert batches[0][0].dtype == np.float32
+    assert np.array_equal(batches[0][0], [[1, 2], [3, 4], [5, 6]])
+    assert np.array_equal(batches[0][1], [[0], [1], [1]])
+
+
+def test_generator_can_be_used_for_one_epoch():
+    "Test that a generator of chunks is streamed once, and a second epoch raises ValueError"
+    inputs, targets = make_dataset(10)
+    stream = data.BatchStream(data.array_chunks(inputs, targets, 3), 5, 3, 1)
+    assert len(list(stream)) == 2
+    try:
+        list(stream)
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+#Test the shuffled batches of arrays
+
+@given(n = st.integers(min_value=1, max_value=50),
+       batch_size = st.integers(min_value=1, max_value=20))
+def test_shuffled_arrays_are_a_permutation_of_the_data(n, batch_size):
+    "Test that each epoch gives every row once, with inputs and targets together, in reusable buffers and without changing the data"
+    inputs, targets = make_dataset(n)
+    original = inputs.copy()
+    batches = data.ShuffledArrays(inputs, targets, batch_size, rng=np.random.default_rng(0))
+    for epoch in range(2):
+        rows = np.concatenate([np.hstack((x, y)) for x, y in batches])
+        assert np.array_equal(rows[np.argsort(rows[:, 0])], np.hstack((inputs, targets)))
+    assert all(x.base is batches._inputs or x is batches._inputs for x, y in batches)
+    assert np.array_equal(inputs, original)
+
+
+def test_shuffled_arrays_change_order_each_epoch():
+    "Test that the order changes at each epoch and it is reproducible with the seed of the generator"
+    inputs, targets = make_dataset(30)
+    streams = [data.ShuffledArrays(inputs, targets, 4, rng=np.random.default_rng(2)) for i in range(2)]
+    epochs = [[np.concatenate([x.copy() for x, y in stream]) for epoch in range(2)] for stream in streams]
+    assert np.array_equal(epochs[0][1], epochs[1][1])
+    assert not np.array_equal(epochs[0][0], epochs[0][1])
+
+
+#Test the one-hot encoding
+
+@given(labels = st.lists(st.integers(min_value=0, max_value=9), min_size=1, max_size=50))
+def test_one_hot(labels):
+    "Test that each row of the one-hot encoding has a single one, in the column of the label"
+    encoded = data.one_hot(labels, 10)
+    assert encoded.shape == (len(labels), 10)
+    assert np.array_equal(np.sum(encoded, axis=1), np.ones(len(labels)))
+    assert np.array_equal(np.argmax(encoded, axis=1), labels)
+
+
+#Test the data loader
+
+@given(n = st.integers(min_value=1, max_value=50),
+       batch_size = st.integers(min_value=1, max_value=20),
+       prefetch = st.integers(min_value=0, max_value=3))
+def test_loader_without_shuffling_follows_the_data(n, batch_size, prefetch):
+    "Test that the loader gives all the batches in the order of the data, whatever the number of prefetched batches"
+    inputs, targets = make_dataset(n)
+    loader = data.DataLoader(inputs, targets, batch_size, shuffle=False, prefetch=prefetch)
+    batches = [(x.copy(), y.copy()) for x, y in loader]
+    assert len(batches) == len(loader)
+    assert np.array_equal(np.concatenate([x for x, y in batches]), inputs)
+    assert np.array_equal(np.concatenate([y for x, y in batches]), targets)
+
+
+def test_loader_reshuffles_each_epoch():
+    "Test that each epoch is a different permutation of the data, reproducible with the seed, with inputs and targets together"
+    inputs, targets = make_dataset(30)
+    loaders = [data.DataLoader(inputs, targets, 4, seed=5) for i in range(2)]
+    epochs = [[np.concatenate([np.hstack((x, y)) for x, y in loader]) for epoch in range(2)] for loader in loaders]
+    assert np.array_equal(epochs[0][0], epochs[1][0])
+    assert np.array_equal(epochs[0][1], epochs[1][1])
+    assert not np.array_equal(epochs[0][0], epochs[0][1])
+    for epoch in epochs[0]:
+        assert np.array_equal(epoch[np.argsort(epoch[:, 0])], np.hstack((inputs, targets)))
+
+
+def test_loader_buffers_are_reused():
+    "Test that the batches are written in the same preallocated buffers, cast to the type of the loader and one-hot encoded"
+    inputs = np.arange(20).reshape((10, 2))
+    labels = np.arange(10) % 3
+    loader = data.DataLoader(inputs, labels, 3, num_classes=3, prefetch=1, dtype=np.float32)
+    buffers = set()
+    for epoch in range(2):
+        for x, y in loader:
+            buffers.add(id(x.base) if x.base is not None else id(x))
+            assert x.dtype == np.float32 and y.dtype == np.float32
+            assert np.array_equal(np.argmax(y, axis=1), (x[:, 0] // 2) % 3)
+    assert buffers <= set(id(b[0]) for b in loader._buffers)
+
+
+def test_loader_with_integer_inputs():
+    "Test that integer inputs and targets (e.g. pixels) are cast to the type of the loader when the shuffled batches are gathered"
+    for dtype in [np.uint8, np.int64]:
+        inputs = (np.arange(24).reshape((12, 2)) % 7).astype(dtype)
+        targets = np.arange(12).reshape((12, 1)) % 2
+        loader = data.DataLoader(inputs, targets, 4, seed=1)
+        batches = [np.hstack((x, y)) for x, y in loader]
+        for batch in batches:
+            assert batch.dtype == np.float64
+        epoch = np.concatenate(batches)
+        expected = np.hstack((inputs, targets))
+        assert np.array_equal(epoch[np.lexsort(epoch.T)], expected[np.lexsort(expected.T)])
+
+
+def test_interrupted_epoch_stops_the_background_thread():
+    "Test that an epoch can be interrupted and a new one started"
+    inputs, targets = make_dataset(30)
+    loader = data.DataLoader(inputs, targets, 2, prefetch=1)
+    for x, y in loader:
+        break
+    assert sum(len(x) for x, y in loader) == 30
@@ -0,0 +1,90 @@
+import numpy as np
+import pickle
+from hypothesis import given
+import hypothesis.strategies as st
+
+from neuralnet import ann
+from neuralnet import activation_functions as act
+from neuralnet import loss_functions as lf
+
+
+#Test the compiled predictor
+
+@given(batch_sizes = st.lists(st.integers(1, 20), min_size=1, max_size=5))
+def test_predictor_equals_network_predict(batch_sizes):
+    "Test that the predictor gives the predictions of the network for batches of any size, reusing its buffers"
+    network = ann.Ann(num_inputs=4, num_hidden=[6, 5], num_outputs=3, activation_function=[act.relu, act.tanh, act.softmax],
+                      loss_function=lf.cross_entropy, seed=1)
+    predictor = network.freeze()
+    for rows in batch_sizes:
+        inputs = np.linspace(-1, 1, rows * 4).reshape((rows, 4))
+        assert np.allclose(predictor.predict(inputs), network.predict(inputs))
+
+
+def test_predictor_output_buffer_and_input_conversion():
+    "Test that the predictions can be written in a given buffer, and that inputs of another type are converted"
+    network = ann.Ann(num_inputs=4, num_hidden=[6, 5], num_outputs=3, activation_function=[act.relu, act.tanh, act.softmax],
+                      loss_function=lf.cross_entropy, seed=1, dtype=np.float32)
+    predictor = network.compile_inference()
+    inputs = np.arange(12).reshape((3, 4))
+    out = np.empty((3, 3), dtype=np.float32)
+    result = predictor(inputs, out=out)
+    assert result is out
+    assert np.allclose(result, network.predict(inputs))
+    try:
+        predictor.predict(np.zeros((3, 5)))
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+def test_predictor_is_immutable_and_independent_of_training():
+    "Test that the predictor cannot be modified and keeps its predictions when the network is trained"
+    network = ann.Ann(num_inputs=4, num_hidden=[6, 5], num_outputs=3, activation_function=[act.relu, act.tanh, act.softmax],
+                      loss_function=lf.cross_entropy, seed=1)
+    predictor = network.freeze()
+    inputs = np.linspace(-1, 1, 20).reshape((5, 4))
+    expected = predictor.predict(inputs)
+    network.train(inputs, np.eye(3)[[0, 1, 2, 0, 1]], epochs=3, learning_rate=0.5, verbose=False)
+    assert np.array_equal(predictor.predict(inputs), expected)
+    try:
+        predictor.num_inputs = 5
+    except AttributeError:
+        pass
+    else:
+        assert False
+    assert not hasattr(predictor, '__dict__')
+
+
+def test_pickled_predictor():
+    "Test that a pickled predictor gives the same predictions, and that its size is about the one of weights and biases"
+    network = ann.Ann(num_inputs=4, num_hidden=[6, 5], num_outputs=3, activation_function=[act.relu, act.tanh, act.softmax],
+                      loss_function=lf.cross_entropy, seed=1)
+    predictor = network.freeze()
+    inputs = np.linspace(-1, 1, 400).reshape((100, 4))
+    expected = predictor.predict(inputs)
+    data = pickle.dumps(predictor)
+    loaded = pickle.loads(data)
+    assert np.array_equal(loaded.predict(inputs), expected)
+    assert np.array_equal(predictor.copy().predict(inputs), expected)
+    parameters_size = sum(w.nbytes + b.nbytes for w, b in zip(network.weights, network.biases))
+    assert len(data) < parameters_size + 2000
+
+
+def test_predictor_predict_one():
+    "Test that the prediction of a single input is the row of the batch prediction"
+    network = ann.Ann(num_inputs=4, num_hidden=[6, 5], num_outputs=3, activation_function=[act.relu, act.tanh, act.softmax],
+                      loss_function=lf.cross_entropy, seed=1, dtype=np.float32)
+    predictor = network.freeze()
+    inputs = np.linspace(-1, 1, 12).reshape((3, 4))
+    expected = predictor.predict(inputs)
+    for i in range(len(inputs)):
+        assert np.allclose(predictor.predict_one(inputs[i]), expected[i])
+        assert np.allclose(predictor.predict_one(inputs[i].astype(np.float32)), expected[i])
+    try:
+        predictor.predict_one(np.zeros(3, dtype=np.float32))
+    except ValueError:
+        pass
+    else:
+        assert False
@@ -0,0 +1,64 @@
+import numpy as np
+from hypothesis import given
+import hypothesis.strategies as st
+
+from neuralnet import initializers as init
+
+
+#Test the initializers of weights and biases
+
+@given(rows = st.integers(1, 40), columns = st.integers(1, 40), seed = st.integers(0, 100))
+def test_uniform_initializers_are_within_limits(rows, columns, seed):
+    "Test that the uniform Xavier, He and LeCun initializers draw values within their limits"
+    rng = np.random.default_rng(seed)
+    limits = {init.xavier_uniform : np.sqrt(6 / (rows + columns)),
+              init.he_uniform : np.sqrt(6 / rows),
+              init.lecun_uniform : np.sqrt(3 / rows)}
+    for initializer, limit in limits.items():
+        weights = initializer((rows, columns), rng)
+        assert weights.shape == (rows, columns)
+        assert np.all(np.abs(weights) <= limit)
+
+
+def test_normal_initializers_standard_deviation():
+    "Test the standard deviation of the normal Xavier, He and LeCun initializers on a large matrix"
+    rng = np.random.default_rng(0)
+    rows, columns = 400, 200
+    deviations = {init.xavier_normal : np.sqrt(2 / (rows + columns)),
+                  init.he_normal : np.sqrt(2 / rows),
+                  init.lecun_normal : np.sqrt(1 / rows)}
+    for initializer, deviation in deviations.items():
+        weights = initializer((rows, columns), rng)
+        assert np.isclose(np.std(weights), deviation, rtol=0.02)
+        assert abs(np.mean(weights)) < deviation / 20
+
+
+@given(rows = st.integers(1, 30), columns = st.integers(1, 30))
+def test_orthogonal_initializer(rows, columns):
+    "Test that the orthogonal initializer gives orthonormal rows or columns, whichever are fewer"
+    weights = init.orthogonal((rows, columns), np.random.default_rng(1))
+    assert weights.shape == (rows, columns)
+    if rows >= columns:
+        assert np.allclose(weights.T @ weights, np.eye(columns))
+    else:
+        assert np.allclose(weights @ weights.T, np.eye(rows))
+
+
+def test_orthogonal_initializer_needs_a_matrix():
+    "Test that the orthogonal initializer cannot be used for a vector of biases"
+    try:
+        init.orthogonal((5,), np.random.default_rng(1))
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+def test_initializers_keep_dtype_and_use_the_given_generator():
+    "Test that the initializers return the requested type and that the same generator state gives the same values"
+    for name, initializer in init.registry.items():
+        first = initializer((6, 4), np.random.default_rng(3), np.float32)
+        second = initializer((6, 4), np.random.default_rng(3), np.float32)
+        assert first.dtype == np.float32
+        assert np.array_equal(first, second)
+    assert np.all(init.zeros((4,), np.random.default_rng(3)) == 0)
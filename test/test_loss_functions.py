@@ -5,6 +5,7 @@ from hypothesis.strategies import data
 import hypothesis.strategies as st
 
 from neuralnet import loss_functions as lf
+from neuralnet import activation_functions as act
 
 
 #Test the loss functions
@@ -203,3 +204,64 @@ def test_inf_values_cross_entropy_deriv(data):
     assert np.all(result > -np.inf) and np.all(result < np.inf)
 
 
+    # batch evaluation
+
+
+@given(data())
+def test_loss_functions_per_sample(data):
+    "Test that, with axis=-1, the loss functions give the loss of each input of the batch"
+    batch = data.draw(st.integers(min_value=1, max_value=10))
+    dim = data.draw(st.integers(min_value=1, max_value=10))
+    target = np.array(data.draw(st.lists(st.sampled_from(target_values), min_size=batch*dim, max_size=batch*dim))).reshape((batch, dim))
+    prediction = np.array(data.draw(st.lists(st.floats(min_value=0., max_value=1.), min_size=batch*dim, max_size=batch*dim))).reshape((batch, dim))
+    for loss in [lf.binary_cross_entropy, lf.cross_entropy]:
+        out = np.empty(batch)
+        result = loss(prediction, target, axis=-1, out=out)
+        assert result is out
+        for i in range(batch):
+            assert np.isclose(result[i], np.sum(loss(prediction[i], target[i])))
+ 
+
+def test_loss_derivatives_in_output_buffer():
+    "Test that the derivatives of the loss functions are stored in the output buffer given by the caller"
+    target = np.array([[1., 0.], [0., 1.]])
+    prediction = np.array([[0.7, 0.3], [0.4, 0.6]])
+    for deriv in [lf.binary_cross_entropy_deriv, lf.cross_entropy_deriv, lf.cross_entropy_softmax_deriv]:
+        out = np.empty_like(prediction)
+        assert deriv(prediction, target, out=out) is out
+        assert np.all(out == deriv(prediction, target))
+
+
+    # fused derivatives
+
+
+@given(data())
+def test_cross_entropy_softmax_deriv_equals_chain_rule(data):
+    "Test that the fused derivative is the product between the cross entropy derivative and the softmax jacobian"
+    dim = data.draw(st.integers(min_value=2, max_value=20))
+    # one-hot target: the sum of its elements must be one for the closed form to hold
+    target = np.zeros(dim)
+    target[data.draw(st.integers(min_value=0, max_value=dim-1))] = 1.
+    x = np.array(data.draw(st.lists(st.floats(min_value=-10, max_value=10), min_size=dim, max_size=dim)))
+    prediction = act.softmax(x)
+    chain_rule = np.dot(lf.cross_entropy_deriv(prediction, target), act.deriv_softmax(x))
+    assert np.all(np.isclose(lf.cross_entropy_softmax_deriv(prediction, target), chain_rule, atol=1e-6))
+
+
+@given(target = st.integers(min_value=0, max_value=1),
+       x = st.floats(min_value=-10, max_value=10))
+def test_binary_cross_entropy_sigmoid_deriv_equals_chain_rule(target, x):
+    "Test that the fused derivative is the product between the binary cross entropy derivative and the sigmoid derivative"
+    prediction = act.sigmoid(x)
+    chain_rule = lf.binary_cross_entropy_deriv(prediction, target) * act.deriv_sigmoid_elementwise(x)
+    assert np.abs(lf.binary_cross_entropy_sigmoid_deriv(prediction, target) - chain_rule) < 1e-6
+
+
+def test_loss_functions_float32_limit_cases():
+    "Test that in float32 the clipping of the prediction avoids inf values when the prediction is equal to 0 or 1"
+    prediction = np.array([0., 1.], dtype=np.float32)
+    target = np.array([1., 0.], dtype=np.float32)
+    assert np.all(np.isfinite(lf.binary_cross_entropy(prediction, target)))
+    assert np.all(np.isfinite(lf.binary_cross_entropy_deriv(prediction, target)))
+    assert np.isfinite(lf.cross_entropy(prediction, target))
+    assert np.all(np.isfinite(lf.cross_entropy_deriv(prediction, target)))
@@ -0,0 +1,90 @@
+import numpy as np
+import hypothesis.strategies as st
+from hypothesis import given, settings
+
+from neuralnet import ann
+from neuralnet import activation_functions as act
+from neuralnet import loss_functions as lf
+from neuralnet import metrics
+
+
+#Test the classification metrics
+
+@given(num_outputs = st.sampled_from([1, 3]),
+       rows = st.integers(1, 50),
+       chunk_size = st.integers(1, 20),
+       workers = st.integers(1, 3))
+@settings(max_examples = 20, deadline = None)
+def test_metrics_do_not_depend_on_chunks(num_outputs, rows, chunk_size, workers):
+    "Test that the metrics are the same for any chunk size and number of threads"
+    activation_function, loss_function = (act.sigmoid, lf.binary_cross_entropy) if num_outputs == 1 else (act.softmax, lf.cross_entropy)
+    network = ann.Ann(num_inputs=4, num_hidden=[5], num_outputs=num_outputs, activation_function=activation_function, loss_function=loss_function, seed=1)
+    rng = np.random.default_rng(0)
+    inputs = rng.uniform(-1, 1, size=(rows, 4))
+    targets = rng.integers(0, 2, size=(rows, 1)).astype(float) if num_outputs == 1 else np.eye(3)[rng.integers(0, 3, size=rows)]
+    reference = network.evaluate_metrics(inputs, targets, chunk_size=rows, workers=1)
+    result = network.evaluate_metrics(inputs, targets, chunk_size=chunk_size, workers=workers)
+    assert np.array_equal(result.confusion_matrix, reference.confusion_matrix)
+    assert np.isclose(result.log_loss, reference.log_loss)
+    assert result.num_samples == rows
+
+
+def test_metrics_agree_with_direct_evaluation():
+    "Test the metrics against the ones computed on all the predictions together"
+    network = ann.Ann(num_inputs=4, num_hidden=[5], num_outputs=3, activation_function=act.softmax, loss_function=lf.cross_entropy, seed=1)
+    rng = np.random.default_rng(0)
+    inputs = rng.uniform(-1, 1, size=(40, 4))
+    targets = np.eye(3)[rng.integers(0, 3, size=40)]
+    result = network.evaluate_metrics(inputs, targets, chunk_size=7, workers=2, top_k=(1, 2, 3))
+    predictions = network.predict(inputs)
+    labels = np.argmax(targets, axis=1)
+    predicted = np.argmax(predictions, axis=1)
+    assert np.sum(result.confusion_matrix) == 40
+    for i in range(3):
+        for j in range(3):
+            assert result.confusion_matrix[i, j] == np.sum((labels == i) & (predicted == j))
+    assert np.isclose(result.accuracy, np.mean(labels == predicted))
+    assert np.isclose(result.log_loss, np.mean(lf.cross_entropy(predictions, targets, axis=-1)))
+    assert result.top_k_accuracy[1] == result.accuracy
+    assert result.top_k_accuracy[1] <= result.top_k_accuracy[2] <= result.top_k_accuracy[3] == 1.
+    for i in range(3):
+        true_positives = np.sum((labels == i) & (predicted == i))
+        if np.sum(predicted == i) > 0:
+            assert np.isclose(result.precision[i], true_positives / np.sum(predicted == i))
+        if np.sum(labels == i) > 0:
+            assert np.isclose(result.recall[i], true_positives / np.sum(labels == i))
+
+
+def test_integer_labels():
+    "Test that integer labels give the same metrics of one-hot targets"
+    network = ann.Ann(num_inputs=4, num_hidden=[5], num_outputs=3, activation_function=act.softmax, loss_function=lf.cross_entropy, seed=1)
+    rng = np.random.default_rng(0)
+    inputs = rng.uniform(-1, 1, size=(30, 4))
+    targets = np.eye(3)[rng.integers(0, 3, size=30)]
+    one_hot = network.evaluate_metrics(inputs, targets, chunk_size=8)
+    labels = network.evaluate_metrics(inputs, np.argmax(targets, axis=1), chunk_size=8)
+    assert np.array_equal(one_hot.confusion_matrix, labels.confusion_matrix)
+    assert np.isclose(one_hot.log_loss, labels.log_loss)
+
+
+def test_perfect_classification():
+    "Test precision, recall and F1 equal to 1 when all the predictions are correct"
+    network = ann.Ann(num_inputs=4, num_hidden=[5], num_outputs=1, activation_function=act.sigmoid, loss_function=lf.binary_cross_entropy, seed=1)
+    inputs = np.random.default_rng(0).uniform(-1, 1, size=(25, 4))
+    targets = (network.predict(inputs) > 0.5).astype(float)
+    result = metrics.evaluate_classification_metrics(network, inputs, targets, chunk_size=4)
+    assert result.accuracy == 1.
+    for i in range(2):
+        if np.sum(targets == i) > 0:
+            assert result.precision[i] == result.recall[i] == result.f1[i] == 1.
+
+
+def test_metrics_without_data():
+    "Test that the metrics of an empty dataset raise ValueError"
+    network = ann.Ann(num_inputs=4, num_hidden=[5], num_outputs=3, activation_function=act.softmax, loss_function=lf.cross_entropy, seed=1)
+    try:
+        network.evaluate_metrics(np.zeros((0, 4)), np.zeros((0, 3)))
+    except ValueError:
+        pass
+    else:
+        assert False
@@ -0,0 +1,111 @@
+import numpy as np
+from hypothesis import given
+import hypothesis.strategies as st
+
+from neuralnet import optimizers as opt
+
+
+#Test the optimizers against a direct implementation of their update rules
+
+def make_problem(seed):
+    "Return parameters (a matrix and a vector) and a sequence of derivatives for them"
+    rng = np.random.default_rng(seed)
+    parameters = [rng.normal(size=(3, 2)), rng.normal(size=2)]
+    derivatives = [[rng.normal(size=(3, 2)), rng.normal(size=2)] for step in range(5)]
+    return parameters, derivatives
+
+
+def run(optimizer, parameters, derivatives, learning_rate):
+    "Apply the optimizer to a copy of the parameters for each step of derivatives"
+    parameters = [np.copy(p) for p in parameters]
+    for step in derivatives:
+        optimizer.step(parameters, step, learning_rate)
+    return parameters
+
+
+@given(seed = st.integers(min_value=0, max_value=1000),
+       learning_rate = st.floats(min_value=1e-3, max_value=1.))
+def test_sgd(seed, learning_rate):
+    "Test the stochastic gradient descendent: w = w - learning_rate * dw"
+    parameters, derivatives = make_problem(seed)
+    result = run(opt.SGD(), parameters, derivatives, learning_rate)
+    for i in range(len(parameters)):
+        assert np.allclose(result[i], parameters[i] - learning_rate * sum(step[i] for step in derivatives))
+
+
+@given(seed = st.integers(min_value=0, max_value=1000),
+       momentum = st.floats(min_value=0., max_value=0.99))
+def test_momentum(seed, momentum):
+    "Test the gradient descendent with momentum"
+    parameters, derivatives = make_problem(seed)
+    result = run(opt.Momentum(momentum=momentum), parameters, derivatives, 0.1)
+    for i in range(len(parameters)):
+        w, v = np.copy(parameters[i]), np.zeros_like(parameters[i])
+        for step in derivatives:
+            v = momentum * v - 0.1 * step[i]
+            w = w + v
+        assert np.allclose(result[i], w)
+
+
+@given(seed = st.integers(min_value=0, max_value=1000),
+       momentum = st.floats(min_value=0., max_value=0.99))
+def test_nesterov(seed, momentum):
+    "Test the Nesterov accelerated gradient"
+    parameters, derivatives = make_problem(seed)
+    result = run(opt.Nesterov(momentum=momentum), parameters, derivatives, 0.1)
+    for i in range(len(parameters)):
+        w, v = np.copy(parameters[i]), np.zeros_like(parameters[i])
+        for step in derivatives:
+            v = momentum * v - 0.1 * step[i]
+            w = w + momentum * v - 0.1 * step[i]
+        assert np.allclose(result[i], w)
+
+
+@given(seed = st.integers(min_value=0, max_value=1000))
+def test_rmsprop(seed):
+    "Test RMSProp"
+    parameters, derivatives = make_problem(seed)
+    result = run(opt.RMSProp(decay=0.8), parameters, derivatives, 0.01)
+    for i in range(len(parameters)):
+        w, s = np.copy(parameters[i]), np.zeros_like(parameters[i])
+        for step in derivatives:
+            s = 0.8 * s + 0.2 * step[i]**2
+            w = w - 0.01 * step[i] / (np.sqrt(s) + 1e-8)
+        assert np.allclose(result[i], w)
+
+
+@given(seed = st.integers(min_value=0, max_value=1000))
+def test_adam(seed):
+    "Test Adam, with the bias correction of the moments"
+    parameters, derivatives = make_problem(seed)
+    result = run(opt.Adam(), parameters, derivatives, 0.01)
+    for i in range(len(parameters)):
+        w, m, v = np.copy(parameters[i]), np.zeros_like(parameters[i]), np.zeros_like(parameters[i])
+        for t, step in enumerate(derivatives, start=1):
+            m = 0.9 * m + 0.1 * step[i]
+            v = 0.999 * v + 0.001 * step[i]**2
+            w = w - 0.01 * (m / (1 - 0.9**t)) / (np.sqrt(v / (1 - 0.999**t)) + 1e-8)
+        assert np.allclose(result[i], w)
+
+
+def test_state_is_updated_in_place():
+    "Test that the state arrays are allocated once, with the shape and type of the parameters, and that the parameters are updated in place"
+    parameters = [np.ones((3, 2), dtype=np.float32), np.ones(2, dtype=np.float32)]
+    optimizer = opt.Adam()
+    optimizer.step(parameters, [np.ones((3, 2)), np.ones(2)], 0.1)
+    state = [id(a) for slot in optimizer.slots for a in optimizer.state[slot]]
+    ids = [id(p) for p in parameters]
+    optimizer.step(parameters, [np.ones((3, 2)), np.ones(2)], 0.1)
+    assert state == [id(a) for slot in optimizer.slots for a in optimizer.state[slot]]
+    assert ids == [id(p) for p in parameters]
+    assert all(a.shape == p.shape and a.dtype == np.float32 for a, p in zip(optimizer.state['first_moment'], parameters))
+    assert optimizer.steps == 2
+
+
+def test_optimizers_minimize_a_quadratic_function():
+    "Test that every optimizer reduces f(w) = |w|^2, whose derivative is 2w"
+    for optimizer in [opt.SGD(), opt.Momentum(), opt.Nesterov(), opt.RMSProp(), opt.Adam()]:
+        w = np.array([1., -2., 3.])
+        for step in range(100):
+            optimizer.step([w], [2 * w], 0.05)
+        assert np.sum(w**2) < 0.1 * 14
@@ -0,0 +1,53 @@
+import numpy as np
+from hypothesis import given
+import hypothesis.strategies as st
+
+from neuralnet import schedules as sch
+
+
+#Test the learning rate schedules
+
+@given(epoch = st.integers(min_value=0, max_value=1000),
+       step = st.integers(min_value=0, max_value=10000))
+def test_constant(epoch, step):
+    "Test that the constant schedule always gives the same learning rate"
+    assert sch.Constant(0.1)(epoch, step) == 0.1
+
+
+def test_step_decay():
+    "Test that the learning rate is multiplied by drop every epochs_drop epochs"
+    schedule = sch.StepDecay(1., drop=0.5, epochs_drop=3)
+    assert [schedule(epoch, 0) for epoch in range(7)] == [1., 1., 1., 0.5, 0.5, 0.5, 0.25]
+
+
+@given(epoch = st.integers(min_value=0, max_value=100))
+def test_exponential_decay(epoch):
+    "Test the exponential decay of the learning rate with the epochs"
+    assert np.isclose(sch.ExponentialDecay(0.1, decay_rate=0.9)(epoch, 0), 0.1 * 0.9**epoch)
+
+
+@given(epoch = st.integers(min_value=0, max_value=100))
+def test_cosine_annealing_range(epoch):
+    "Test that the cosine annealing goes from the initial learning rate to the minimum, without going outside"
+    schedule = sch.CosineAnnealing(0.1, epochs=20, minimum=0.01)
+    assert schedule(0, 0) == 0.1
+    assert np.isclose(schedule(20, 0), 0.01)
+    assert 0.01 - 1e-12 <= schedule(epoch, 0) <= 0.1
+    assert schedule(epoch + 1, 0) <= schedule(epoch, 0)
+
+
+def test_linear_warmup():
+    "Test that the learning rate grows linearly during the warmup, then it follows the wrapped schedule"
+    schedule = sch.LinearWarmup(sch.StepDecay(1., drop=0.5, epochs_drop=1), warmup_steps=4)
+    assert [schedule(0, step) for step in range(6)] == [0.25, 0.5, 0.75, 1., 1., 1.]
+    assert schedule(1, 10) == 0.5
+
+
+def test_reduce_on_plateau():
+    "Test that the learning rate is reduced only after patience epochs without improvement, down to the minimum"
+    schedule = sch.ReduceOnPlateau(1., factor=0.5, patience=2, minimum=0.3)
+    rates = []
+    for epoch, error in enumerate([5., 4., 4., 4.5, 3., 3., 3., 3., 3., 3.]):
+        rates.append(schedule(epoch, 0))
+        schedule.end_epoch(epoch, error)
+    assert rates == [1., 1., 1., 1., 0.5, 0.5, 0.5, 0.3, 0.3, 0.3]